@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic registry for benchmarking the pipeline.
+
+Layout and vocabulary follow the real tree: each dataspace gets
+  ontologies/core/{M versions}/core.ttl    OWL classes and object/datatype
+                                            properties with labels, comments,
+                                            subclass chains and domain/range
+                                            (modelled on tems core 5.0.0)
+  shapes/{name}/1.0.0/{name}.ttl           NodeShapes on the ontology classes
+  indexes/{name}/1.0.0/{name}.ttl          schema:DataCatalog of schema:Datasets
+  policies/{name}/1.0.0/{name}.ttl         ODRL sets with constrained rules
+  open-api/{name}/1.0.0/{name}.yaml        OpenAPI spec the shapes compile into
+and a README.md at the root. The first two dataspaces are called tems and
+tamis; further ones are ds3, ds4, ...
+
+Output is deterministic for a given set of arguments (--seed).
+
+Usage:
+  python benchmarks/generate_registry.py /tmp/bench --dataspaces 3 --versions 4 --triples 20000
+"""
+import sys, random, argparse, pathlib
+
+# Roughly the triples per class / property in core 5.0.0
+TRIPLES_PER_CLASS = 4
+TRIPLES_PER_PROPERTY = 5
+
+WORDS = ("media object article audio video image segment agent role contribution "
+         "publication descriptor metadata technical consumption audience license rights "
+         "event location topic claim evidence source review rating score language format "
+         "codec duration resolution channel provider dataset catalog archive").split()
+
+def dataspace_names(n: int) -> list:
+    return (["tems", "tamis"] + [f"ds{i}" for i in range(3, n + 1)])[:n]
+
+def _label(rng, k=2):
+    return " ".join(rng.choice(WORDS) for _ in range(k))
+
+def _camel(label: str, upper: bool) -> str:
+    parts = label.split()
+    head = parts[0].capitalize() if upper else parts[0]
+    return head + "".join(p.capitalize() for p in parts[1:])
+
+def ontology(space: str, version: str, triples: int, rng) -> tuple:
+    """(turtle text, class local names)"""
+    n_classes = max(2, triples // (3 * TRIPLES_PER_CLASS))
+    n_props = max(2, (triples - n_classes * TRIPLES_PER_CLASS) // TRIPLES_PER_PROPERTY)
+    out = [
+        f"@prefix ex: <https://w3id.org/{space}/core#> .",
+        "@prefix owl: <http://www.w3.org/2002/07/owl#> .",
+        "@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .",
+        "@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .",
+        "@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .",
+        "",
+        f"<https://w3id.org/{space}/core#> rdf:type owl:Ontology ;",
+        f'    rdfs:label "{space.upper()} synthetic core"@en ;',
+        f'    owl:versionInfo "{version}" .',
+        "",
+    ]
+    classes = []
+    for i in range(n_classes):
+        label = _label(rng)
+        name = f"{_camel(label, True)}{i}"
+        lines = [f"ex:{name} rdf:type owl:Class ;"]
+        if classes:
+            lines.append(f"    rdfs:subClassOf ex:{rng.choice(classes[-50:])} ;")
+        lines.append(f'    rdfs:comment "Synthetic class {i}: {_label(rng, 8)}."@en ;')
+        lines.append(f'    rdfs:label "{label.title()}"@en .')
+        out += lines + [""]
+        classes.append(name)
+    for i in range(n_props):
+        label = _label(rng)
+        name = f"{_camel(label, False)}{i}"
+        datatype = i % 3 == 0
+        out += [
+            f"ex:{name} rdf:type {'owl:DatatypeProperty' if datatype else 'owl:ObjectProperty'} ;",
+            f"    rdfs:domain ex:{rng.choice(classes)} ;",
+            f"    rdfs:range {'xsd:string' if datatype else 'ex:' + rng.choice(classes)} ;",
+            f'    rdfs:comment "Synthetic property {i}: {_label(rng, 6)}."@en ;',
+            f'    rdfs:label "{label}"@en .',
+            "",
+        ]
+    return "\n".join(out), classes
+
+def shapes(space: str, classes, n: int, rng) -> str:
+    out = [
+        "@prefix sh: <http://www.w3.org/ns/shacl#> .",
+        "@prefix schema: <http://schema.org/> .",
+        f"@prefix ex: <https://w3id.org/{space}/core#> .",
+        "@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .",
+        "",
+    ]
+    for i in range(n):
+        cls = rng.choice(classes)
+        out += [
+            f"<https://w3id.org/{space}/shapes/Shape{i}>",
+            "    a sh:NodeShape ;",
+            f"    sh:targetClass ex:{cls} ;",
+            "    sh:property [",
+            "        sh:path schema:name ;",
+            "        sh:datatype xsd:string ;",
+            "        sh:maxCount 3",
+            "    ] .",
+            "",
+        ]
+    return "\n".join(out)
+
+def index(space: str, classes, n: int, rng) -> str:
+    out = [
+        "@prefix schema: <http://schema.org/> .",
+        f"@prefix ex: <https://w3id.org/{space}/core#> .",
+        "",
+        f"<https://w3id.org/{space}/indexes/synthetic>",
+        "    a schema:DataCatalog ;",
+        '    schema:name "Synthetic providers"' + (" ;" if n else " ."),
+    ]
+    for i in range(n):
+        host = f"provider{i % 25}.example.org"
+        out += [
+            "    schema:dataset [",
+            "        a schema:Dataset ;",
+            f'        schema:name "{_label(rng, 3).title()} {i}" ;',
+            f'        schema:identifier "{space}-ds-{i}" ;',
+            f"        schema:url <https://{host}/> ;",
+            f"        schema:distribution [ schema:contentUrl <https://{host}/data/{i}> ] ;",
+            f"        schema:additionalType ex:{rng.choice(classes)}",
+            "    ]" + (" ;" if i < n - 1 else " ."),
+        ]
+    return "\n".join(out) + "\n"
+
+def policy(space: str, classes, n: int, rng) -> str:
+    out = [
+        "@prefix odrl: <http://www.w3.org/ns/odrl/2/> .",
+        f"@prefix ex: <https://w3id.org/{space}/core#> .",
+        "",
+    ]
+    for i in range(n):
+        kind = "prohibition" if i % 4 == 3 else "permission"
+        out += [
+            f"<https://w3id.org/{space}/policies/p{i}>",
+            "    a odrl:Set ;",
+            f"    odrl:{kind} [",
+            f"        odrl:target ex:{rng.choice(classes)} ;",
+            f"        odrl:action odrl:{rng.choice(['use', 'play', 'display', 'distribute'])} ;",
+            "        odrl:constraint [",
+            "            odrl:leftOperand odrl:spatial ;",
+            "            odrl:operator odrl:eq ;",
+            f'            odrl:rightOperand "{rng.choice(["EU", "US", "CH"])}"',
+            "        ]",
+            "    ] .",
+            "",
+        ]
+    return "\n".join(out)
+
+def openapi(space: str) -> str:
+    return "\n".join([
+        "openapi: 3.0.3",
+        "info:",
+        f"  title: {space} synthetic API",
+        "  version: 1.0.0",
+        "paths: {}",
+        "components:",
+        "  schemas:",
+        "    Error:",
+        "      type: object",
+        "",
+    ])
+
+def generate(root: pathlib.Path, dataspaces: int, versions: int, triples: int,
+             shapes_per_space: int, datasets: int, policies: int, seed: int = 0) -> dict:
+    """Write the registry under `root`; returns a summary of what was generated."""
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "README.md").write_text("# Synthetic registry\n\nGenerated for benchmarks.\n", encoding="utf-8")
+    files = 0
+    for space in dataspace_names(dataspaces):
+        classes = []
+        for v in range(versions):
+            version = f"{v + 1}.0.0"
+            text, classes = ontology(space, version, triples, rng)
+            d = root / space / "ontologies" / "core" / version
+            d.mkdir(parents=True, exist_ok=True)
+            (d / "core.ttl").write_text(text, encoding="utf-8")
+            files += 1
+        for section, name, text in (
+            ("shapes", "synthetic", shapes(space, classes, shapes_per_space, rng)),
+            ("indexes", "synthetic", index(space, classes, datasets, rng)),
+            ("policies", "synthetic", policy(space, classes, policies, rng)),
+        ):
+            d = root / space / section / name / "1.0.0"
+            d.mkdir(parents=True, exist_ok=True)
+            (d / f"{name}.ttl").write_text(text, encoding="utf-8")
+            files += 1
+        d = root / space / "open-api" / "synthetic" / "1.0.0"
+        d.mkdir(parents=True, exist_ok=True)
+        (d / "synthetic.yaml").write_text(openapi(space), encoding="utf-8")
+    return {"dataspaces": dataspaces, "versions": versions, "triples_per_ontology": triples,
+            "shapes": shapes_per_space, "datasets": datasets, "policies": policies, "ttl_files": files}
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("out", help="target folder (created)")
+    ap.add_argument("--dataspaces", type=int, default=2)
+    ap.add_argument("--versions", type=int, default=2, help="ontology versions per dataspace")
+    ap.add_argument("--triples", type=int, default=2000, help="approximate triples per ontology version")
+    ap.add_argument("--shapes", type=int, default=10, help="node shapes per dataspace")
+    ap.add_argument("--datasets", type=int, default=100, help="schema:Dataset entries per index")
+    ap.add_argument("--policies", type=int, default=10, help="ODRL policies per dataspace")
+    ap.add_argument("--seed", type=int, default=0)
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    summary = generate(pathlib.Path(args.out), args.dataspaces, args.versions, args.triples,
+                       args.shapes, args.datasets, args.policies, args.seed)
+    print(f"Generated {summary['ttl_files']} TTL file(s) in {args.out}: {summary}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Time and memory-profile the pipeline stages on synthetic registries.
+
+For every scale, a registry is generated into a temporary folder
+(generate_registry.py) and each stage runs there as its own process via
+scripts/registry.py, twice: "cold" (empty .registry-cache, no outputs) and
+"warm" (second run, incremental paths). Wall time, CPU time (user+sys of the
+stage and its worker processes) and peak RSS come from os.wait4().
+--repeat keeps the fastest of several runs per measurement.
+
+Results go to a JSON file (--output). With --baseline, every measurement is
+compared against the stored one and the run fails when a stage is slower or
+larger than baseline * (1 + --tolerance), ignoring differences below a small
+absolute floor so tiny stages do not flap. --update-baseline writes the
+current results as the new baseline. Baselines are machine-specific: record
+them on the machine (or CI runner type) that checks them.
+
+Usage:
+  python benchmarks/run_benchmarks.py --scales small,medium
+  python benchmarks/run_benchmarks.py --scales small --baseline benchmarks/baseline.json
+"""
+import os, sys, json, time, shutil, argparse, pathlib, platform, tempfile, subprocess
+
+import generate_registry
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+REGISTRY_CLI = REPO_ROOT / "scripts" / "registry.py"
+
+# generate_registry arguments per scale
+SCALES = {
+    "small": dict(dataspaces=2, versions=2, triples=2_000, shapes_per_space=10, datasets=100, policies=10),
+    "medium": dict(dataspaces=3, versions=4, triples=10_000, shapes_per_space=40, datasets=1_000, policies=50),
+    "large": dict(dataspaces=5, versions=6, triples=40_000, shapes_per_space=100, datasets=5_000, policies=200),
+}
+
+# Run in this order; each depends only on earlier ones
+STAGES = ["syntax", "serialize", "roundtrip", "shacl", "openapi", "changes", "indexes", "catalog", "search", "site"]
+
+# Regressions smaller than these never fail the check
+MIN_WALL_DELTA_S = 0.25
+MIN_RSS_DELTA_MB = 16.0
+
+def run_stage(stage: str, cwd: pathlib.Path, log) -> dict:
+    env = dict(os.environ, PAGES_BASE_URL="https://bench.example.org", RAW_BASE_URL="https://raw.example.org",
+               SOURCE_DATE_EPOCH="0", PYTHONHASHSEED="0")
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, str(REGISTRY_CLI), stage], cwd=cwd, env=env,
+                            stdout=log, stderr=subprocess.STDOUT)
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return {"wall_s": round(wall, 4), "cpu_s": round(usage.ru_utime + usage.ru_stime, 4),
+            "max_rss_mb": round(rss_mb, 1), "exit": proc.returncode}
+
+def best(runs: list) -> dict:
+    return min(runs, key=lambda r: r["wall_s"])
+
+def bench_scale(name: str, params: dict, repeat: int, keep: bool) -> dict:
+    work = pathlib.Path(tempfile.mkdtemp(prefix=f"registry-bench-{name}-"))
+    try:
+        registry = work / "registry"
+        summary = None
+        results = {stage: {"cold": [], "warm": []} for stage in STAGES}
+        with open(work / "stages.log", "w") as log:
+            for _ in range(repeat):
+                # Cold: no cache, no generated outputs
+                shutil.rmtree(registry, ignore_errors=True)
+                summary = generate_registry.generate(registry, **params)
+                for mode in ("cold", "warm"):
+                    for stage in STAGES:
+                        log.write(f"\n### {name} {mode} {stage}\n")
+                        log.flush()
+                        r = run_stage(stage, registry, log)
+                        results[stage][mode].append(r)
+                        if r["exit"] != 0:
+                            raise RuntimeError(f"{name}/{mode}/{stage} exited {r['exit']}; see {work / 'stages.log'}")
+        out = {"params": summary, "stages": {s: {m: best(runs) for m, runs in modes.items()} for s, modes in results.items()}}
+        for s in out["stages"].values():
+            for r in s.values():
+                r.pop("exit")
+        return out
+    finally:
+        if not keep:
+            shutil.rmtree(work, ignore_errors=True)
+        else:
+            print(f"  kept {work}")
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    try:
+        import rdflib
+        rdflib_version = rdflib.__version__
+    except ImportError:
+        rdflib_version = None
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "rdflib": rdflib_version, "commit": commit}
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Human-readable regressions of `results` against `baseline`."""
+    problems = []
+    for scale, data in results["scales"].items():
+        base_scale = baseline.get("scales", {}).get(scale)
+        if not base_scale:
+            continue
+        for stage, modes in data["stages"].items():
+            for mode, r in modes.items():
+                b = base_scale["stages"].get(stage, {}).get(mode)
+                if not b:
+                    continue
+                for key, floor in (("wall_s", MIN_WALL_DELTA_S), ("max_rss_mb", MIN_RSS_DELTA_MB)):
+                    limit = b[key] * (1 + tolerance)
+                    if r[key] > limit and r[key] - b[key] > floor:
+                        problems.append(f"{scale}/{stage}/{mode}: {key} {r[key]} > {b[key]} (+{tolerance:.0%})")
+    return problems
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--scales", default="small", help=f"comma-separated, from: {', '.join(SCALES)}")
+    ap.add_argument("--repeat", type=int, default=1, help="runs per measurement; the fastest is kept")
+    ap.add_argument("--output", default=str(REPO_ROOT / "benchmarks" / "results.json"))
+    ap.add_argument("--baseline", help="baseline JSON to check against")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression (default 0.25)")
+    ap.add_argument("--update-baseline", action="store_true", help="write the results to --baseline")
+    ap.add_argument("--keep", action="store_true", help="keep the generated registries and stage logs")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        print(f"Unknown scale(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    results = {"environment": environment(), "tolerance": args.tolerance, "scales": {}}
+    for scale in scales:
+        print(f"== {scale}: {SCALES[scale]}")
+        data = bench_scale(scale, SCALES[scale], args.repeat, args.keep)
+        results["scales"][scale] = data
+        for stage, modes in data["stages"].items():
+            c, w = modes["cold"], modes["warm"]
+            print(f"  {stage:10} cold {c['wall_s']:7.2f}s {c['max_rss_mb']:7.1f} MB   "
+                  f"warm {w['wall_s']:7.2f}s {w['max_rss_mb']:7.1f} MB")
+
+    out = pathlib.Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    print(f"Wrote {out}")
+
+    if args.baseline and args.update_baseline:
+        pathlib.Path(args.baseline).write_text(json.dumps(results, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Updated baseline {args.baseline}")
+        return 0
+    if args.baseline:
+        try:
+            baseline = json.loads(pathlib.Path(args.baseline).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            print(f"No baseline at {args.baseline}; record one with --update-baseline.", file=sys.stderr)
+            return 2
+        problems = compare(results, baseline, args.tolerance)
+        for p in problems:
+            print(f"REGRESSION {p}", file=sys.stderr)
+        if problems:
+            return 1
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
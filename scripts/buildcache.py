@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the build scripts for incremental runs.
+
+Build state lives under .registry-cache/ at the repo root. It is ignored by
+git and carried between CI runs with actions/cache; deleting it simply forces
+a full rebuild. Override the location with REGISTRY_CACHE_DIR.
+"""
+import os, json, hashlib, pathlib
+
+CACHE_DIR = pathlib.Path(os.environ.get("REGISTRY_CACHE_DIR", ".registry-cache")).resolve()
+
+def file_sha256(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def settings_hash(settings) -> str:
+    # Stable fingerprint of any JSON-serializable settings object
+    blob = json.dumps(settings, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def load_json(path: pathlib.Path, default):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return default
+
+def save_json(path: pathlib.Path, data) -> None:
+    # Write-then-rename so an interrupted run never leaves a truncated file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Index of what a SHACL shapes file could ever target in a data file.
+
+For every data TTL we record the rdf:types and predicates it contains, widened
+with what RDFS inference could add (superclasses, rdfs:domain/rdfs:range
+classes, superproperties). For every shapes TTL we record its targets. A
+(shapes, data) pair where no target can match needs no pySHACL run.
+
+Entries are keyed by path and the file's sha256 and persisted in
+.registry-cache/focus-index.json, so unchanged files are never re-parsed just
+to decide applicability.
+"""
+from rdflib import Graph, URIRef, RDF, RDFS, OWL
+from rdflib.namespace import SH
+
+from buildcache import CACHE_DIR, load_json, save_json
+
+INDEX_PATH = CACHE_DIR / "focus-index.json"
+INDEX_VERSION = 1
+
+# Targets in these namespaces can be satisfied by RDFS axioms alone
+# (everything is an rdfs:Resource, etc.), so they are never pruned.
+AXIOMATIC_NAMESPACES = (str(RDF), str(RDFS))
+
+def _superclosure(start, edges):
+    # Transitive closure of `start` over child -> {parents}
+    seen = set(start)
+    todo = list(start)
+    while todo:
+        for parent in edges.get(todo.pop(), ()):
+            if parent not in seen:
+                seen.add(parent)
+                todo.append(parent)
+    return seen
+
+def _edges(g: Graph, prop):
+    out = {}
+    for child, parent in g.subject_objects(prop):
+        out.setdefault(child, set()).add(parent)
+    return out
+
+def data_entry(g: Graph) -> dict:
+    predicates = _superclosure(set(g.predicates()), _edges(g, RDFS.subPropertyOf))
+    types = set(g.objects(None, RDF.type))
+    for p in predicates:
+        types.update(g.objects(p, RDFS.domain))
+        types.update(g.objects(p, RDFS.range))
+    types = _superclosure(types, _edges(g, RDFS.subClassOf))
+    return {
+        "types": sorted(str(t) for t in types if isinstance(t, URIRef)),
+        "predicates": sorted(str(p) for p in predicates if isinstance(p, URIRef)),
+    }
+
+def shapes_entry(g: Graph) -> dict:
+    targets = {"class": set(), "predicate": set(), "always": False}
+    for cls in g.objects(None, SH.targetClass):
+        targets["class"].add(str(cls))
+    # Implicit class targets: a shape that is also a class
+    for shape in set(g.subjects(RDF.type, SH.NodeShape)) | set(g.subjects(RDF.type, SH.PropertyShape)):
+        if (shape, RDF.type, RDFS.Class) in g or (shape, RDF.type, OWL.Class) in g:
+            targets["class"].add(str(shape))
+    for prop in (SH.targetSubjectsOf, SH.targetObjectsOf):
+        targets["predicate"].update(str(p) for p in g.objects(None, prop))
+    # sh:targetNode focus nodes exist whether or not the data mentions them;
+    # sh:target (SPARQL-based / custom) targets cannot be decided statically.
+    if any(True for _ in g.objects(None, SH.targetNode)) or any(True for _ in g.objects(None, SH.target)):
+        targets["always"] = True
+    if any(str(c).startswith(AXIOMATIC_NAMESPACES) for c in targets["class"]):
+        targets["always"] = True
+    return {
+        "class": sorted(targets["class"]),
+        "predicate": sorted(targets["predicate"]),
+        "always": targets["always"],
+    }
+
+def may_apply(shapes: dict, data: dict) -> bool:
+    if shapes["always"]:
+        return True
+    return bool(set(shapes["class"]) & set(data["types"])) or \
+        bool(set(shapes["predicate"]) & set(data["predicates"]))
+
+def load_index() -> dict:
+    index = load_json(INDEX_PATH, {})
+    if index.get("version") != INDEX_VERSION:
+        index = {"version": INDEX_VERSION, "data": {}, "shapes": {}}
+    return index
+
+def save_index(index: dict) -> None:
+    save_json(INDEX_PATH, index)
+
+def lookup(index: dict, kind: str, path: str, digest: str, graph_loader):
+    # Return the cached entry for `path`, (re)building it if the hash moved
+    entry = index[kind].get(path)
+    if entry is None or entry.get("sha256") != digest:
+        build = data_entry if kind == "data" else shapes_entry
+        entry = dict(build(graph_loader(path)), sha256=digest)
+        index[kind][path] = entry
+    return entry
+
+def prune(index: dict, kind: str, live_paths) -> None:
+    # Drop entries for files that no longer exist
+    for path in set(index[kind]) - set(live_paths):
+        del index[kind][path]
@@ -1,92 +1,64 @@
 #!/usr/bin/env python3
 import pathlib
-from collections import defaultdict
 
-REPO_ROOT = pathlib.Path(".").resolve()
-DATA_SPACES = ["tems", "tamis"]
-SECTIONS = ["ontologies", "shapes", "indexes", "policies", "open-api"]
+import instrument
+import registry_manifest
 
-ONTO_EXTS = {".ttl", ".jsonld", ".rdf", ".owl", ".xml", ".n3", ".nt"}
+REPO_ROOT = pathlib.Path(".").resolve()
+SECTION_TITLES = {"open-api": "OpenAPI"}
 
-def rglob_files(root: pathlib.Path):
-    for p in sorted(root.rglob("*")):
-        if p.is_file():
-            yield p
+ONTO_EXTS = {".ttl", ".jsonld", ".rdf", ".owl", ".xml", ".n3", ".nt", ".json"}
 
 def md_escape(s: str) -> str:
     return s.replace("|", "\\|")
 
-def rel_link_from_space(space_root: pathlib.Path, abs_path: pathlib.Path) -> str:
+def rel_link_from_space(space: str, rel_path: str) -> str:
     # ./indexes/foo.jsonld etc. (relative to tems/ or tamis/)
-    return "./" + abs_path.relative_to(space_root).as_posix()
+    return "./" + rel_path[len(space) + 1:]
 
-def build_ontologies_table(space_root: pathlib.Path) -> str:
-    ont_root = space_root / "ontologies"
-    if not ont_root.exists():
-        return "_(none found)_"
-    groups = defaultdict(list)  # (name, version) -> [file]
-    for f_abs in rglob_files(ont_root):
-        if f_abs.suffix.lower() not in ONTO_EXTS:
-            continue
-        parts = f_abs.relative_to(space_root).parts  # ('ontologies','core','0.1.0','core.ttl')
-        if len(parts) < 4:
-            continue
-        name = parts[1] if len(parts) > 1 else "unknown"
-        version = parts[2] if len(parts) > 2 else "—"
-        groups[(name, version)].append(f_abs)
+def build_table(manifest, space: str, section: str) -> str:
+    groups = registry_manifest.groups(manifest, space, section)  # (name, version) -> [file]
+    for key in list(groups):
+        if section == "ontologies":
+            kept = [f for f in groups[key] if pathlib.PurePosixPath(f["path"]).suffix.lower() in ONTO_EXTS]
+        else:
+            kept = [f for f in groups[key] if not f["path"].lower().endswith("/readme.md")]
+        if kept:
+            groups[key] = kept
+        else:
+            del groups[key]
     if not groups:
         return "_(none found)_"
-    rows = ["| Ontology | Version | Files |", "|---|---:|---|"]
-    for (name, version), files in sorted(groups.items()):
+    header = "| Ontology | Version | Files |" if section == "ontologies" else "| Name | Version | Files |"
+    rows = [header, "|---|---:|---|"]
+    for (name, version), files in groups.items():
         links = [
-            f"[{md_escape(f.name)}]({rel_link_from_space(space_root, f)})"
-            for f in sorted(files)
+            f"[{md_escape(pathlib.PurePosixPath(f['path']).name)}]({rel_link_from_space(space, f['path'])})"
+            for f in files
         ]
         rows.append(f"| {md_escape(name)} | {md_escape(version)} | {', '.join(links)} |")
     return "\n".join(rows)
 
-def build_simple_table(space_root: pathlib.Path, section: str) -> str:
-    sec_root = space_root / section
-    if not sec_root.exists():
-        return "_(none found)_"
-    groups = defaultdict(list)  # (name, version) -> [file]
-    for f_abs in rglob_files(sec_root):
-        if f_abs.name.lower() == "readme.md":
-            continue
-        parts = f_abs.relative_to(space_root).parts  # ('shapes','media-objects','0.1.0','media-objects.jsonld')
-        if len(parts) < 4:
-            continue
-        name = parts[1] if len(parts) > 1 else "unknown"
-        version = parts[2] if len(parts) > 2 else "—"
-        groups[(name, version)].append(f_abs)
-    if not groups:
-        return "_(none found)_"
-    rows = ["| Name | Version | Files |", "|---|---:|---|"]
-    for (name, version), files in sorted(groups.items()):
-        links = [
-            f"[{md_escape(f.name)}]({rel_link_from_space(space_root, f)})"
-            for f in sorted(files)
-        ]
-        rows.append(f"| {md_escape(name)} | {md_escape(version)} | {', '.join(links)} |")
-    return "\n".join(rows)
+def section_title(section: str) -> str:
+    return SECTION_TITLES.get(section, section.replace("-", " ").title())
 
-def build_full_readme(space: str, space_root: pathlib.Path) -> str:
-    return (
-        f"# {space.upper()} assets\n\n"
-        f"This page is auto-generated by CI.\n\n"
-        f"## Ontologies\n{build_ontologies_table(space_root)}\n\n"
-        f"## Shapes\n{build_simple_table(space_root, 'shapes')}\n\n"
-        f"## Indexes\n{build_simple_table(space_root, 'indexes')}\n\n"
-        f"## Policies\n{build_simple_table(space_root, 'policies')}\n\n"
-        f"## OpenAPI\n{build_simple_table(space_root, 'open-api')}\n"
+def build_full_readme(manifest, space: str) -> str:
+    # Standard sections always get a heading; any extra discovered ones follow
+    sections = registry_manifest.order_sections(
+        set(registry_manifest.SECTION_ORDER) | set(manifest["dataspaces"].get(space, []))
     )
+    parts = [f"# {space.upper()} assets\n\n", "This page is auto-generated by CI.\n\n"]
+    for section in sections:
+        parts.append(f"## {section_title(section)}\n{build_table(manifest, space, section)}\n\n")
+    return "".join(parts).rstrip("\n") + "\n"
 
-def main():
-    for space in DATA_SPACES:
-        space_root = REPO_ROOT / space
-        space_root.mkdir(exist_ok=True)
-        readme = build_full_readme(space, space_root)
-        (space_root / "README.md").write_text(readme, encoding="utf-8")
+def main(argv=None) -> int:
+    manifest = registry_manifest.current(REPO_ROOT)
+    for space in registry_manifest.dataspaces(manifest):
+        with instrument.span("dataspace_readme", "phase", dataspace=space):
+            space_root = REPO_ROOT / space
+            readme = build_full_readme(manifest, space)
+            (space_root / "README.md").write_text(readme, encoding="utf-8")
     return 0
 
 if __name__ == "__main__":
@@ -2,21 +2,38 @@
 """
 Generate a DCAT JSON-LD catalog for the repo.
 
-- Scans: tems/{ontologies,shapes,indexes,policies} and tamis/{...}
+- Reads the registry manifest (registry_manifest.py): every dataspace and section
+  found on disk, e.g. tems/{ontologies,shapes,indexes,policies,open-api} and tamis/{...}
 - Ontologies are grouped by: {dataspace}/{ontologies}/{name}/{version}/
   Each file in that folder becomes a dcat:Distribution with mediaType + format.
 - Shapes / Indexes / Policies: one dcat:Dataset per file (simpler, usually single-serialization).
 
-Outputs:
-  docs/catalog.jsonld    (committed to repo)
-  (your workflow should also copy it to public/catalog.jsonld for GitHub Pages)
+Outputs (committed to repo; your workflow should also copy them to public/):
+  docs/catalog.jsonld                      root dcat:Catalog, links to one catalog per dataspace
+  docs/catalog/{space}.jsonld              dataspace catalog, links to one catalog per section
+  docs/catalog/{space}/{section}.jsonld    section catalog holding the dcat:Datasets
+
+Clients fetch only the shard they need; every dcat:catalog link carries the
+shard's dct:modified. Datasets are streamed to disk one at a time, so the full
+catalog is never held in memory. Files are byte-stable: dct:issued is kept
+from the previous file, and dct:modified only moves when the rest of the file
+changes (to SOURCE_DATE_EPOCH if set, else the current time).
+
+With REGISTRY_CANONICAL=1 (`registry.py all --canonical`) a changed section
+shard takes its dct:modified from the last git commit touching that section
+instead, and dataspace / root catalogs the newest dct:modified of their
+children, so rebuilding the same commit always gives the same bytes. This
+needs the full history (fetch-depth: 0 in CI): in a shallow clone the times
+fall back to SOURCE_DATE_EPOCH / the clock, with a warning.
 
 You can override the public base URL by setting env PAGES_BASE_URL (e.g. custom domain).
 A raw download base is derived from RAW_BASE_URL if provided (else built from GitHub env).
 """
 
-import os, sys, json, pathlib, datetime
-from collections import defaultdict
+import os, re, sys, json, hashlib, pathlib, datetime, functools, subprocess
+
+import instrument
+import registry_manifest
 
 REPO = os.environ.get("GITHUB_REPOSITORY")  # "owner/repo"
 REF_NAME = os.environ.get("GITHUB_REF_NAME", "main")
@@ -35,12 +52,32 @@ if not RAW_BASE_URL and REPO:
     RAW_BASE_URL = f"https://raw.githubusercontent.com/{REPO}/{REF_NAME}"
 RAW_BASE_URL = RAW_BASE_URL.rstrip("/")
 
+# Timestamps from git history instead of the clock (see above)
+CANONICAL = os.environ.get("REGISTRY_CANONICAL", "") not in ("", "0")
+
 ROOT = pathlib.Path(".").resolve()
 OUT = ROOT / "docs" / "catalog.jsonld"
+SHARD_DIR = ROOT / "docs" / "catalog"
 OUT.parent.mkdir(parents=True, exist_ok=True)
 
-DATA_SPACES = ["tems", "tamis"]
-SECTIONS = ["ontologies", "shapes", "indexes", "policies", "open-api"]
+CONTEXT = {
+    "@vocab": "http://www.w3.org/ns/dcat#",
+    "dcat": "http://www.w3.org/ns/dcat#",
+    "dct": "http://purl.org/dc/terms/",
+    "xsd": "http://www.w3.org/2001/XMLSchema#",
+    "foaf": "http://xmlns.com/foaf/0.1/",
+    "schema": "http://schema.org/",
+    "id": "@id",
+    "type": "@type"
+}
+
+PUBLISHER = {
+    "type": "foaf:Agent",
+    "foaf:name": "TEMS project"
+}
+
+# Timestamps are written last so the rest of the file can be compared as-is
+TRAILER_RE = re.compile(rb',\n  "dct:issued": "([^"]*)",\n  "dct:modified": "([^"]*)"\n}\n$')
 
 # MIME guess for RDF-ish files and OpenAPI
 MT_BY_EXT = {
@@ -64,31 +101,19 @@ def rel_to_raw(rel_path: pathlib.Path) -> str:
     # Direct download link
     return f"{RAW_BASE_URL}/{rel_path.as_posix().lstrip('./')}"
 
-def list_files(root: pathlib.Path):
-    for p in sorted(root.rglob("*")):
-        if p.is_file():
-            yield p
+def group_paths(manifest, space_name: str, section: str):
+    # (name, version) -> [absolute paths], from {space}/{section}/{name}/{version}/...
+    return {
+        key: [ROOT / f["path"] for f in entries]
+        for key, entries in registry_manifest.groups(manifest, space_name, section).items()
+    }
 
-def build_ontology_datasets(space_root: pathlib.Path, space_name: str):
+def build_ontology_datasets(manifest, space_root: pathlib.Path, space_name: str):
     """
     Group by {space}/ontologies/{name}/{version}/ and create one dcat:Dataset per group.
     Each file in the version folder becomes a dcat:Distribution.
     """
-    datasets = []
-    ont_root = space_root / "ontologies"
-    if not ont_root.exists():
-        return datasets
-
-    groups = defaultdict(list)
-    for f in list_files(ont_root):
-        parts = f.relative_to(space_root).parts  # e.g. ('ontologies','core','0.1.0','core.ttl')
-        if len(parts) < 4:  # must have at least ontologies/name/version/file
-            continue
-        name = parts[1]
-        version = parts[2]  # version without V prefix
-        groups[(name, version)].append(f)
-
-    for (name, version), files in sorted(groups.items()):
+    for (name, version), files in group_paths(manifest, space_name, "ontologies").items():
         # Dataset ID = folder URL
         if version == "—":
             ds_rel = space_root / "ontologies" / name
@@ -119,28 +144,13 @@ def build_ontology_datasets(space_root: pathlib.Path, space_name: str):
             **({"dct:hasVersion": version} if version not in (None, "—") else {}),
             "dcat:distribution": distributions,
         }
-        datasets.append(dataset)
-    return datasets
+        yield dataset
 
-def build_single_file_datasets(space_root: pathlib.Path, space_name: str, section: str):
+def build_single_file_datasets(manifest, space_name: str, section: str):
     """
     For shapes / indexes / policies: group by {name}/{version}/ and create one dataset per group.
     """
-    datasets = []
-    sec_root = space_root / section
-    if not sec_root.exists():
-        return datasets
-
-    groups = defaultdict(list)
-    for f in list_files(sec_root):
-        parts = f.relative_to(space_root).parts  # e.g. ('shapes','media-objects','0.1.0','media-objects.jsonld')
-        if len(parts) < 4:  # must have at least section/name/version/file
-            continue
-        name = parts[1]
-        version = parts[2]
-        groups[(name, version)].append(f)
-
-    for (name, version), files in sorted(groups.items()):
+    for (name, version), files in group_paths(manifest, space_name, section).items():
         # Dataset ID = folder URL (use first file's directory)
         folder_rel = files[0].parent.relative_to(ROOT)
         dataset_id = rel_to_url(folder_rel)
@@ -161,7 +171,7 @@ def build_single_file_datasets(space_root: pathlib.Path, space_name: str, sectio
                 "dct:format": mt,
             })
         
-        datasets.append({
+        yield {
             "@id": dataset_id,
             "@type": "dcat:Dataset",
             "dct:title": title,
@@ -169,49 +179,174 @@ def build_single_file_datasets(space_root: pathlib.Path, space_name: str, sectio
             "dct:hasVersion": version,
             "dcat:keyword": [space_name, section, name],
             "dcat:distribution": distributions,
-        })
-    return datasets
-
-def main():
-    now = datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
-    catalog_datasets = []
-
-    for space in DATA_SPACES:
-        space_root = ROOT / space
-        if not space_root.exists():
-            continue
-        # ontologies grouped
-        catalog_datasets.extend(build_ontology_datasets(space_root, space))
-        # other sections per-file
-        for section in ("shapes", "indexes", "policies", "open-api"):
-            catalog_datasets.extend(build_single_file_datasets(space_root, space, section))
-
-    catalog = {
-        "@context": {
-            "@vocab": "http://www.w3.org/ns/dcat#",
-            "dcat": "http://www.w3.org/ns/dcat#",
-            "dct": "http://purl.org/dc/terms/",
-            "xsd": "http://www.w3.org/2001/XMLSchema#",
-            "foaf": "http://xmlns.com/foaf/0.1/",
-            "schema": "http://schema.org/",
-            "id": "@id",
-            "type": "@type"
-        },
-        "id": f"{PAGES_BASE_URL}/catalog.jsonld",
+        }
+
+def epoch_iso(epoch) -> str:
+    ts = datetime.datetime.fromtimestamp(int(epoch), datetime.timezone.utc)
+    return ts.replace(tzinfo=None).isoformat() + "Z"
+
+def now_iso() -> str:
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if epoch:
+        return epoch_iso(epoch)
+    ts = datetime.datetime.now(datetime.timezone.utc)
+    return ts.replace(microsecond=0, tzinfo=None).isoformat() + "Z"
+
+@functools.lru_cache(maxsize=None)
+def shallow_clone() -> bool:
+    """True (with a warning, once) when git history is truncated, as in a default CI checkout."""
+    try:
+        out = subprocess.run(["git", "rev-parse", "--is-shallow-repository"], cwd=ROOT,
+                             check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    if out != "true":
+        return False
+    print("warning: shallow git clone, catalog times fall back to SOURCE_DATE_EPOCH / the clock "
+          "(check out with fetch-depth: 0 for times from history)", file=sys.stderr)
+    return True
+
+def source_time(path: str):
+    """Commit time of the last change under `path`, or None (no git, untracked, shallow clone)."""
+    # In a shallow clone every path looks last changed by the oldest fetched commit
+    if shallow_clone():
+        return None
+    try:
+        out = subprocess.run(["git", "log", "-1", "--format=%ct", "--", path], cwd=ROOT,
+                             check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return epoch_iso(out) if out else None
+
+def previous_state(path: pathlib.Path):
+    """(sha256 of everything before the timestamps, issued, modified) of an existing file."""
+    if not path.exists():
+        return None
+    size = path.stat().st_size
+    with path.open("rb") as fh:
+        fh.seek(max(0, size - 512))
+        tail = fh.read()
+        m = TRAILER_RE.search(tail)
+        if not m:
+            return None
+        body_len = size - len(tail) + m.start()
+        fh.seek(0)
+        h = hashlib.sha256()
+        remaining = body_len
+        while remaining:
+            chunk = fh.read(min(1 << 20, remaining))
+            if not chunk:
+                break
+            h.update(chunk)
+            remaining -= len(chunk)
+    return h.hexdigest(), m.group(1).decode(), m.group(2).decode()
+
+def write_catalog(path: pathlib.Path, header: dict, items_key: str, items, modified: str = None) -> str:
+    """
+    Stream a catalog to `path`: `header` fields first, then `items` one by one
+    under `items_key`, then dct:issued / dct:modified. Returns dct:modified,
+    which is `modified` (default: now) when the file changed.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    h = hashlib.sha256()
+    with tmp.open("wb") as fh:
+        def emit(text: str):
+            data = text.encode("utf-8")
+            h.update(data)
+            fh.write(data)
+        head = json.dumps(header, indent=2)
+        emit(head[:-2] + f",\n  {json.dumps(items_key)}: [")
+        first = True
+        for item in items:
+            body = json.dumps(item, indent=2).replace("\n", "\n    ")
+            emit(("\n    " if first else ",\n    ") + body)
+            first = False
+        emit("]" if first else "\n  ]")
+
+        prev = previous_state(path)
+        if prev and prev[0] == h.hexdigest():
+            issued, modified = prev[1], prev[2]
+        else:
+            modified = modified or now_iso()
+            issued = prev[1] if prev else modified
+        fh.write(f',\n  "dct:issued": "{issued}",\n  "dct:modified": "{modified}"\n}}\n'.encode("utf-8"))
+    os.replace(tmp, path)
+    return modified
+
+def catalog_header(catalog_id: str, title: str, description: str) -> dict:
+    return {
+        "@context": CONTEXT,
+        "id": catalog_id,
         "type": "dcat:Catalog",
-        "dct:title": "TEMS / TAMIS Vocabulary Registry",
-        "dct:description": "DCAT catalog of ontologies, shapes, indexes, and policies published from this repository.",
-        "dct:issued": now,
-        "dct:modified": now,
-        "dct:publisher": {
-            "type": "foaf:Agent",
-            "foaf:name": "TEMS project"
-        },
-        "dcat:dataset": catalog_datasets
+        "dct:title": title,
+        "dct:description": description,
+        "dct:publisher": PUBLISHER,
     }
 
-    OUT.write_text(json.dumps(catalog, indent=2), encoding="utf-8")
-    print(f"Wrote {OUT}")
+def catalog_link(catalog_id: str, title: str, modified: str) -> dict:
+    return {"id": catalog_id, "type": "dcat:Catalog", "dct:title": title, "dct:modified": modified}
+
+def section_datasets(manifest, space: str, section: str):
+    if section == "ontologies":
+        return build_ontology_datasets(manifest, ROOT / space, space)
+    return build_single_file_datasets(manifest, space, section)
+
+def remove_stale_shards(written) -> None:
+    for p in sorted(SHARD_DIR.rglob("*.jsonld")) if SHARD_DIR.exists() else []:
+        if p not in written:
+            p.unlink()
+            print(f"Removed {p}")
+
+def main(argv=None) -> int:
+    manifest = registry_manifest.current(ROOT)
+    written = set()
+    space_links = []
+
+    for space in registry_manifest.dataspaces(manifest):
+        with instrument.span("catalog_dataspace", "phase", dataspace=space):
+            section_links = []
+            for section in manifest["dataspaces"][space]:
+                shard = SHARD_DIR / space / f"{section}.jsonld"
+                shard_id = rel_to_url(shard.relative_to(OUT.parent))
+                title = f"{space.upper()} {section}"
+                modified = write_catalog(
+                    shard,
+                    catalog_header(shard_id, title, f"DCAT catalog of {section} published in the {space.upper()} dataspace."),
+                    "dcat:dataset",
+                    section_datasets(manifest, space, section),
+                    source_time(f"{space}/{section}") if CANONICAL else None,
+                )
+                written.add(shard)
+                section_links.append(catalog_link(shard_id, title, modified))
+
+            space_out = SHARD_DIR / f"{space}.jsonld"
+            space_id = rel_to_url(space_out.relative_to(OUT.parent))
+            title = f"{space.upper()} Vocabulary Registry"
+            modified = write_catalog(
+                space_out,
+                catalog_header(space_id, title, f"DCAT catalog of the {space.upper()} dataspace, one sub-catalog per section."),
+                "dcat:catalog",
+                section_links,
+                max((l["dct:modified"] for l in section_links), default=None) if CANONICAL else None,
+            )
+            written.add(space_out)
+            space_links.append(catalog_link(space_id, title, modified))
+
+    remove_stale_shards(written)
+    write_catalog(
+        OUT,
+        catalog_header(
+            f"{PAGES_BASE_URL}/catalog.jsonld",
+            "TEMS / TAMIS Vocabulary Registry",
+            "DCAT catalog of ontologies, shapes, indexes, and policies published from this repository.",
+        ),
+        "dcat:catalog",
+        space_links,
+        max((l["dct:modified"] for l in space_links), default=None) if CANONICAL else None,
+    )
+    print(f"Wrote {OUT} and {len(written)} sub-catalog(s) under {SHARD_DIR}")
+    return 0
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
-import os, html, pathlib
+import html, pathlib
 from markdown import markdown
 
+import registry_manifest
+
 SITE_ROOT = pathlib.Path("public").resolve()
 REPO_ROOT = pathlib.Path(".").resolve()
 README_MD = REPO_ROOT / "README.md"
 
-def listing(path: pathlib.Path) -> str:
-    items = sorted(os.listdir(path))
+def listing(items) -> str:
     lis = []
     for name in items:
         if name.startswith('.'):
@@ -44,19 +45,22 @@ def make_root_index_from_readme():
     (SITE_ROOT / "index.html").write_text(html_page, encoding="utf-8")
 
 def make_subdir_indexes():
-    # Create index.html in subdirectories only (skip the site root)
-    for dirpath, dirnames, filenames in os.walk(SITE_ROOT):
-        p = pathlib.Path(dirpath)
-        if p.samefile(SITE_ROOT):
+    # Create index.html in subdirectories only (skip the site root).
+    # public/ mirrors the dataspace trees, so folders come from the manifest.
+    manifest = registry_manifest.current(REPO_ROOT)
+    for rel_dir, items in registry_manifest.directories(manifest).items():
+        p = SITE_ROOT / rel_dir
+        if not p.is_dir():
             continue
-        rel = "/" + p.relative_to(SITE_ROOT).as_posix()
+        rel = "/" + rel_dir
         (p / "index.html").write_text(
-            f"<h2>{html.escape(rel)}</h2>\n{listing(p)}\n", encoding="utf-8"
+            f"<h2>{html.escape(rel)}</h2>\n{listing(items)}\n", encoding="utf-8"
         )
 
-def main():
+def main(argv=None) -> int:
     make_root_index_from_readme()
     make_subdir_indexes()
+    return 0
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Compile every indexes/ TTL (all dataspaces, all versions) into one sharded,
+static inverted index that browsers and connectors can query with a few
+fetches instead of downloading and parsing every catalog.
+
+Each schema:Dataset becomes a document with a numeric id. Output under
+docs/search/ (published to public/search/ by generate_site.py):
+
+  meta.json                   counts, shard sizes, facet value counts
+  terms/{xx}.json             {token: [doc ids]} for tokens starting with xx
+  docs/{n}.json               documents n*DOCS_PER_SHARD ... as stored fields
+  facets/{facet}.json         {value: [doc ids]} for additionalType,
+                              dataspace, provider and latest
+
+Full text covers schema:name / schema:alternateName / schema:identifier,
+tokenized like the term index (term_index.words). provider is the
+schema:provider (its schema:name when it is a node) or else the host of
+schema:url. latest is "true" for datasets from the newest version of their
+index. Doc ids are dense and sorted, so a query is: tokenize, fetch one
+terms shard per token (prefix match within it), intersect, filter by facet
+postings, then fetch the docs shards holding the first hits. query() below
+is the reference client.
+
+Files are only rewritten when their content changes.
+
+Usage:
+  python scripts/generate_search_index.py
+  python scripts/generate_search_index.py --query "afp fact" --facet dataspace=tems
+"""
+import sys, json, argparse, pathlib
+from urllib.parse import urlsplit
+from rdflib import BNode, Literal, URIRef, RDF
+from rdflib.namespace import Namespace
+
+import graph_cache
+import instrument
+import registry_manifest
+from term_index import words
+
+SCHEMA = Namespace("http://schema.org/")
+
+REPO_ROOT = pathlib.Path(".").resolve()
+OUT_DIR = REPO_ROOT / "docs" / "search"
+SEARCH_VERSION = 1
+DOCS_PER_SHARD = 500
+TERM_KEY_LENGTH = 2
+FACETS = ["additionalType", "dataspace", "provider", "latest"]
+
+def _texts(g, node, prop) -> list:
+    return sorted({str(o) for o in g.objects(node, prop) if isinstance(o, Literal)})
+
+def _iris(g, node, prop) -> list:
+    return sorted({str(o) for o in g.objects(node, prop) if isinstance(o, URIRef)})
+
+def _provider(g, node):
+    for o in g.objects(node, SCHEMA.provider):
+        if isinstance(o, Literal):
+            return str(o)
+        name = g.value(o, SCHEMA.name)
+        if name is not None:
+            return str(name)
+        if isinstance(o, URIRef):
+            return str(o)
+    url = g.value(node, SCHEMA.url)
+    if url is not None:
+        return urlsplit(str(url)).hostname
+    return None
+
+def extract_documents(entry: dict, latest: bool) -> list:
+    """Stored fields for every schema:Dataset in one index file."""
+    g = graph_cache.load_graph(REPO_ROOT / entry["path"], entry["sha256"])
+    docs = []
+    for ds in g.subjects(RDF.type, SCHEMA.Dataset):
+        catalog = next(iter(g.subjects(SCHEMA.dataset, ds)), None)
+        doc = {
+            "name": _texts(g, ds, SCHEMA.name),
+            "alternateName": _texts(g, ds, SCHEMA.alternateName),
+            "identifier": _texts(g, ds, SCHEMA.identifier),
+            "url": _iris(g, ds, SCHEMA.url),
+            "contentUrl": sorted({str(u) for d in g.objects(ds, SCHEMA.distribution)
+                                  for u in g.objects(d, SCHEMA.contentUrl)}),
+            "additionalType": _iris(g, ds, SCHEMA.additionalType),
+            "provider": _provider(g, ds),
+            "catalog": str(catalog) if isinstance(catalog, URIRef) else None,
+            "iri": str(ds) if not isinstance(ds, BNode) else None,
+            "dataspace": entry["dataspace"],
+            "index": entry["name"],
+            "version": entry["version"],
+            "source": entry["path"],
+            "latest": latest,
+        }
+        docs.append({k: v for k, v in doc.items() if v not in (None, [])})
+    docs.sort(key=lambda d: (d.get("identifier", [""])[0], d.get("name", [""])[0], d.get("iri", "")))
+    return docs
+
+def collect(manifest) -> list:
+    docs = []
+    for space in registry_manifest.dataspaces(manifest):
+        newest = {name: version for name, (version, _) in registry_manifest.latest(manifest, space, "indexes").items()}
+        for (name, version), entries in registry_manifest.groups(manifest, space, "indexes").items():
+            for entry in entries:
+                if entry["path"].endswith(".ttl"):
+                    docs.extend(extract_documents(entry, newest.get(name) == version))
+    return docs
+
+def facet_values(doc: dict, facet: str) -> list:
+    value = doc.get(facet)
+    if value is None:
+        return []
+    if isinstance(value, bool):
+        return [str(value).lower()]
+    return value if isinstance(value, list) else [value]
+
+def build_index(docs: list) -> dict:
+    """Relative path -> JSON-serializable content for every output file."""
+    postings, facets = {}, {f: {} for f in FACETS}
+    for i, doc in enumerate(docs):
+        text = doc.get("name", []) + doc.get("alternateName", []) + doc.get("identifier", [])
+        for w in {w for t in text for w in words(t)}:
+            postings.setdefault(w, []).append(i)
+        for f in FACETS:
+            for v in facet_values(doc, f):
+                facets[f].setdefault(v, []).append(i)
+
+    files = {}
+    term_shards = {}
+    for token in sorted(postings):
+        term_shards.setdefault(token[:TERM_KEY_LENGTH], {})[token] = postings[token]
+    for key, shard in term_shards.items():
+        files[f"terms/{key}.json"] = shard
+    for n in range(0, len(docs), DOCS_PER_SHARD):
+        files[f"docs/{n // DOCS_PER_SHARD}.json"] = docs[n:n + DOCS_PER_SHARD]
+    for f, values in facets.items():
+        files[f"facets/{f}.json"] = dict(sorted(values.items()))
+    files["meta.json"] = {
+        "version": SEARCH_VERSION,
+        "documents": len(docs),
+        "docsPerShard": DOCS_PER_SHARD,
+        "termKeyLength": TERM_KEY_LENGTH,
+        "termShards": sorted(term_shards),
+        "facets": {f: {v: len(ids) for v, ids in sorted(values.items())} for f, values in facets.items()},
+    }
+    return files
+
+def write_files(files: dict, out_dir: pathlib.Path):
+    """Write changed files and drop stale ones; returns (written, removed)."""
+    written, removed = [], []
+    for rel, content in sorted(files.items()):
+        path = out_dir / rel
+        data = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(",", ":")) + "\n"
+        try:
+            if path.read_text(encoding="utf-8") == data:
+                continue
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(data, encoding="utf-8")
+        written.append(rel)
+    if out_dir.exists():
+        for path in sorted(out_dir.rglob("*.json")):
+            rel = path.relative_to(out_dir).as_posix()
+            if rel not in files:
+                path.unlink()
+                removed.append(rel)
+    return written, removed
+
+# -- reference client ------------------------------------------------------------
+
+def query(fetch, text: str = "", facets: dict = None, limit: int = 20):
+    """
+    Run a query against the static files; fetch(rel_path) returns parsed JSON.
+
+    Every query word must match a token prefix; facets are exact (any of the
+    given values per facet). Returns (total hits, first `limit` documents).
+    """
+    meta = fetch("meta.json")
+    hits = None
+    for w in words(text):
+        # A word shorter than the shard key spans every shard it prefixes
+        keys = [k for k in meta["termShards"] if k.startswith(w[:meta["termKeyLength"]])]
+        shard = {}
+        for k in keys:
+            shard.update(fetch(f"terms/{k}.json"))
+        found = {i for token, ids in shard.items() if token.startswith(w) for i in ids}
+        hits = found if hits is None else hits & found
+    for facet, values in (facets or {}).items():
+        postings = fetch(f"facets/{facet}.json")
+        found = {i for v in ([values] if isinstance(values, str) else values) for i in postings.get(v, ())}
+        hits = found if hits is None else hits & found
+    if hits is None:
+        hits = set(range(meta["documents"]))
+    ordered = sorted(hits)
+    out, shards = [], {}
+    for i in ordered[:limit]:
+        n = i // meta["docsPerShard"]
+        if n not in shards:
+            shards[n] = fetch(f"docs/{n}.json")
+        out.append(dict(shards[n][i % meta["docsPerShard"]], id=i))
+    return len(ordered), out
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--query", "-q", help="query the existing index instead of building it")
+    ap.add_argument("--facet", action="append", default=[], metavar="NAME=VALUE",
+                    help="facet filter for --query (repeatable)")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.query is not None or args.facet:
+        def fetch(rel):
+            return json.loads((OUT_DIR / rel).read_text(encoding="utf-8"))
+        facets = {}
+        for spec in args.facet:
+            name, _, value = spec.partition("=")
+            facets.setdefault(name, []).append(value)
+        total, docs = query(fetch, args.query or "", facets)
+        for d in docs:
+            print(f"{d['id']:>6}  {d['dataspace']:8} {(d.get('name') or d.get('identifier') or ['?'])[0]}  ({d['source']})")
+        print(f"{total} hit(s)")
+        return 0
+
+    with instrument.span("collect_datasets", "phase") as s:
+        docs = collect(registry_manifest.current(REPO_ROOT))
+        s.count("datasets", len(docs))
+    with instrument.span("build_search_index", "phase") as s:
+        files = build_index(docs)
+        s.count("files", len(files))
+    with instrument.span("write_search_index", "phase"):
+        written, removed = write_files(files, OUT_DIR)
+    print(f"Search index: {len(docs)} dataset(s), {len(files)} file(s) in "
+          f"{OUT_DIR.relative_to(REPO_ROOT)} ({len(written)} written, {len(removed)} removed)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
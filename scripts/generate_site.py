@@ -1,9 +1,45 @@
 #!/usr/bin/env python3
-import os, re, html, pathlib
-from markdown import markdown
+"""
+Build the static site in public/ incrementally.
+
+- Copies the dataspace trees (from the registry manifest), README.md, the
+  DCAT catalog shards and the search index from docs/ into public/, skipping files whose content
+  is unchanged and removing files whose source is gone.
+- Renders README.md files to index.html (Mermaid-enabled) and writes simple
+  directory listings, only when their inputs changed.
+- Writes .gz (and .br when the optional `brotli` package is installed)
+  siblings for every text artifact, so the CDN can serve precompressed bytes.
+- Writes public/site-manifest.json with sha256/ETag/size per file plus the
+  lists of paths changed and removed by this run, i.e. what to invalidate.
+
+Build state lives in .registry-cache/site-state.json; delete it (or public/)
+to force a full rebuild.
+"""
+import re, gzip, html, shutil, hashlib, pathlib
+
+import instrument
+import registry_manifest
+from buildcache import CACHE_DIR, load_json, save_json
+
+try:
+    import brotli
+except ImportError:  # optional: .br siblings are skipped without it
+    brotli = None
 
 REPO_ROOT = pathlib.Path(".").resolve()
 SITE_ROOT = pathlib.Path("public").resolve()
+STATE_PATH = CACHE_DIR / "site-state.json"
+SITE_MANIFEST = "site-manifest.json"
+
+# Extra (source, site path) pairs published next to the dataspace trees
+EXTRA_FILES = [("README.md", "README.md"), ("docs/catalog.jsonld", "catalog.jsonld")]
+EXTRA_TREES = [("docs/catalog", "catalog"), ("docs/search", "search")]
+
+COMPRESSIBLE = {".ttl", ".jsonld", ".xml", ".rdf", ".owl", ".nt", ".n3",
+                ".html", ".json", ".yaml", ".yml", ".md"}
+
+# Bump when the page template or rendering rules change
+RENDER_VERSION = "1"
 
 HTML_TEMPLATE = """<!doctype html>
 <html lang="en">
@@ -42,55 +78,168 @@ HTML_TEMPLATE = """<!doctype html>
 </html>
 """
 
-def md_to_html(md_text: str) -> str:
+def md_to_html(md_text: str, spaces) -> str:
+    from markdown import markdown  # deferred: only needed when a page is re-rendered
     body = markdown(md_text, extensions=["fenced_code", "tables", "toc"])
     # Rewrite README links to folder roots in the built site
-    body = re.sub(r'href="\.?/tems/README\.md"', 'href="tems/"', body)
-    body = re.sub(r'href="\.?/tamis/README\.md"', 'href="tamis/"', body)
+    for ds in spaces:
+        body = re.sub(rf'href="\.?/{re.escape(ds)}/README\.md"', f'href="{ds}/"', body)
     return HTML_TEMPLATE.replace("{{BODY}}", body)
 
-def write_html_from_readme(src_md: pathlib.Path, dst_html: pathlib.Path):
-    md = src_md.read_text(encoding="utf-8")
-    dst_html.parent.mkdir(parents=True, exist_ok=True)
-    dst_html.write_text(md_to_html(md), encoding="utf-8")
-
-def listing(path: pathlib.Path) -> str:
-    items = sorted(os.listdir(path))
+def listing(items) -> str:
     lis = []
     for name in items:
         if name.startswith('.'): continue
         lis.append(f'<li><a href="{html.escape(name)}">{html.escape(name)}</a></li>')
     return "<ul>" + "".join(lis) + "</ul>"
 
-def write_dir_listing(dir_path: pathlib.Path):
-    rel = "/" + dir_path.relative_to(SITE_ROOT).as_posix()
-    (dir_path / "index.html").write_text(
-        f"<h2>{html.escape(rel)}</h2>\n{listing(dir_path)}\n", encoding="utf-8"
-    )
-
-def main():
-    # Root README -> /index.html (Mermaid-enabled)
-    write_html_from_readme(REPO_ROOT / "README.md", SITE_ROOT / "index.html")
-
-    # TEMS/TAMIS READMEs -> /tems/index.html and /tamis/index.html
-    for ds in ("tems", "tamis"):
-        src = REPO_ROOT / ds / "README.md"
-        if src.exists():
-            write_html_from_readme(src, SITE_ROOT / ds / "index.html")
-
-    # Simple directory listings for deeper folders
-    skip = {
-        SITE_ROOT.as_posix(),
-        (SITE_ROOT / 'tems').as_posix(),
-        (SITE_ROOT / 'tamis').as_posix(),
-    }
-    for dirpath, dirnames, filenames in os.walk(SITE_ROOT):
-        p = pathlib.Path(dirpath)
-        if p.as_posix() in skip:
+def dir_listing(rel_dir: str, items) -> str:
+    return f"<h2>{html.escape('/' + rel_dir)}</h2>\n{listing(items)}\n"
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+class SiteBuild:
+    """Tracks what this run produced against the previous run's state."""
+
+    def __init__(self):
+        state = load_json(STATE_PATH, {})
+        self.previous = state.get("files", {}) if state.get("site_root") == SITE_ROOT.as_posix() else {}
+        self.files = {}      # site path -> {"sha256", "key"}
+        self.changed = []
+
+    def _unchanged(self, rel: str, key: str) -> bool:
+        # A missing .gz/.br (brotli installed since, public/ partly restored) counts as a change
+        prev = self.previous.get(rel)
+        if prev and prev["key"] == key and (SITE_ROOT / rel).is_file() and compressed_ok(rel):
+            self.files[rel] = prev
+            return True
+        return False
+
+    def _record(self, rel: str, key: str, digest: str):
+        prev = self.previous.get(rel)
+        self.files[rel] = {"sha256": digest, "key": key}
+        if not prev or prev["sha256"] != digest or not compressed_ok(rel):
+            self.changed.append(rel)
+
+    def copy(self, src: pathlib.Path, rel: str, digest: str):
+        if self._unchanged(rel, digest):
+            return
+        dst = SITE_ROOT / rel
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(src, dst)
+        self._record(rel, digest, digest)
+
+    def render(self, rel: str, key: str, produce):
+        # `produce` is only called when `key` (a digest of all inputs) moved
+        if self._unchanged(rel, key):
+            return
+        data = produce().encode("utf-8")
+        dst = SITE_ROOT / rel
+        digest = sha256_bytes(data)
+        if not (dst.is_file() and sha256_bytes(dst.read_bytes()) == digest):
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            dst.write_bytes(data)
+        self._record(rel, key, digest)
+
+    def removed(self):
+        return sorted(set(self.previous) - set(self.files))
+
+def compressed_paths(rel: str):
+    out = [SITE_ROOT / (rel + ".gz")]
+    if brotli is not None:
+        out.append(SITE_ROOT / (rel + ".br"))
+    return out
+
+def compressible(rel: str) -> bool:
+    return pathlib.PurePosixPath(rel).suffix.lower() in COMPRESSIBLE
+
+def compressed_ok(rel: str) -> bool:
+    return not compressible(rel) or all(p.is_file() for p in compressed_paths(rel))
+
+def precompress(rel: str):
+    data = (SITE_ROOT / rel).read_bytes()
+    # mtime=0 keeps the .gz bytes stable for identical input
+    with open(SITE_ROOT / (rel + ".gz"), "wb") as raw:
+        with gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=9, mtime=0) as gz:
+            gz.write(data)
+    if brotli is not None:
+        (SITE_ROOT / (rel + ".br")).write_bytes(brotli.compress(data, quality=11))
+
+def remove_output(rel: str):
+    for p in [SITE_ROOT / rel, SITE_ROOT / (rel + ".gz"), SITE_ROOT / (rel + ".br")]:
+        if p.is_file():
+            p.unlink()
+
+def encodings(rel: str):
+    return [enc for enc, suffix in (("br", ".br"), ("gzip", ".gz")) if (SITE_ROOT / (rel + suffix)).is_file()]
+
+def main(argv=None) -> int:
+    manifest = registry_manifest.current(REPO_ROOT)
+    spaces = registry_manifest.dataspaces(manifest)
+    build = SiteBuild()
+    SITE_ROOT.mkdir(parents=True, exist_ok=True)
+
+    # Source files: dataspace trees, README.md, catalog shards
+    with instrument.span("copy_sources", "phase"):
+        for f in manifest["files"]:
+            build.copy(REPO_ROOT / f["path"], f["path"], f["sha256"])
+        for src, rel in EXTRA_FILES:
+            if (REPO_ROOT / src).is_file():
+                build.copy(REPO_ROOT / src, rel, sha256_bytes((REPO_ROOT / src).read_bytes()))
+        for src_dir, rel_dir in EXTRA_TREES:
+            for p in sorted((REPO_ROOT / src_dir).rglob("*")) if (REPO_ROOT / src_dir).is_dir() else []:
+                if p.is_file():
+                    rel = f"{rel_dir}/{p.relative_to(REPO_ROOT / src_dir).as_posix()}"
+                    build.copy(p, rel, sha256_bytes(p.read_bytes()))
+
+    # Root README -> /index.html, dataspace READMEs -> /tems/index.html, ...
+    pages = [("README.md", "index.html")]
+    pages += [(f"{ds}/README.md", f"{ds}/index.html") for ds in spaces]
+    for src_rel, out_rel in pages:
+        src = REPO_ROOT / src_rel
+        if not src.exists():
             continue
-        if (p / "index.html").exists():
+        md = src.read_text(encoding="utf-8")
+        key = sha256_bytes(f"{RENDER_VERSION}\0{','.join(spaces)}\0{md}".encode("utf-8"))
+        build.render(out_rel, key, lambda md=md: md_to_html(md, spaces))
+
+    # Simple directory listings for deeper folders. public/ mirrors the
+    # dataspace trees, so the manifest already knows every folder and its
+    # entries; no need to walk the copied site.
+    for rel_dir, items in registry_manifest.directories(manifest).items():
+        if rel_dir in spaces or "index.html" in items:
             continue
-        write_dir_listing(p)
+        page = dir_listing(rel_dir, items)
+        build.render(f"{rel_dir}/index.html", sha256_bytes(page.encode("utf-8")), lambda page=page: page)
+
+    removed = build.removed()
+    for rel in removed:
+        remove_output(rel)
+    with instrument.span("precompress", "phase") as s:
+        for rel in build.changed:
+            if compressible(rel):
+                precompress(rel)
+                s.count("files")
+
+    site_manifest = {
+        "files": {
+            rel: {
+                "sha256": info["sha256"],
+                "etag": f'"{info["sha256"][:32]}"',
+                "size": (SITE_ROOT / rel).stat().st_size,
+                "encodings": encodings(rel),
+            }
+            for rel, info in sorted(build.files.items())
+        },
+        "changed": sorted(build.changed),
+        "removed": removed,
+    }
+    save_json(SITE_ROOT / SITE_MANIFEST, site_manifest)
+    save_json(STATE_PATH, {"site_root": SITE_ROOT.as_posix(), "files": build.files})
+    print(f"Site: {len(build.changed)} changed, {len(removed)} removed, "
+          f"{len(build.files) - len(build.changed)} unchanged file(s).")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Persistent parsed-graph cache shared by the build scripts.
+
+Turtle parsing is the most expensive step of the pipeline, and several
+scripts parse the same files. load_graph() parses a source once and stores
+the result under .registry-cache/graphs/<sha256>.<key>.rgc; later calls (in
+any script, any run) decode that file instead. <key> fingerprints the rdflib
+version, the cache format and the parser format, so upgrading rdflib or
+changing the layout below never reuses entries written by another setup.
+
+File layout (all little-endian):
+  b"RGC2"                      magic / format version
+  u32 header length, header    UTF-8 JSON {"namespaces": [...], "terms": [...]}
+  triples                      array('I') of term ids, 3 per triple
+
+`terms` is the term dictionary: each RDF term is stored once as a list
+  ["u", iri] | ["b", id] | ["l", lexical, datatype or null, lang or null]
+and triples refer to it by index. The header is plain data, never code, so
+entries restored from a shared CI cache (actions/cache) cannot run anything
+when loaded; a malformed entry is treated as a miss. Entries not used for
+MAX_AGE_DAYS are removed when new entries are written.
+
+A process that runs several stages (registry.py all) can call
+share_in_process() so that every stage gets the same Graph object per source
+hash instead of decoding the file again. Shared graphs must not be modified.
+"""
+import os, sys, json, time, struct, pathlib, threading
+from array import array
+import rdflib
+from rdflib import Graph, URIRef, BNode, Literal
+
+import instrument
+from buildcache import CACHE_DIR, file_sha256, settings_hash
+
+GRAPH_CACHE_DIR = CACHE_DIR / "graphs"
+MAGIC = b"RGC2"
+# Bump when the encoding of graphs changes
+CACHE_FORMAT = 2
+MAX_AGE_DAYS = 30
+
+FORMAT_BY_SUFFIX = {
+    ".ttl": "turtle",
+    ".jsonld": "json-ld",
+    ".rdf": "xml",
+    ".xml": "xml",
+    ".owl": "xml",
+    ".nt": "nt",
+    ".n3": "n3",
+}
+
+_shared = None  # (digest, parser format) -> Graph, when share_in_process() is on
+_shared_lock = threading.Lock()
+
+def share_in_process(enabled: bool = True) -> None:
+    global _shared
+    _shared = {} if enabled else None
+
+def parser_format(source: pathlib.Path, format: str = None) -> str:
+    return format or FORMAT_BY_SUFFIX.get(source.suffix.lower(), "turtle")
+
+def cache_key(format: str) -> str:
+    return settings_hash({"rdflib": rdflib.__version__, "cache": CACHE_FORMAT, "format": format})[:16]
+
+def cache_path(digest: str, format: str = "turtle") -> pathlib.Path:
+    return GRAPH_CACHE_DIR / f"{digest}.{cache_key(format)}.rgc"
+
+def _encode_term(t):
+    if isinstance(t, URIRef):
+        return ["u", str(t)]
+    if isinstance(t, BNode):
+        return ["b", str(t)]
+    return ["l", str(t), str(t.datatype) if t.datatype else None, t.language]
+
+def _decode_term(rec):
+    kind = rec[0]
+    if kind == "u":
+        return URIRef(rec[1])
+    if kind == "b":
+        return BNode(rec[1])
+    if kind != "l":
+        raise ValueError(f"unknown term kind {kind!r}")
+    if rec[3]:
+        return Literal(rec[1], lang=rec[3])
+    return Literal(rec[1], datatype=URIRef(rec[2]) if rec[2] else None)
+
+def encode_graph(g: Graph) -> bytes:
+    ids = {}
+    terms = []
+    triples = array("I")
+    for triple in g:
+        for t in triple:
+            i = ids.get(t)
+            if i is None:
+                i = ids[t] = len(terms)
+                terms.append(_encode_term(t))
+            triples.append(i)
+    if sys.byteorder != "little":
+        triples.byteswap()
+    namespaces = [(prefix, str(ns)) for prefix, ns in g.namespaces()]
+    header = json.dumps({"namespaces": namespaces, "terms": terms}, ensure_ascii=False,
+                        separators=(",", ":")).encode("utf-8")
+    return MAGIC + struct.pack("<I", len(header)) + header + triples.tobytes()
+
+def decode_graph(blob: bytes) -> Graph:
+    if blob[:4] != MAGIC:
+        raise ValueError("not a graph cache file")
+    try:
+        (hlen,) = struct.unpack_from("<I", blob, 4)
+        header = json.loads(blob[8:8 + hlen].decode("utf-8"))
+        namespaces, records = header["namespaces"], header["terms"]
+        terms = [_decode_term(rec) for rec in records]
+    except (struct.error, KeyError, IndexError, TypeError) as e:
+        raise ValueError(f"corrupt graph cache header: {e}") from None
+    body = blob[8 + hlen:]
+    if len(body) % 12:
+        raise ValueError("truncated graph cache file")
+    triples = array("I")
+    triples.frombytes(body)
+    if sys.byteorder != "little":
+        triples.byteswap()
+    if triples and max(triples) >= len(terms):
+        raise ValueError("graph cache refers to unknown terms")
+
+    g = Graph()
+    for prefix, ns in namespaces:
+        g.bind(prefix, ns, override=True, replace=True)
+    it = iter(triples)
+    g.addN((terms[s], terms[p], terms[o], g) for s, p, o in zip(it, it, it))
+    return g
+
+def _store(path: pathlib.Path, g: Graph) -> None:
+    GRAPH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(encode_graph(g))
+    os.replace(tmp, path)
+    _expire()
+
+def _expire() -> None:
+    cutoff = time.time() - MAX_AGE_DAYS * 86400
+    for p in GRAPH_CACHE_DIR.glob("*.rgc"):
+        try:
+            if p.stat().st_mtime < cutoff:
+                p.unlink()
+        except FileNotFoundError:
+            pass
+
+def load_graph(source, digest: str = None, format: str = None) -> Graph:
+    """
+    Parsed graph for `source`, from the cache when its content hash is known.
+
+    Callers that already hashed the file pass `digest` to avoid re-reading it.
+    """
+    source = pathlib.Path(source)
+    digest = digest or file_sha256(source)
+    format = parser_format(source, format)
+    if _shared is not None:
+        with _shared_lock:
+            g = _shared.get((digest, format))
+        if g is None:
+            g = _load(source, digest, format)
+            with _shared_lock:
+                g = _shared.setdefault((digest, format), g)
+        return g
+    return _load(source, digest, format)
+
+def _load(source: pathlib.Path, digest: str, format: str) -> Graph:
+    with instrument.span("load_graph", file=instrument.rel(source)) as s:
+        path = cache_path(digest, format)
+        try:
+            g = decode_graph(path.read_bytes())
+            os.utime(path)  # keep recently used entries from expiring
+            s.set(cache="hit")
+            s.count("triples_decoded", len(g))
+            return g
+        except (FileNotFoundError, ValueError):
+            pass
+        g = Graph()
+        g.parse(source.as_posix(), format=format)
+        s.set(cache="miss")
+        s.count("triples_parsed", len(g))
+        try:
+            _store(path, g)
+        except OSError as e:
+            print(f"warning: could not cache graph for {source}: {e}", file=sys.stderr)
+        return g
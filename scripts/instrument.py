@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Timing and memory instrumentation shared by the build scripts.
+
+Off unless REGISTRY_TRACE names an output file:
+
+  REGISTRY_TRACE=trace.json python scripts/registry.py all
+  REGISTRY_TRACE=trace.json REGISTRY_TRACE_FORMAT=chrome python scripts/registry.py all
+
+Scripts wrap units of work (a stage, a file, a (shapes, data) pair) in spans:
+
+  with instrument.span("serialize", file=rel) as s:
+      s.count("triples_serialized", len(g))
+
+Each span records its start, wall time, CPU time of the calling thread, its
+arguments and any counters, plus two memory figures: process_peak_rss_mb is
+the whole process's peak RSS when the span ends (not the span's own), and
+rss_growth_mb how much that peak rose while the span was open (allocations of
+other threads of the process included). Spans opened
+in pool workers are appended to per-process part files next to the trace
+(<trace>.parts/<pid>.jsonl); the process that turned tracing on merges them
+into the trace when it exits. The default format is
+  {"version": 2, "spans": [...], "totals": {name: {...}}}
+and REGISTRY_TRACE_FORMAT=chrome writes Chrome trace events instead, for
+chrome://tracing or https://ui.perfetto.dev flame views. With tracing off,
+span() hands out one shared no-op object.
+
+Summarize a trace (slowest spans and per-name totals):
+  python scripts/instrument.py trace.json --top 20
+"""
+import os, sys, json, time, atexit, shutil, argparse, pathlib, threading
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
+TRACE_VERSION = 2
+TRACE_PATH = os.environ.get("REGISTRY_TRACE") or None
+TRACE_FORMAT = os.environ.get("REGISTRY_TRACE_FORMAT", "json")
+
+# Per-span figures kept outside "args" (Chrome events carry them as args)
+MEASURES = ("cpu_s", "process_peak_rss_mb", "rss_growth_mb")
+
+# Pid of the process that started tracing; inherited by every worker
+_OWNER_ENV = "REGISTRY_TRACE_OWNER"
+
+_spans = []  # finished spans of the owner process
+_local = threading.local()
+
+def enabled() -> bool:
+    return TRACE_PATH is not None
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def rel(path) -> str:
+    """`path` relative to the working directory (the repo root) when inside it."""
+    try:
+        return pathlib.Path(path).resolve().relative_to(pathlib.Path.cwd()).as_posix()
+    except ValueError:
+        return str(path)
+
+def _parts_dir() -> pathlib.Path:
+    return pathlib.Path(TRACE_PATH + ".parts")
+
+def _is_owner() -> bool:
+    return os.environ.get(_OWNER_ENV) == str(os.getpid())
+
+class Span:
+    __slots__ = ("name", "cat", "args", "counts", "parent", "_start_us", "_wall", "_cpu", "_peak")
+
+    def __init__(self, name: str, cat: str, args: dict):
+        self.name, self.cat, self.args, self.counts = name, cat, args, {}
+        self.parent = None
+
+    def count(self, key: str, n: int = 1) -> None:
+        self.counts[key] = self.counts.get(key, 0) + n
+
+    def set(self, **args) -> None:
+        self.args.update(args)
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self._start_us = time.time_ns() // 1000
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        self._peak = peak_rss_mb()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        cpu = time.thread_time() - self._cpu
+        peak = peak_rss_mb()
+        _local.stack.pop()
+        record = {
+            "name": self.name, "cat": self.cat, "pid": os.getpid(), "tid": threading.get_native_id(),
+            "start_us": self._start_us, "wall_s": round(wall, 6), "cpu_s": round(cpu, 6),
+            "process_peak_rss_mb": peak,
+            "rss_growth_mb": round(peak - self._peak, 1) if peak is not None else None,
+        }
+        if self.parent:
+            record["parent"] = self.parent
+        if self.args:
+            record["args"] = {k: v if isinstance(v, (int, float, bool)) or v is None else str(v)
+                              for k, v in self.args.items()}
+        if self.counts:
+            record["counts"] = self.counts
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        _emit(record)
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def count(self, key, n=1):
+        pass
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL = _NullSpan()
+
+def span(name: str, cat: str = "file", **args):
+    """Context manager timing one unit of work; a no-op unless tracing is on."""
+    if TRACE_PATH is None:
+        return _NULL
+    return Span(name, cat, args)
+
+def _emit(record: dict) -> None:
+    if _is_owner():
+        _spans.append(record)
+        return
+    # Pool worker: append right away, workers exit without running atexit
+    parts = _parts_dir()
+    parts.mkdir(parents=True, exist_ok=True)
+    with open(parts / f"{os.getpid()}.jsonl", "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(record) + "\n")
+
+def collect() -> list:
+    """All spans so far (this process and its workers), ordered by start."""
+    spans = list(_spans)
+    parts = _parts_dir()
+    for p in sorted(parts.glob("*.jsonl")) if parts.is_dir() else []:
+        with open(p, encoding="utf-8") as fh:
+            spans.extend(json.loads(line) for line in fh if line.strip())
+    return sorted(spans, key=lambda s: s["start_us"])
+
+def totals(spans) -> dict:
+    out = {}
+    for s in spans:
+        t = out.setdefault(s["name"], {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "process_peak_rss_mb": 0.0,
+                                       "rss_growth_mb": 0.0, "counts": {}})
+        t["count"] += 1
+        t["wall_s"] = round(t["wall_s"] + s["wall_s"], 6)
+        t["cpu_s"] = round(t["cpu_s"] + s["cpu_s"], 6)
+        for k in ("process_peak_rss_mb", "rss_growth_mb"):
+            t[k] = max(t[k], s.get(k) or 0.0)
+        for k, n in s.get("counts", {}).items():
+            t["counts"][k] = t["counts"].get(k, 0) + n
+    return out
+
+def chrome_events(spans) -> dict:
+    events = []
+    for s in spans:
+        args = dict(s.get("args", {}), **s.get("counts", {}))
+        args.update({k: s.get(k) for k in MEASURES})
+        events.append({"name": s["name"], "cat": s["cat"], "ph": "X", "ts": s["start_us"],
+                       "dur": max(1, round(s["wall_s"] * 1e6)), "pid": s["pid"], "tid": s["tid"], "args": args})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def write_trace() -> None:
+    spans = collect()
+    if TRACE_FORMAT == "chrome":
+        data = chrome_events(spans)
+    else:
+        data = {"version": TRACE_VERSION, "spans": spans, "totals": totals(spans)}
+    path = pathlib.Path(TRACE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+    shutil.rmtree(_parts_dir(), ignore_errors=True)
+
+if TRACE_PATH is not None and os.environ.get(_OWNER_ENV) is None:
+    TRACE_PATH = os.path.abspath(TRACE_PATH)  # workers may run with another cwd
+    os.environ["REGISTRY_TRACE"] = TRACE_PATH
+    os.environ[_OWNER_ENV] = str(os.getpid())
+    shutil.rmtree(_parts_dir(), ignore_errors=True)  # leftovers of an interrupted run
+    atexit.register(lambda: _is_owner() and write_trace())
+
+# ---- summary CLI ----
+
+def load_trace(path) -> list:
+    data = json.loads(pathlib.Path(path).read_text(encoding="utf-8"))
+    if "traceEvents" in data:
+        return [{"name": e["name"], "cat": e.get("cat", ""), "wall_s": e["dur"] / 1e6,
+                 "cpu_s": e["args"].get("cpu_s", 0.0), "process_peak_rss_mb": e["args"].get("process_peak_rss_mb"),
+                 "rss_growth_mb": e["args"].get("rss_growth_mb"),
+                 "args": {k: v for k, v in e["args"].items() if k not in MEASURES}}
+                for e in data["traceEvents"] if e.get("ph") == "X"]
+    return data["spans"]
+
+def describe(s: dict) -> str:
+    details = dict(s.get("args", {}), **s.get("counts", {}))
+    return f"{s['name']} " + " ".join(f"{k}={v}" for k, v in details.items())
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Summarize a REGISTRY_TRACE file.")
+    ap.add_argument("trace", help="trace written with REGISTRY_TRACE (either format)")
+    ap.add_argument("--top", type=int, default=15, help="slowest spans to list (default 15)")
+    ap.add_argument("--cat", help="only spans of this category (stage, file, pair, phase)")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    spans = load_trace(args.trace)
+    if args.cat:
+        spans = [s for s in spans if s["cat"] == args.cat]
+    print(f"{'span':28} {'count':>6} {'wall s':>9} {'cpu s':>9} {'proc peak MB':>12} {'growth MB':>9}")
+    for name, t in sorted(totals(spans).items(), key=lambda kv: -kv[1]["wall_s"]):
+        print(f"{name:28} {t['count']:6} {t['wall_s']:9.3f} {t['cpu_s']:9.3f} "
+              f"{t['process_peak_rss_mb']:12.1f} {t['rss_growth_mb']:9.1f}")
+    print(f"\nSlowest {min(args.top, len(spans))} span(s):")
+    for s in sorted(spans, key=lambda s: -s["wall_s"])[:args.top]:
+        print(f"  {s['wall_s']:8.3f}s  cpu {s['cpu_s']:7.3f}s  {describe(s)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+JSON-LD contexts derived from the sources, published as standalone files.
+
+The serialization stage writes
+  {space}/ontologies/{name}/{version}/{name}.context.jsonld   per ontology version
+  {space}/context.jsonld                                      per dataspace
+and every generated .jsonld references its context by URL instead of
+embedding a copy: ontology documents their version's context, everything
+else (shapes, policies, indexes, ...) the dataspace context.
+
+A context holds
+- a prefix for every namespace the sources actually use in predicates and
+  rdf:type values, as bound in the TTL (well-known prefixes as fallback);
+- for ontologies, one term per class and property they define in their
+  own namespace (that of the owl:Ontology IRI), named by local name. Properties with a single XSD range are coerced to it
+  ({"@id": ..., "@type": xsd:date}) and object properties to "@id", so
+  their values are written as plain strings.
+The dataspace context merges the prefixes of all of its sources with the
+terms of the newest version of each ontology; local names that are defined
+with different IRIs are left out (their keys stay CURIEs).
+
+Context URLs are W3ID_BASE (default https://w3id.org) + the file's path in
+the registry, which w3id / resolver_server.py map to the published file.
+inline_contexts() maps them back to the files on disk, so documents can be
+parsed before they are published (validate_syntax.py).
+
+Per-source summaries (prefixes, terms) are keyed by sha256 and persisted in
+.registry-cache/context-index.json, so contexts are rebuilt without
+re-parsing unchanged files.
+
+Usage:
+  python scripts/jsonld_context.py tems/ontologies/core/5.0.0/core.ttl   # print its derived context
+"""
+import os, re, sys, json, hashlib, pathlib, functools
+from rdflib import Graph, URIRef, RDF, RDFS, OWL, XSD
+
+from buildcache import CACHE_DIR, load_json, save_json
+
+CONTEXT_VERSION = 1
+CONTEXT_SUFFIX = ".context.jsonld"
+DATASPACE_CONTEXT = "context.jsonld"
+
+W3ID_BASE = os.environ.get("W3ID_BASE", "https://w3id.org").rstrip("/")
+
+INDEX_PATH = CACHE_DIR / "context-index.json"
+
+CLASS_TYPES = {OWL.Class, RDFS.Class}
+PROPERTY_TYPES = {OWL.ObjectProperty, OWL.DatatypeProperty, OWL.AnnotationProperty, RDF.Property}
+
+# Valid JSON-LD term / prefix names we are willing to define
+_NAME_RE = re.compile(r"[A-Za-z_][\w\-]*")
+_LOCAL_RE = re.compile(r"[A-Za-z_][\w\-]*$")
+
+def context_path(ttl: pathlib.Path) -> pathlib.Path:
+    return ttl.with_suffix(CONTEXT_SUFFIX)
+
+def dataspace_context_path(root: pathlib.Path, space: str) -> pathlib.Path:
+    return root / space / DATASPACE_CONTEXT
+
+def context_url(rel: str) -> str:
+    return f"{W3ID_BASE}/{rel}"
+
+def is_prefix_iri(iri: str) -> bool:
+    # JSON-LD 1.1 only uses a term as a prefix when its IRI ends with a gen-delim
+    return iri.endswith(("/", "#", ":"))
+
+# ---- per-source summaries ----
+
+def used_prefixes(g: Graph, iris, fallback: dict) -> dict:
+    """prefix -> namespace for every namespace (longest match) some of `iris` fall into."""
+    bound = [(str(ns), p) for p, ns in g.namespaces() if p and _NAME_RE.fullmatch(p) and is_prefix_iri(str(ns))]
+    bound += [(ns, p) for p, ns in sorted(fallback.items()) if isinstance(ns, str) and is_prefix_iri(ns)]
+    # Longest namespace first; a graph binding beats a fallback of the same length
+    bound = sorted(enumerate(bound), key=lambda item: (-len(item[1][0]), item[0]))
+    # rdflib renames a TTL prefix that clashes with its own defaults (schema -> schema1)
+    known = {ns: p for p, ns in fallback.items() if isinstance(ns, str)}
+    out = {}
+    for iri in iris:
+        for _, (ns, prefix) in bound:
+            if iri.startswith(ns) and len(iri) > len(ns):
+                if ns in known and re.fullmatch(re.escape(known[ns]) + r"\d+", prefix):
+                    prefix = known[ns]
+                out.setdefault(prefix, ns)
+                break
+    return out
+
+def term_definition(g: Graph, prop: URIRef, kinds: set):
+    """Term definition of a property: plain IRI, or with @type coercion."""
+    ranges = {r for r in g.objects(prop, RDFS.range) if isinstance(r, URIRef)}
+    if len(ranges) == 1:
+        (r,) = ranges
+        if str(r).startswith(str(XSD)):
+            return str(prop) if r == XSD.string else {"@id": str(prop), "@type": str(r)}
+        if r != RDFS.Literal and OWL.DatatypeProperty not in kinds:
+            return {"@id": str(prop), "@type": "@id"}
+    if OWL.ObjectProperty in kinds and not ranges:
+        return {"@id": str(prop), "@type": "@id"}
+    return str(prop)
+
+def own_namespaces(g: Graph) -> tuple:
+    """Namespaces of the owl:Ontology IRIs; terms of other vocabularies are not redefined."""
+    out = set()
+    for o in g.subjects(RDF.type, OWL.Ontology):
+        if isinstance(o, URIRef):
+            out.update([str(o)] if is_prefix_iri(str(o)) else [f"{o}#", f"{o}/"])
+    return tuple(sorted(out))
+
+def defined_terms(g: Graph) -> dict:
+    """local name -> definition for the classes and properties `g` defines in its own namespace."""
+    own = own_namespaces(g)
+    kinds = {}
+    for s, kind in g.subject_objects(RDF.type):
+        if isinstance(s, URIRef) and (kind in CLASS_TYPES or kind in PROPERTY_TYPES) \
+                and (not own or str(s).startswith(own)):
+            kinds.setdefault(s, set()).add(kind)
+    terms, clashes = {}, set()
+    for s in sorted(kinds):
+        m = _LOCAL_RE.search(str(s))
+        if not m or not is_prefix_iri(str(s)[:m.start()]):
+            continue
+        name = m.group(0)
+        definition = term_definition(g, s, kinds[s]) if kinds[s] & PROPERTY_TYPES else str(s)
+        if name in terms and terms[name] != definition:
+            clashes.add(name)
+        terms[name] = definition
+    return {name: d for name, d in terms.items() if name not in clashes}
+
+def summarize(g: Graph, fallback: dict, ontology: bool) -> dict:
+    terms = defined_terms(g) if ontology else {}
+    iris = {str(p) for p in g.predicates() if isinstance(p, URIRef)}
+    iris.update(str(o) for o in g.objects(None, RDF.type) if isinstance(o, URIRef))
+    iris.update(d["@id"] if isinstance(d, dict) else d for d in terms.values())
+    return {"prefixes": used_prefixes(g, sorted(iris), fallback), "terms": terms}
+
+def load_index() -> dict:
+    index = load_json(INDEX_PATH, {})
+    if index.get("version") != CONTEXT_VERSION:
+        index = {"version": CONTEXT_VERSION, "files": {}}
+    return index
+
+def save_index(index: dict) -> None:
+    save_json(INDEX_PATH, index)
+
+def lookup(index: dict, path: str, digest: str, graph_loader, fallback: dict, ontology: bool) -> dict:
+    # Return the cached summary for `path`, (re)building it if the hash moved
+    entry = index["files"].get(path)
+    if entry is None or entry.get("sha256") != digest:
+        entry = dict(summarize(graph_loader(path), fallback, ontology), sha256=digest)
+        index["files"][path] = entry
+    return entry
+
+def prune(index: dict, live_paths) -> None:
+    for path in set(index["files"]) - set(live_paths):
+        del index["files"][path]
+
+# ---- contexts ----
+
+def merge(summaries) -> dict:
+    """One context from summaries; the first binding of a prefix wins, clashing terms are dropped."""
+    prefixes, namespaces = {}, set()
+    terms, clashes = {}, set()
+    for summary in summaries:
+        for prefix, ns in summary["prefixes"].items():
+            if prefix not in prefixes and ns not in namespaces:
+                prefixes[prefix] = ns
+                namespaces.add(ns)
+        for name, definition in summary["terms"].items():
+            if name in terms and terms[name] != definition:
+                clashes.add(name)
+            terms.setdefault(name, definition)
+    context = dict(prefixes)
+    for name, definition in terms.items():
+        if name not in clashes and name not in prefixes:
+            context[name] = definition
+    return {"@context": context}
+
+def context_bytes(context: dict) -> bytes:
+    return (json.dumps(context, indent=2, sort_keys=True, ensure_ascii=False) + "\n").encode("utf-8")
+
+def write_context(context: dict, path: pathlib.Path) -> str:
+    """Write `context` unless the file already holds it; returns the sha256 of its bytes."""
+    data = context_bytes(context)
+    try:
+        same = path.read_bytes() == data
+    except FileNotFoundError:
+        same = False
+    if not same:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return hashlib.sha256(data).hexdigest()
+
+def local_path(url: str, root: pathlib.Path):
+    """File on disk for a context URL under W3ID_BASE, or None."""
+    if not isinstance(url, str) or not url.startswith(W3ID_BASE + "/"):
+        return None
+    path = root / url[len(W3ID_BASE) + 1:]
+    return path if path.is_file() else None
+
+@functools.lru_cache(maxsize=256)
+def _read_context(path: pathlib.Path):
+    return json.loads(path.read_text(encoding="utf-8"))["@context"]
+
+def inline_contexts(doc, root: pathlib.Path):
+    """`doc` with every top-level @context URL that maps to a local file replaced by its content."""
+    if not isinstance(doc, dict) or "@context" not in doc:
+        return doc
+    def resolve(ctx):
+        path = local_path(ctx, root)
+        return _read_context(path) if path else ctx
+    ctx = doc["@context"]
+    doc = dict(doc)
+    doc["@context"] = [resolve(c) for c in ctx] if isinstance(ctx, list) else resolve(ctx)
+    return doc
+
+def main(argv=None) -> int:
+    from graph_cache import load_graph
+    from serialize_from_ttl import JSONLD_CONTEXT, is_ontology
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("Usage: jsonld_context.py path/to/source.ttl", file=sys.stderr)
+        return 2
+    ttl = pathlib.Path(argv[0])
+    summary = summarize(load_graph(ttl), JSONLD_CONTEXT["@context"], is_ontology(ttl))
+    sys.stdout.write(context_bytes(merge([summary])).decode("utf-8"))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Semantic diff between ontology versions, with a suggested semver bump.
+
+Graphs are compared as sets of triples, not text: blank nodes get canonical
+labels (RGDA1 via rdflib.compare, only for graphs that have blank nodes) and
+the two triple sets are diffed by hash, so only the differing triples are
+ever formatted. They are then attributed to terms (IRI subjects; triples on
+blank nodes count for the IRI that reaches them).
+
+Bump rules:
+  major  a term was removed, or a non-annotation triple of a kept term was
+         removed (type, domain/range, subClassOf, restrictions, ...), or
+         (with --base-ref) an ontology or version present at the ref is gone
+  minor  terms or non-annotation triples were added
+  patch  only annotations changed (labels, comments, owl:versionInfo, any
+         owl:AnnotationProperty, ...) or the ontology header
+  none   same triples
+
+Modes:
+  python scripts/ontology_diff.py
+      For every ontology version with a predecessor in the same folder, write
+      <stem>.changes.json next to its TTL (skipped while both inputs are
+      unchanged).
+  python scripts/ontology_diff.py OLD.ttl NEW.ttl
+      Print the changelog of two files.
+  python scripts/ontology_diff.py --base-ref v1.4.0 [--bump-only]
+      Compare the working tree with a git ref: every changed ontology TTL
+      against its previous content, every new version folder against the
+      newest version present at the ref, and every ontology TTL the ref had
+      but the tree has not as a removal. Prints the changelogs, or only the
+      overall bump (for the release job).
+"""
+import sys, json, argparse, pathlib, subprocess
+from rdflib import Graph, URIRef, BNode
+from rdflib.compare import to_canonical_graph
+from rdflib.namespace import DC, DCTERMS, OWL, RDF, RDFS, SKOS
+
+import graph_cache
+import instrument
+import registry_manifest
+
+REPO_ROOT = pathlib.Path(".").resolve()
+CHANGES_VERSION = 1
+CHANGES_SUFFIX = ".changes.json"
+
+# Triples listed per direction in a changelog; counts are always complete
+MAX_LISTED_TRIPLES = 500
+
+BUMPS = ["none", "patch", "minor", "major"]
+
+ANNOTATION_PREDICATES = {
+    RDFS.label, RDFS.comment, RDFS.seeAlso, RDFS.isDefinedBy,
+    OWL.versionInfo, OWL.versionIRI, OWL.priorVersion, OWL.deprecated,
+}
+ANNOTATION_NAMESPACES = (str(SKOS), str(DCTERMS), str(DC))
+
+def changes_path(ttl: pathlib.Path) -> pathlib.Path:
+    return ttl.with_name(ttl.name[:-len(".ttl")] + CHANGES_SUFFIX)
+
+def triple_set(g: Graph):
+    """(graph with canonical blank node labels, its set of triples)."""
+    triples = set(g)
+    if any(type(s) is BNode or type(o) is BNode for s, _, o in triples):
+        g = to_canonical_graph(g)
+        triples = set(g)
+    return g, triples
+
+def nt_line(triple) -> str:
+    return " ".join(t.n3() for t in triple)
+
+def annotation_predicates(*graphs) -> set:
+    preds = set(ANNOTATION_PREDICATES)
+    for g in graphs:
+        preds.update(g.subjects(RDF.type, OWL.AnnotationProperty))
+    return preds
+
+def is_annotation(p, annotations: set) -> bool:
+    return p in annotations or str(p).startswith(ANNOTATION_NAMESPACES)
+
+def owner(g: Graph, node):
+    """IRI subject that a (blank) node hangs off, following incoming triples."""
+    seen = set()
+    while isinstance(node, BNode) and node not in seen:
+        seen.add(node)
+        node = next(g.subjects(None, node), None)
+    return node if isinstance(node, URIRef) else None
+
+def terms(g: Graph) -> set:
+    return {s for s in g.subjects(RDF.type, None) if isinstance(s, URIRef)}
+
+def diff_graphs(old: Graph, new: Graph) -> dict:
+    """Changelog body for old -> new."""
+    with instrument.span("diff", "phase") as s:
+        old_c, old_set = triple_set(old)
+        new_c, new_set = triple_set(new)
+        removed, added = list(old_set - new_set), list(new_set - old_set)
+        s.count("triples_added", len(added))
+        s.count("triples_removed", len(removed))
+
+    old_terms, new_terms = terms(old), terms(new)
+    headers = set(old.subjects(RDF.type, OWL.Ontology)) | set(new.subjects(RDF.type, OWL.Ontology))
+    annotations = annotation_predicates(old, new)
+
+    changed = {}  # term -> {"added": [...], "removed": [...], "annotation_only": bool}
+    bump = "none"
+    def raise_to(level):
+        nonlocal bump
+        if BUMPS.index(level) > BUMPS.index(bump):
+            bump = level
+
+    for direction, triples, g in (("removed", removed, old_c), ("added", added, new_c)):
+        for t in triples:
+            term = owner(g, t[0])
+            annotation = is_annotation(t[1], annotations) or term in headers
+            raise_to("patch" if annotation else "major" if direction == "removed" else "minor")
+            if term is None:  # blank nodes not reachable from any IRI
+                continue
+            entry = changed.setdefault(term, {"added": [], "removed": [], "annotation_only": True})
+            entry[direction].append(nt_line(t))
+            if not annotation:
+                entry["annotation_only"] = False
+
+    terms_removed = sorted(str(t) for t in old_terms - new_terms)
+    terms_added = sorted(str(t) for t in new_terms - old_terms)
+    if terms_removed:
+        raise_to("major")
+    elif terms_added:
+        raise_to("minor")
+
+    kept = old_terms & new_terms
+    terms_changed = [
+        {"term": str(term), "annotationOnly": entry["annotation_only"],
+         "added": sorted(entry["added"]), "removed": sorted(entry["removed"])}
+        for term, entry in sorted(changed.items()) if term in kept
+    ]
+    added_lines, removed_lines = sorted(nt_line(t) for t in added), sorted(nt_line(t) for t in removed)
+    return {
+        "bump": bump,
+        "summary": {
+            "triplesAdded": len(added), "triplesRemoved": len(removed),
+            "termsAdded": len(terms_added), "termsRemoved": len(terms_removed), "termsChanged": len(terms_changed),
+        },
+        "terms": {"added": terms_added, "removed": terms_removed, "changed": terms_changed},
+        "triples": {
+            "added": added_lines[:MAX_LISTED_TRIPLES],
+            "removed": removed_lines[:MAX_LISTED_TRIPLES],
+            "truncated": len(added_lines) > MAX_LISTED_TRIPLES or len(removed_lines) > MAX_LISTED_TRIPLES,
+        },
+    }
+
+def max_bump(bumps) -> str:
+    return max(bumps, key=BUMPS.index, default="none")
+
+# ---- changelogs next to each version ----
+
+def version_pairs(manifest):
+    """(previous ttl entry, ttl entry) for consecutive versions of every ontology."""
+    for space in registry_manifest.dataspaces(manifest):
+        by_name = {}
+        for (name, version), entries in registry_manifest.groups(manifest, space, "ontologies").items():
+            for f in entries:
+                if f["path"].endswith(f"/{name}.ttl"):
+                    by_name.setdefault(name, []).append((version, f))
+        for name, versions in sorted(by_name.items()):
+            versions.sort(key=lambda item: registry_manifest.version_key(item[0]))
+            for (_, old), (_, new) in zip(versions, versions[1:]):
+                yield old, new
+
+def write_changes(old: dict, new: dict) -> bool:
+    """Write the changelog for two manifest entries; False when it was up to date."""
+    out = changes_path(REPO_ROOT / new["path"])
+    try:
+        previous = json.loads(out.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        previous = {}
+    if (previous.get("changesVersion") == CHANGES_VERSION and previous.get("sha256") == new["sha256"]
+            and previous.get("previousSha256") == old["sha256"]):
+        return False
+    with instrument.span("ontology_diff", file=new["path"], previous=old["path"]):
+        body = diff_graphs(graph_cache.load_graph(REPO_ROOT / old["path"], old["sha256"]),
+                           graph_cache.load_graph(REPO_ROOT / new["path"], new["sha256"]))
+    data = {
+        "changesVersion": CHANGES_VERSION,
+        "version": new["version"], "previous": old["version"],
+        "sha256": new["sha256"], "previousSha256": old["sha256"],
+        **body,
+    }
+    out.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return True
+
+# ---- against a git ref ----
+
+def git(*args) -> str:
+    return subprocess.run(["git", *args], cwd=REPO_ROOT, check=True, capture_output=True, text=True).stdout
+
+def graph_at(ref: str, path: str) -> Graph:
+    data = subprocess.run(["git", "show", f"{ref}:{path}"], cwd=REPO_ROOT, check=True, capture_output=True).stdout
+    return Graph().parse(data=data, format="turtle", publicID=(REPO_ROOT / path).as_uri())
+
+def ontology_ttl(path: str) -> bool:
+    """{space}/ontologies/{name}/{version}/{name}.ttl"""
+    parts = path.split("/")
+    return (len(parts) == 5 and parts[1] == "ontologies" and parts[4] == f"{parts[2]}.ttl"
+            and registry_manifest.VERSION_RE.match(parts[3]) is not None)
+
+def diff_against_ref(manifest, ref: str) -> list:
+    """Changelogs (with "path" and "base") for every ontology TTL that differs from `ref`."""
+    at_ref = set(git("ls-tree", "-r", "--name-only", ref).splitlines())
+    changed = set(git("diff", "--name-only", ref, "--").splitlines())
+    out = []
+    # Published at the ref, gone now: whoever resolves those IRIs breaks
+    for path in sorted(p for p in at_ref if ontology_ttl(p) and not (REPO_ROOT / p).is_file()):
+        space, _, name, _, _ = path.split("/")
+        remaining = [p for p in manifest["files"] if ontology_ttl(p["path"])
+                     and p["path"].split("/")[0] == space and p["path"].split("/")[2] == name]
+        kind = "removedVersion" if remaining else "removedOntology"
+        out.append({"path": path, "base": f"{ref}:{path}", "bump": "major", "summary": {kind: True}})
+    for space in registry_manifest.dataspaces(manifest):
+        groups = registry_manifest.groups(manifest, space, "ontologies")
+        for name in sorted({n for n, _ in groups}):
+            versions = sorted((v for n, v in groups if n == name), key=registry_manifest.version_key)
+            for v in versions:
+                path = f"{space}/ontologies/{name}/{v}/{name}.ttl"
+                if not (REPO_ROOT / path).is_file():
+                    continue
+                if path in at_ref:
+                    if path not in changed:
+                        continue
+                    base = path
+                else:
+                    # New version folder: compare with the newest older version the ref had
+                    older = [u for u in versions if registry_manifest.version_key(u) < registry_manifest.version_key(v)
+                             and f"{space}/ontologies/{name}/{u}/{name}.ttl" in at_ref]
+                    if not older:
+                        out.append({"path": path, "base": None, "bump": "minor", "summary": {"newOntology": True}})
+                        continue
+                    base = f"{space}/ontologies/{name}/{older[-1]}/{name}.ttl"
+                body = diff_graphs(graph_at(ref, base), graph_cache.load_graph(REPO_ROOT / path))
+                out.append({"path": path, "base": f"{ref}:{base}", **body})
+    return out
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("files", nargs="*", metavar="TTL", help="OLD.ttl NEW.ttl to diff directly")
+    ap.add_argument("--base-ref", help="compare the working tree with this git ref")
+    ap.add_argument("--bump-only", action="store_true", help="with --base-ref: print only the overall bump")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.files:
+        if len(args.files) != 2:
+            print("Pass exactly two files: OLD.ttl NEW.ttl", file=sys.stderr)
+            return 2
+        old, new = (graph_cache.load_graph(pathlib.Path(p)) for p in args.files)
+        print(json.dumps(diff_graphs(old, new), indent=2, ensure_ascii=False))
+        return 0
+
+    manifest = registry_manifest.current(REPO_ROOT)
+    if args.base_ref:
+        try:
+            results = diff_against_ref(manifest, args.base_ref)
+        except subprocess.CalledProcessError as e:
+            print(f"git failed: {e.stderr.strip() if isinstance(e.stderr, str) else e}", file=sys.stderr)
+            return 2
+        bump = max_bump(r["bump"] for r in results)
+        if args.bump_only:
+            print(bump)
+        else:
+            print(json.dumps({"base": args.base_ref, "bump": bump, "changes": results}, indent=2, ensure_ascii=False))
+        return 0
+
+    written = total = 0
+    for old, new in version_pairs(manifest):
+        total += 1
+        if write_changes(old, new):
+            written += 1
+            data = json.loads(changes_path(REPO_ROOT / new["path"]).read_text(encoding="utf-8"))
+            s = data["summary"]
+            print(f"✓ {new['path']}: {data['bump']} vs {old['version']} "
+                  f"(+{s['triplesAdded']}/-{s['triplesRemoved']} triples, +{s['termsAdded']}/-{s['termsRemoved']}"
+                  f"/~{s['termsChanged']} terms)")
+    print(f"Changelogs: {written} written, {total - written} unchanged.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
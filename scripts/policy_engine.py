@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+"""
+Compiled ODRL policies: decide requests without walking RDF per call.
+
+The serialization stage compiles every policies/ TTL into <name>.policy.json
+next to it. Each rule (permission, prohibition, obligation) is flattened and
+indexed by (target, action); its constraints are grouped by leftOperand, so a
+decision is a dictionary lookup plus a few comparisons:
+
+  {
+    "version": 3, "source_sha256": "...",
+    "policies": {uid: {"type": "Set", "conflict": "prohibit"}},
+    "actions":  {action: [action, ...ancestors via odrl:includedIn]},
+    "rules":    [{"policy": uid, "kind": "permission", "target": ..., "action": ...,
+                  "assignee": [...], "constraints": {leftOperand: [{"operator": "eq",
+                  "rightOperand": [...], "datatype": ...}]}, "logical": [...], "duties": [...]}],
+    "index":    {target: {action: [rule numbers]}},
+    "warnings": ["what could not be compiled, and what was done instead"]
+  }
+
+Policy-level target/action/assigner/assignee are inherited by rules that do
+not set their own. A rule on odrl:use also covers every action included in
+it (odrl:play, odrl:display, ...). A refined action
+([rdf:value odrl:print; odrl:refinement ...]) is indexed under its rdf:value,
+with the refinements added to the rule's constraints.
+
+A target, action or assignee the engine cannot match (a blank-node
+AssetCollection or PartyCollection, a target with odrl:refinement, an action
+without rdf:value) never turns into "any": the permission is dropped, and a
+prohibition or obligation is widened to every target/action/assignee instead,
+so an unsupported rule can only deny more. Each case is listed in "warnings".
+
+Requests are dicts:
+  {"target": iri or [iris], "action": iri, "assignee": iri (optional),
+   "context": {"spatial": "EU", ...}}
+Context keys are leftOperand IRIs or their local names. A target list lets a
+caller pass an asset together with its types (e.g. the item IRI and
+tems:MediaObject). A constraint whose leftOperand is missing from the context
+is not satisfied.
+
+Decision: "Deny" if a satisfied prohibition applies (unless its policy sets
+odrl:conflict odrl:perm and a permission is satisfied too), else "Permit" if
+a satisfied permission applies, else "NotApplicable". When both apply and one
+of their policies sets odrl:conflict odrl:invalid, the decision is
+"Indeterminate" (the policy is void). On the command line,
+a request line that is not a JSON object gets {"decision": "Indeterminate",
+"line": n, "error": ...} in its place, the other requests are still decided,
+and the exit status is 1.
+
+Usage:
+  python scripts/policy_engine.py --dataspace tems < requests.ndjson
+  python scripts/policy_engine.py --policy tems/policies/media/0.1.0/media.ttl < requests.ndjson
+"""
+import os, sys, json, argparse, pathlib
+from datetime import date, datetime
+from rdflib import Graph, BNode, Literal, URIRef, RDF
+from rdflib.collection import Collection
+from rdflib.namespace import Namespace, XSD
+
+import graph_cache
+from buildcache import file_sha256
+
+POLICY_VERSION = 3
+POLICY_SUFFIX = ".policy.json"
+
+ODRL = Namespace("http://www.w3.org/ns/odrl/2/")
+
+POLICY_TYPES = [ODRL.Policy, ODRL.Set, ODRL.Offer, ODRL.Agreement, ODRL.Privacy, ODRL.Request, ODRL.Ticket, ODRL.Assertion]
+RULE_KINDS = [("permission", ODRL.permission), ("prohibition", ODRL.prohibition), ("obligation", ODRL.obligation)]
+INHERITED = [("target", ODRL.target), ("action", ODRL.action), ("assigner", ODRL.assigner), ("assignee", ODRL.assignee)]
+# Fields a request is matched on; the others are copied through
+MATCHED = ("target", "action", "assignee")
+CONFLICTS = ("perm", "prohibit", "invalid")
+LOGICAL = [("and", ODRL["and"]), ("or", ODRL["or"]), ("xone", ODRL.xone), ("andSequence", ODRL.andSequence)]
+
+# odrl:includedIn from the ODRL 2.2 Common Vocabulary; policies may add their own
+INCLUDED_IN = {
+    **{ODRL[a]: ODRL.use for a in (
+        "aggregate", "annotate", "anonymize", "archive", "concurrentUse", "derive", "digitize",
+        "display", "distribute", "execute", "extract", "grantUse", "include", "index", "install",
+        "modify", "move", "play", "present", "print", "read", "reproduce", "reviewPolicy",
+        "stream", "synchronize", "transform", "translate", "uninstall", "watermark")},
+    ODRL.textToSpeech: ODRL.read,
+    ODRL.give: ODRL.transfer,
+    ODRL.sell: ODRL.transfer,
+}
+
+NUMERIC = {str(XSD[t]) for t in ("integer", "decimal", "double", "float", "int", "long", "short",
+                                 "nonNegativeInteger", "positiveInteger")}
+TEMPORAL = {str(XSD.date), str(XSD.dateTime)}
+
+def policy_path(ttl: pathlib.Path) -> pathlib.Path:
+    return ttl.with_suffix(POLICY_SUFFIX)
+
+def local_name(iri: str) -> str:
+    return iri.rsplit("#", 1)[-1].rsplit("/", 1)[-1]
+
+# -- compilation ---------------------------------------------------------------
+
+def _first(g: Graph, node, prop):
+    # g.value() picks an arbitrary object when there are several; compiled output must be stable
+    return min(g.objects(node, prop), key=str, default=None)
+
+def _policy_type(g: Graph, p) -> str:
+    """Local name of the most specific ODRL policy type (odrl:Set over odrl:Policy), first in sorted order."""
+    types = sorted(str(t) for t in g.objects(p, RDF.type) if t in POLICY_TYPES)
+    specific = [t for t in types if t != str(ODRL.Policy)]
+    return local_name((specific or types)[0])
+
+def _right_operand(g: Graph, c):
+    values, datatypes = [], set()
+    for o in g.objects(c, ODRL.rightOperand):
+        if isinstance(o, BNode) and g.value(o, RDF.first) is not None:
+            items = list(Collection(g, o))
+        else:
+            items = [o]
+        for item in items:
+            if isinstance(item, Literal) and item.datatype:
+                datatypes.add(str(item.datatype))
+            values.append(str(item))
+    for o in g.objects(c, ODRL.rightOperandReference):
+        values.append(str(o))
+    return sorted(values), min(datatypes, default=None)
+
+def _constraint(g: Graph, c) -> dict:
+    for op, prop in LOGICAL:
+        lst = _first(g, c, prop)
+        if lst is not None:
+            members = list(Collection(g, lst)) if g.value(lst, RDF.first) is not None else sorted(g.objects(c, prop), key=str)
+            return {"logical": op, "constraints": [_constraint(g, m) for m in members]}
+    right, datatype = _right_operand(g, c)
+    return {
+        "leftOperand": str(_first(g, c, ODRL.leftOperand)),
+        "operator": local_name(str(_first(g, c, ODRL.operator))),
+        "rightOperand": right,
+        "datatype": datatype,
+    }
+
+def _field(g: Graph, node, name: str, prop):
+    """
+    Values of `prop` on `node` as [(IRI, refinement constraints)], and a
+    description of every object that cannot be matched by IRI.
+    """
+    values, unsupported = [], []
+    for o in g.objects(node, prop):
+        if isinstance(o, URIRef):
+            if name == "target" and (o, ODRL.refinement, None) in g:
+                unsupported.append(f"odrl:target {o} with odrl:refinement")
+            else:
+                values.append((str(o), []))
+            continue
+        value = _first(g, o, RDF.value)
+        if name == "action" and isinstance(o, BNode) and isinstance(value, URIRef):
+            values.append((str(value), [_constraint(g, c) for c in g.objects(o, ODRL.refinement)]))
+            continue
+        kinds = sorted(local_name(str(t)) for t in g.objects(o, RDF.type))
+        unsupported.append(f"odrl:{name} " + (f"[a odrl:{', odrl:'.join(kinds)}]" if kinds else "blank node" if isinstance(o, BNode) else repr(str(o))))
+    return sorted(values, key=json.dumps), sorted(unsupported)
+
+def _duties(g: Graph, rule) -> list:
+    out = []
+    for d in g.objects(rule, ODRL.duty):
+        out.append({name: [v for v, _ in _field(g, d, name, prop)[0]] for name, prop in INHERITED[:2]})
+    return sorted(out, key=json.dumps)
+
+def _ancestors(action, parents: dict) -> list:
+    out, seen = [action], {action}
+    todo = list(parents.get(action, ()))
+    while todo:
+        a = todo.pop(0)
+        if a not in seen:
+            seen.add(a)
+            out.append(a)
+            todo.extend(parents.get(a, ()))
+    return out
+
+def compile_policies(g: Graph, source_sha256: str = "") -> dict:
+    parents = {str(k): {str(v)} for k, v in INCLUDED_IN.items()}
+    for child, parent in g.subject_objects(ODRL.includedIn):
+        parents.setdefault(str(child), set()).add(str(parent))
+
+    policies, rules, warnings = {}, [], []
+    uids = sorted({p for t in POLICY_TYPES for p in g.subjects(RDF.type, t)}, key=str)
+    for p in uids:
+        uid = str(_first(g, p, ODRL.uid) or p)
+        conflict = _first(g, p, ODRL.conflict)
+        conflict = local_name(str(conflict)) if conflict is not None else "prohibit"
+        if conflict not in CONFLICTS:
+            warnings.append(f"{uid}: unknown odrl:conflict {conflict}, using prohibit")
+            conflict = "prohibit"
+        policies[uid] = {"type": _policy_type(g, p), "conflict": conflict}
+        inherited = {name: _field(g, p, name, prop) for name, prop in INHERITED}
+        for kind, prop in RULE_KINDS:
+            for r in sorted(g.objects(p, prop), key=str):
+                # A rule's own target/action/... replace the policy's, even when unsupported
+                fields = {}
+                for name, rp in INHERITED:
+                    own = _field(g, r, name, rp)
+                    fields[name] = own if own != ([], []) else inherited[name]
+                unsupported = [u for name in MATCHED for u in fields[name][1]]
+                if unsupported and kind == "permission":
+                    warnings.append(f"{uid}: {kind} dropped, unsupported {'; '.join(unsupported)}")
+                    continue
+                if unsupported:
+                    warnings.append(f"{uid}: {kind} applies to every {'/'.join(n for n in MATCHED if fields[n][1])}, "
+                                    f"unsupported {'; '.join(unsupported)}")
+                    fields = {name: ([], []) if fields[name][1] else fields[name] for name in fields}
+                constraints, logical = {}, []
+                for c in g.objects(r, ODRL.constraint):
+                    compiled = _constraint(g, c)
+                    if "logical" in compiled:
+                        logical.append(compiled)
+                    else:
+                        constraints.setdefault(compiled["leftOperand"], []).append(compiled)
+                # One rule per (target, action): the index is keyed on both
+                for target, _ in fields["target"][0] or [("*", [])]:
+                    for action, refinements in fields["action"][0] or [("*", [])]:
+                        refined, refined_logical = {lo: list(cs) for lo, cs in constraints.items()}, list(logical)
+                        for c in refinements:
+                            if "logical" in c:
+                                refined_logical.append(c)
+                            else:
+                                refined.setdefault(c["leftOperand"], []).append(c)
+                        rules.append({
+                            "policy": uid,
+                            "kind": kind,
+                            "target": target,
+                            "action": action,
+                            "assigner": [v for v, _ in fields["assigner"][0]],
+                            "assignee": [v for v, _ in fields["assignee"][0]],
+                            "constraints": {lo: sorted(cs, key=json.dumps) for lo, cs in sorted(refined.items())},
+                            "logical": sorted(refined_logical, key=json.dumps),
+                            "duties": _duties(g, r),
+                        })
+
+    rules.sort(key=lambda r: json.dumps(r, sort_keys=True))
+    index = {}
+    for i, r in enumerate(rules):
+        index.setdefault(r["target"], {}).setdefault(r["action"], []).append(i)
+    actions = sorted({r["action"] for r in rules} | set(parents))
+    return {
+        "version": POLICY_VERSION,
+        "source_sha256": source_sha256,
+        "policies": policies,
+        "actions": {a: _ancestors(a, parents) for a in actions},
+        "rules": rules,
+        "index": {t: dict(sorted(a.items())) for t, a in sorted(index.items())},
+        "warnings": sorted(set(warnings)),
+    }
+
+def write_compiled(compiled: dict, path: pathlib.Path) -> None:
+    path.write_text(json.dumps(compiled, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+def load_compiled(path: pathlib.Path, source_sha256: str):
+    """Return the compiled policy at `path` if it was built from `source_sha256`."""
+    try:
+        compiled = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    if compiled.get("version") != POLICY_VERSION or compiled.get("source_sha256") != source_sha256:
+        return None
+    return compiled
+
+def compiled_for(ttl) -> dict:
+    """Compiled form of a policy TTL: the build artifact when fresh, else compiled now."""
+    ttl = pathlib.Path(ttl)
+    digest = file_sha256(ttl)
+    return load_compiled(policy_path(ttl), digest) or compile_policies(graph_cache.load_graph(ttl, digest), digest)
+
+# -- evaluation ----------------------------------------------------------------
+
+def _coerce(value, datatype):
+    if datatype in NUMERIC:
+        return float(value)
+    if datatype in TEMPORAL:
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        return str(value)
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else str(value)
+
+def _as_list(v):
+    return list(v) if isinstance(v, (list, tuple, set, frozenset)) else [v]
+
+def _check(c: dict, value) -> bool:
+    op, right, datatype = c["operator"], c["rightOperand"], c["datatype"]
+    try:
+        values = [_coerce(v, datatype) for v in _as_list(value)]
+        rights = [_coerce(r, datatype) for r in right]
+    except (TypeError, ValueError):
+        return False
+    if op in ("lt", "lteq", "gt", "gteq"):
+        if len(values) != 1 or not rights:
+            return False
+        v, r = values[0], rights[0]
+        try:
+            return {"lt": v < r, "lteq": v <= r, "gt": v > r, "gteq": v >= r}[op]
+        except TypeError:
+            return False
+    vs, rs = set(values), set(rights)
+    if op in ("eq", "isA", "isPartOf"):
+        return bool(vs) and vs <= rs
+    if op == "neq":
+        return not (vs & rs)
+    if op == "isAnyOf":
+        return bool(vs & rs)
+    if op in ("isAllOf", "hasPart"):
+        return rs <= vs
+    if op == "isNoneOf":
+        return not (vs & rs)
+    return False
+
+def _lookup(context: dict, left: str):
+    if left in context:
+        return True, context[left]
+    name = local_name(left)
+    if name in context:
+        return True, context[name]
+    return False, None
+
+def _satisfied(c: dict, context: dict) -> bool:
+    if "logical" in c:
+        results = [_satisfied(m, context) for m in c["constraints"]]
+        if c["logical"] in ("and", "andSequence"):
+            return all(results)
+        if c["logical"] == "or":
+            return any(results)
+        return sum(results) == 1  # xone
+    found, value = _lookup(context, c["leftOperand"])
+    return found and _check(c, value)
+
+def _rule_satisfied(rule: dict, context: dict) -> bool:
+    for left, constraints in rule["constraints"].items():
+        found, value = _lookup(context, left)
+        if not found or not all(_check(c, value) for c in constraints):
+            return False
+    return all(_satisfied(c, context) for c in rule["logical"])
+
+class PolicyEngine:
+    """Decisions over one or more compiled policy files."""
+
+    def __init__(self, compiled_list):
+        self.rules = []
+        self.policies = {}
+        self.actions = {}
+        self.index = {}
+        self.warnings = []
+        for compiled in compiled_list:
+            offset = len(self.rules)
+            self.warnings.extend(compiled.get("warnings", ()))
+            self.rules.extend(compiled["rules"])
+            self.policies.update(compiled["policies"])
+            for a, chain in compiled["actions"].items():
+                known = self.actions.setdefault(a, [a])
+                known.extend(x for x in chain if x not in known)
+            for target, by_action in compiled["index"].items():
+                for action, ids in by_action.items():
+                    self.index.setdefault(target, {}).setdefault(action, []).extend(i + offset for i in ids)
+
+    @classmethod
+    def from_files(cls, paths):
+        compiled = []
+        for p in paths:
+            p = pathlib.Path(p)
+            if p.name.endswith(POLICY_SUFFIX):
+                compiled.append(json.loads(p.read_text(encoding="utf-8")))
+            else:
+                compiled.append(compiled_for(p))
+        return cls(compiled)
+
+    def candidates(self, targets, action: str, assignee=None) -> list:
+        """Rule numbers whose target/action/assignee match, before constraints."""
+        chain = self.actions.get(action, [action])
+        out = []
+        for target in list(targets) + ["*"]:
+            by_action = self.index.get(target)
+            if not by_action:
+                continue
+            for a in chain + ["*"]:
+                out.extend(by_action.get(a, ()))
+        assignees = set(_as_list(assignee)) if assignee is not None else set()
+        return [i for i in out if not self.rules[i]["assignee"] or assignees & set(self.rules[i]["assignee"])]
+
+    def decide(self, candidates, context: dict) -> dict:
+        permits, prohibits, duties = [], [], []
+        for i in candidates:
+            rule = self.rules[i]
+            if rule["kind"] == "obligation" or not _rule_satisfied(rule, context):
+                continue
+            if rule["kind"] == "permission":
+                permits.append(i)
+                duties.extend(rule["duties"])
+            else:
+                prohibits.append(i)
+        if prohibits and permits:
+            involved = {self.rules[i]["policy"] for i in permits + prohibits}
+            if any(self.policies[uid]["conflict"] == "invalid" for uid in involved):
+                return {"decision": "Indeterminate", "rules": sorted(permits + prohibits),
+                        "error": "conflicting rules under odrl:conflict odrl:invalid"}
+        if prohibits:
+            perm_wins = permits and all(self.policies[self.rules[i]["policy"]]["conflict"] == "perm" for i in prohibits)
+            if not perm_wins:
+                return {"decision": "Deny", "rules": prohibits}
+        if permits:
+            return {"decision": "Permit", "rules": permits, "duties": duties}
+        return {"decision": "NotApplicable", "rules": []}
+
+    def evaluate(self, request: dict) -> dict:
+        targets = _as_list(request.get("target", []))
+        cands = self.candidates(targets, request.get("action", ""), request.get("assignee"))
+        return self.decide(cands, request.get("context", {}))
+
+    def evaluate_batch(self, requests) -> list:
+        """
+        Decisions for many requests, in order.
+
+        Candidate rules are resolved once per distinct (target, action,
+        assignee), and decisions are reused for requests whose context agrees
+        on every leftOperand those rules look at.
+        """
+        requests = list(requests)
+        out = [None] * len(requests)
+        groups = {}
+        for n, req in enumerate(requests):
+            assignee = req.get("assignee")
+            key = (tuple(_as_list(req.get("target", []))), req.get("action", ""),
+                   tuple(_as_list(assignee)) if assignee is not None else None)
+            groups.setdefault(key, []).append(n)
+        for (targets, action, assignee), members in groups.items():
+            cands = self.candidates(targets, action, list(assignee) if assignee is not None else None)
+            lefts = sorted({lo for i in cands for lo in self._left_operands(self.rules[i])})
+            memo = {}
+            for n in members:
+                context = requests[n].get("context", {})
+                try:
+                    sig = json.dumps([_lookup(context, lo) for lo in lefts], sort_keys=True, default=str)
+                except TypeError:
+                    sig = None
+                if sig is None or sig not in memo:
+                    decision = self.decide(cands, context)
+                    if sig is None:
+                        out[n] = decision
+                        continue
+                    memo[sig] = decision
+                out[n] = memo[sig]
+        return out
+
+    @staticmethod
+    def _left_operands(rule: dict):
+        yield from rule["constraints"]
+        todo = list(rule["logical"])
+        while todo:
+            c = todo.pop()
+            if "logical" in c:
+                todo.extend(c["constraints"])
+            else:
+                yield c["leftOperand"]
+
+# -- CLI -------------------------------------------------------------------------
+
+def policies_for(space: str, root=".") -> list:
+    """Newest policy TTLs of a dataspace."""
+    import registry_manifest
+    manifest = registry_manifest.current(root)
+    latest = registry_manifest.latest(manifest, space, "policies")
+    return sorted(f["path"] for _, entries in latest.values() for f in entries if f["path"].endswith(".ttl"))
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("requests", nargs="?", help="NDJSON requests (default: stdin)")
+    ap.add_argument("--dataspace", "-d", help="use the newest version of every policy in this dataspace")
+    ap.add_argument("--policy", action="append", default=[], help="policy TTL or .policy.json (repeatable)")
+    ap.add_argument("--compile", action="store_true", help="print the compiled policies instead of deciding")
+    ap.add_argument("--batch-size", type=int, default=1024)
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    paths = list(args.policy) or (policies_for(args.dataspace) if args.dataspace else [])
+    if not paths:
+        print("No policies selected (use --dataspace or --policy).", file=sys.stderr)
+        return 2
+    if args.compile:
+        for p in paths:
+            compiled = compiled_for(p)
+            for w in compiled["warnings"]:
+                print(f"warning: {p}: {w}", file=sys.stderr)
+            print(json.dumps(compiled, indent=2, sort_keys=True))
+        return 0
+
+    engine = PolicyEngine.from_files(paths)
+    for w in engine.warnings:
+        print(f"warning: {w}", file=sys.stderr)
+    stream = open(args.requests, encoding="utf-8") if args.requests else sys.stdin
+    batch = []  # (line number, request or None, error or None)
+    errors = 0
+
+    def flush():
+        decisions = iter(engine.evaluate_batch([req for _, req, error in batch if error is None]))
+        for n, req, error in batch:
+            if error is None:
+                out = dict(next(decisions), id=req.get("id"))
+            else:
+                out = {"id": None, "line": n, "decision": "Indeterminate", "error": error}
+            sys.stdout.write(json.dumps(out, ensure_ascii=False) + "\n")
+        batch.clear()
+
+    with stream:
+        for n, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            # A malformed line gets its own error result instead of ending the batch
+            try:
+                req = json.loads(line)
+                if not isinstance(req, dict):
+                    raise ValueError(f"request must be a JSON object, not {type(req).__name__}")
+                batch.append((n, req, None))
+            except ValueError as e:
+                batch.append((n, None, f"{type(e).__name__}: {e}"))
+                errors += 1
+            if len(batch) >= args.batch_size:
+                flush()
+        flush()
+    if errors:
+        print(f"{errors} malformed request line(s)", file=sys.stderr)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Precomputed RDFS closure of an ontology: class and property hierarchies plus
+expanded domains and ranges.
+
+The serialization stage writes one <name>.closure.json next to every ontology
+TTL; downstream clients can read the hierarchy without running a reasoner.
+validate_shacl.py uses the same closure to materialize the entailments SHACL
+cares about (rdf:type via subclass/domain/range, superproperty triples, the
+transitive rdfs:subClassOf / rdfs:subPropertyOf edges) instead of running
+RDFS inference on every validation. Reflexive and axiomatic triples
+(p rdfs:subPropertyOf p, rdfs:Resource, ...) are not added.
+
+Layout of the artifact:
+  {
+    "source_sha256": "...",
+    "classes":    {C: {"superClasses": [...], "subClasses": [...]}},
+    "properties": {P: {"superProperties": [...], "subProperties": [...],
+                       "domain": [...], "range": [...]}}
+  }
+Super/sub sets are transitive and exclude the term itself; domain/range
+include the ones inherited from superproperties and all their superclasses.
+"""
+import json, pathlib
+from rdflib import Graph, Literal, URIRef, RDF, RDFS, OWL
+
+CLOSURE_VERSION = 1
+CLOSURE_SUFFIX = ".closure.json"
+
+CLASS_TYPES = (RDFS.Class, OWL.Class)
+PROPERTY_TYPES = (RDF.Property, OWL.ObjectProperty, OWL.DatatypeProperty, OWL.AnnotationProperty)
+
+def closure_path(ttl: pathlib.Path) -> pathlib.Path:
+    return ttl.with_suffix(CLOSURE_SUFFIX)
+
+def _transitive(edges):
+    # node -> every node reachable through `edges`, excluding itself
+    out = {}
+    for start in edges:
+        seen, todo = set(), list(edges[start])
+        while todo:
+            n = todo.pop()
+            if n not in seen:
+                seen.add(n)
+                todo.extend(edges.get(n, ()))
+        seen.discard(start)
+        out[start] = seen
+    return out
+
+def _invert(mapping):
+    out = {}
+    for k, vs in mapping.items():
+        for v in vs:
+            out.setdefault(v, set()).add(k)
+    return out
+
+def _edges(g: Graph, prop):
+    out = {}
+    for child, parent in g.subject_objects(prop):
+        if isinstance(child, URIRef) and isinstance(parent, URIRef):
+            out.setdefault(str(child), set()).add(str(parent))
+    return out
+
+def compute_closure(g: Graph, source_sha256: str = "") -> dict:
+    supers_c = _transitive(_edges(g, RDFS.subClassOf))
+    supers_p = _transitive(_edges(g, RDFS.subPropertyOf))
+
+    classes = {str(c) for t in CLASS_TYPES for c in g.subjects(RDF.type, t) if isinstance(c, URIRef)}
+    classes |= set(supers_c) | {c for vs in supers_c.values() for c in vs}
+    props = {str(p) for t in PROPERTY_TYPES for p in g.subjects(RDF.type, t) if isinstance(p, URIRef)}
+    props |= set(supers_p) | {p for vs in supers_p.values() for p in vs}
+
+    declared = {"domain": _edges(g, RDFS.domain), "range": _edges(g, RDFS.range)}
+    props |= set(declared["domain"]) | set(declared["range"])
+    for vs in list(declared["domain"].values()) + list(declared["range"].values()):
+        classes |= vs
+
+    subs_c = _invert(supers_c)
+    subs_p = _invert(supers_p)
+
+    def expand(kind, p):
+        found = set(declared[kind].get(p, ()))
+        for sp in supers_p.get(p, ()):
+            found |= declared[kind].get(sp, set())
+        for c in list(found):
+            found |= supers_c.get(c, set())
+        return sorted(found)
+
+    return {
+        "version": CLOSURE_VERSION,
+        "source_sha256": source_sha256,
+        "classes": {
+            c: {"superClasses": sorted(supers_c.get(c, ())), "subClasses": sorted(subs_c.get(c, ()))}
+            for c in sorted(classes)
+        },
+        "properties": {
+            p: {
+                "superProperties": sorted(supers_p.get(p, ())),
+                "subProperties": sorted(subs_p.get(p, ())),
+                "domain": expand("domain", p),
+                "range": expand("range", p),
+            }
+            for p in sorted(props)
+        },
+    }
+
+def write_closure(closure: dict, path: pathlib.Path) -> None:
+    path.write_text(json.dumps(closure, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+def load_closure(path: pathlib.Path, source_sha256: str):
+    """Return the closure stored at `path` if it was built from `source_sha256`."""
+    try:
+        closure = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    if closure.get("version") != CLOSURE_VERSION or closure.get("source_sha256") != source_sha256:
+        return None
+    return closure
+
+def materialize(g: Graph, closure: dict) -> Graph:
+    """Copy of `g` with the RDFS entailments implied by `closure` added."""
+    classes = closure["classes"]
+    props = closure["properties"]
+    out = Graph(bind_namespaces="none")  # g's own bindings are copied below
+    for prefix, ns in g.namespaces():
+        out.bind(prefix, ns, override=True)
+    for s, p, o in g:
+        out.add((s, p, o))
+        info = props.get(str(p))
+        if info:
+            for sp in info["superProperties"]:
+                out.add((s, URIRef(sp), o))
+            for c in info["domain"]:
+                out.add((s, RDF.type, URIRef(c)))
+            if not isinstance(o, Literal):
+                for c in info["range"]:
+                    out.add((o, RDF.type, URIRef(c)))
+        if p == RDF.type and str(o) in classes:
+            for c in classes[str(o)]["superClasses"]:
+                out.add((s, RDF.type, URIRef(c)))
+        # Hierarchy triples of `g` itself, made transitive (rdfs5, rdfs11)
+        elif p == RDFS.subClassOf and str(o) in classes:
+            for c in classes[str(o)]["superClasses"]:
+                out.add((s, RDFS.subClassOf, URIRef(c)))
+        elif p == RDFS.subPropertyOf and str(o) in props:
+            for sp in props[str(o)]["superProperties"]:
+                out.add((s, RDFS.subPropertyOf, URIRef(sp)))
+    return out
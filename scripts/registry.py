@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+One entry point for the registry build.
+
+  python scripts/registry.py all              # every stage, as a DAG, in one process
+  python scripts/registry.py all --canonical  # ... with byte-stable outputs (what CI runs)
+  python scripts/registry.py serialize --force
+  python scripts/registry.py list
+
+`all` runs the pipeline stages in dependency order inside this process:
+
+  syntax ─┬─ shacl ──────────────────────────────┐
+          ├─ serialize ─┬─ roundtrip ────────────┤
+          │             ├─ openapi ──────────────┤
+          │             ├─ indexes ──────────────┼─ site
+          ├─ changes ───┴─ catalog ──────────────┤
+          └─ search ─────────────────────────────┘
+
+Stages whose inputs are ready run concurrently on threads (--parallel); the
+CPU-heavy ones fan out to their own process pools. All stages share one
+registry manifest (rescanned only after a stage that writes into the tree)
+and one in-process graph per source file (graph_cache.share_in_process).
+Stage modules are imported when the stage starts, so `registry.py syntax`
+never loads pyshacl or markdown. Each stage's output is printed as one block
+when it finishes. A failed stage skips everything downstream of it.
+
+Any stage or tool name runs that script's main() with the remaining
+arguments, e.g. `registry.py shacl --no-prune` or `registry.py payloads -d tems`.
+"""
+import os, sys, time, argparse, threading, importlib, traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# name -> (module, default argv, dependencies, writes into the registry tree)
+STAGES = {
+    "syntax": ("validate_syntax", ["--ttl-only"], [], False),
+    "shacl": ("validate_shacl", [], ["syntax"], False),
+    "serialize": ("serialize_from_ttl", [], ["syntax"], True),
+    "roundtrip": ("validate_syntax", [], ["serialize"], False),
+    "openapi": ("shacl_to_jsonschema", [], ["serialize"], True),
+    "changes": ("ontology_diff", [], ["syntax"], True),
+    "indexes": ("generate_dataspace_indexes", [], ["serialize", "changes"], True),
+    "catalog": ("generate_dcat_catalog", [], ["serialize", "changes"], False),
+    "search": ("generate_search_index", [], ["syntax"], False),
+    "site": ("generate_site", [], ["shacl", "roundtrip", "openapi", "indexes", "catalog", "search"], False),
+}
+
+# Not part of `all`
+TOOLS = {
+    "manifest": "registry_manifest",
+    "html-index": "generate_index",
+    "payloads": "validate_payloads",
+    "policy": "policy_engine",
+    "terms": "term_index",
+    "resolve": "resolver_server",
+    "trace": "instrument",
+    "stream": "stream_serialize",
+    "context": "jsonld_context",
+}
+
+class _ThreadOutput:
+    """sys.stdout/stderr stand-in that buffers writes per stage thread."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffers = {}
+
+    def write(self, text):
+        buf = self.buffers.get(threading.get_ident())
+        if buf is None:
+            return self.stream.write(text)
+        buf.append(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def call_main(module_name: str, argv, stage: str = None) -> int:
+    import instrument
+    module = importlib.import_module(module_name)
+    try:
+        with instrument.span(stage or module_name, "stage", argv=" ".join(argv)):
+            code = module.main(list(argv))
+    except SystemExit as e:  # argparse errors, explicit exits
+        code = e.code
+    if code is None:
+        return 0
+    return code if isinstance(code, int) else 1
+
+def run_stage(name: str, out: _ThreadOutput = None):
+    """(name, exit code, seconds, captured output)."""
+    module_name, argv, _, _ = STAGES[name]
+    buf = []
+    if out is not None:
+        out.buffers[threading.get_ident()] = buf
+    start = time.perf_counter()
+    try:
+        code = call_main(module_name, argv, name)
+    except Exception:
+        if out is not None:
+            buf.append(traceback.format_exc())
+        else:
+            traceback.print_exc()
+        code = 1
+    finally:
+        if out is not None:
+            out.buffers.pop(threading.get_ident(), None)
+    return name, code, time.perf_counter() - start, "".join(buf)
+
+def run_all(selected, parallel: int) -> int:
+    import graph_cache
+    import registry_manifest
+
+    graph_cache.share_in_process()
+    # Worker pools start from a clean forkserver instead of forking this
+    # multi-threaded process; heavy imports are preloaded there once.
+    import multiprocessing
+    if sys.platform != "win32" and multiprocessing.get_start_method(allow_none=True) is None:
+        multiprocessing.set_start_method("forkserver")
+        multiprocessing.set_forkserver_preload(["rdflib", "graph_cache"])
+
+    out = _ThreadOutput(sys.stdout)
+    saved = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = out, out
+    state = {}  # name -> "ok" | "failed" | "skipped"
+    timings = {}
+    total_start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+            running = {}
+            while len(state) < len(selected):
+                for name in selected:
+                    if name in state or name in running.values():
+                        continue
+                    deps = [d for d in STAGES[name][2] if d in selected]
+                    if any(state.get(d) in ("failed", "skipped") for d in deps):
+                        state[name] = "skipped"
+                        out.stream.write(f"\n--- {name}: skipped (upstream failure)\n")
+                    elif all(state.get(d) == "ok" for d in deps):
+                        running[pool.submit(run_stage, name, out)] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    del running[fut]
+                    name, code, seconds, text = fut.result()
+                    state[name] = "ok" if code == 0 else "failed"
+                    timings[name] = seconds
+                    if STAGES[name][3]:
+                        registry_manifest.invalidate()
+                    out.stream.write(f"\n--- {name} ({seconds:.2f}s){'' if code == 0 else f' FAILED (exit {code})'}\n{text}")
+                    out.stream.flush()
+    finally:
+        sys.stdout, sys.stderr = saved
+
+    failed = [n for n in selected if state.get(n) != "ok"]
+    summary = ", ".join(f"{n} {timings[n]:.2f}s" for n in selected if n in timings)
+    print(f"\n{'FAILED: ' + ', '.join(failed) if failed else 'All stages passed'} "
+          f"in {time.perf_counter() - total_start:.2f}s ({summary})")
+    return 1 if failed else 0
+
+def parse_all_args(argv):
+    ap = argparse.ArgumentParser(prog="registry.py all", description="Run every pipeline stage as a DAG.")
+    ap.add_argument("--parallel", "-p", type=int, default=min(4, os.cpu_count() or 1),
+                    help="stages running at the same time (1 = one after another)")
+    ap.add_argument("--skip", action="append", default=[], choices=sorted(STAGES),
+                    help="leave a stage out (its dependents still run)")
+    ap.add_argument("--canonical", action="store_true",
+                    help="byte-stable outputs: canonical serializations, catalog times from git (REGISTRY_CANONICAL=1)")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    if not argv or argv[0] in ("-h", "--help", "help"):
+        print(__doc__.strip())
+        return 0
+    command, rest = argv[0], argv[1:]
+    if command == "list":
+        for name, (module, default, deps, _) in STAGES.items():
+            cmd = " ".join([f"{module}.py"] + default)
+            print(f"{name:11} {cmd:42} after: {', '.join(deps) or '-'}")
+        for name, module in TOOLS.items():
+            print(f"{name:11} {module + '.py':42} (tool, not in `all`)")
+        return 0
+    if command == "all":
+        args = parse_all_args(rest)
+        if args.canonical:
+            # Read by the stage modules when they are imported
+            os.environ["REGISTRY_CANONICAL"] = "1"
+        return run_all([n for n in STAGES if n not in args.skip], args.parallel)
+    if command in STAGES:
+        return call_main(STAGES[command][0], rest or STAGES[command][1], command)
+    if command in TOOLS:
+        return call_main(TOOLS[command], rest)
+    print(f"Unknown command {command!r}; try `registry.py list`.", file=sys.stderr)
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
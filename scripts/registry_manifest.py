@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Single-pass inventory of the registry, shared by the index, catalog and site
+generators.
+
+One filesystem walk discovers the dataspaces (top-level folders laid out as
+{dataspace}/{section}/{name}/{version}/...) and their sections, and records
+size, mtime and sha256 for every file. Only top-level folders with such a
+version folder are walked at all, so virtualenvs, build output and other
+trees next to the dataspaces are never read or hashed. Hashes are reused
+from the previous manifest when size and mtime are unchanged, so a rescan
+only reads new or modified files.
+
+The result is written to .registry-cache/manifest.json:
+  {
+    "version": 1,
+    "dataspaces": {"tems": ["ontologies", "shapes", ...], ...},
+    "files": [{"path": "tems/ontologies/core/0.1.0/core.ttl",
+               "dataspace": "tems", "section": "ontologies",
+               "name": "core", "version": "0.1.0",
+               "size": 123, "mtime_ns": ..., "sha256": "..."}, ...]
+  }
+Files directly under a dataspace or section (e.g. tems/README.md) are listed
+with name/version set to null.
+
+Run directly to refresh the manifest: python scripts/registry_manifest.py
+"""
+import os, re, sys, pathlib, threading
+from collections import defaultdict
+
+from buildcache import CACHE_DIR, file_sha256, load_json, save_json
+
+MANIFEST_PATH = CACHE_DIR / "manifest.json"
+MANIFEST_VERSION = 1
+
+# Preferred display order; sections not listed here follow alphabetically.
+SECTION_ORDER = ["ontologies", "shapes", "indexes", "policies", "open-api"]
+
+# Top-level folders that are never dataspaces
+EXCLUDED_DIRS = {"docs", "scripts", "public", "benchmarks", "node_modules"}
+
+VERSION_RE = re.compile(r"^[vV]?\d+(\.\d+)*([-+][0-9A-Za-z.-]+)?$")
+
+_current = None
+_lock = threading.Lock()  # stages may run on threads (registry.py all)
+
+def _walk_files(top: pathlib.Path):
+    # os.scandir-based walk; skips dot-folders (.git, caches, ...)
+    stack = [top]
+    while stack:
+        d = stack.pop()
+        with os.scandir(d) as it:
+            for e in it:
+                if e.name.startswith("."):
+                    continue
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(pathlib.Path(e.path))
+                elif e.is_file():
+                    yield e
+
+def _subdirs(d: pathlib.Path):
+    with os.scandir(d) as it:
+        return [pathlib.Path(e.path) for e in it if not e.name.startswith(".") and e.is_dir(follow_symlinks=False)]
+
+def has_version_dir(top: pathlib.Path) -> bool:
+    # {top}/{section}/{name}/{version}/, looked up three levels deep only
+    return any(VERSION_RE.match(v.name)
+               for section in _subdirs(top) for name in _subdirs(section) for v in _subdirs(name))
+
+def scan(root: pathlib.Path, previous=None) -> dict:
+    root = root.resolve()
+    known = {f["path"]: f for f in (previous or {}).get("files", [])}
+    files = []
+    sections = defaultdict(set)
+    for top in sorted(p for p in root.iterdir() if p.is_dir()):
+        if top.name.startswith((".", "_")) or top.name in EXCLUDED_DIRS or not has_version_dir(top):
+            continue
+        space_files = []
+        for e in _walk_files(top):
+            st = e.stat()
+            rel = pathlib.Path(e.path).relative_to(root).as_posix()
+            parts = rel.split("/")
+            versioned = len(parts) >= 5 and VERSION_RE.match(parts[3]) is not None
+            old = known.get(rel)
+            if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+                digest = old["sha256"]
+            else:
+                digest = file_sha256(e.path)
+            space_files.append({
+                "path": rel,
+                "dataspace": parts[0],
+                "section": parts[1] if len(parts) >= 3 else None,
+                "name": parts[2] if versioned else None,
+                "version": parts[3] if versioned else None,
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "sha256": digest,
+            })
+        # A dataspace is a top-level folder holding at least one versioned artifact
+        if any(f["version"] for f in space_files):
+            for f in space_files:
+                if f["section"]:
+                    sections[f["dataspace"]].add(f["section"])
+            files.extend(space_files)
+    files.sort(key=lambda f: f["path"])
+    return {
+        "version": MANIFEST_VERSION,
+        "dataspaces": {space: order_sections(secs) for space, secs in sorted(sections.items())},
+        "files": files,
+    }
+
+def order_sections(sections) -> list:
+    known = [s for s in SECTION_ORDER if s in sections]
+    return known + sorted(set(sections) - set(SECTION_ORDER))
+
+def current(root=".", refresh: bool = True) -> dict:
+    """
+    The manifest for `root`, scanned at most once per process.
+
+    refresh=False reuses .registry-cache/manifest.json as-is when present.
+    """
+    global _current
+    with _lock:
+        if _current is not None:
+            return _current
+        previous = load_json(MANIFEST_PATH, {})
+        if previous.get("version") != MANIFEST_VERSION:
+            previous = {}
+        if previous and not refresh:
+            _current = previous
+            return _current
+        _current = scan(pathlib.Path(root), previous)
+        save_json(MANIFEST_PATH, _current)
+        return _current
+
+def invalidate() -> None:
+    # Forget the in-process manifest, e.g. after a stage wrote new files
+    global _current
+    with _lock:
+        _current = None
+
+def dataspaces(manifest) -> list:
+    return list(manifest["dataspaces"])
+
+def files(manifest, space=None, section=None) -> list:
+    return [
+        f for f in manifest["files"]
+        if (space is None or f["dataspace"] == space)
+        and (section is None or f["section"] == section)
+    ]
+
+def groups(manifest, space: str, section: str) -> dict:
+    """(name, version) -> [file entries], for the versioned artifacts of one section."""
+    out = defaultdict(list)
+    for f in files(manifest, space, section):
+        if f["version"] is not None:
+            out[(f["name"], f["version"])].append(f)
+    return dict(sorted(out.items()))
+
+def version_key(version: str):
+    """Sort key for version folder names: 0.10.0 after 0.9.0, pre-releases before releases."""
+    core, _, pre = version.lstrip("vV").partition("-")
+    core = core.split("+")[0]
+    return tuple(int(x) for x in core.split(".") if x.isdigit()), pre == "", pre
+
+def latest(manifest, space: str, section: str) -> dict:
+    """name -> (version, [file entries]) for the newest version of each artifact."""
+    out = {}
+    for (name, version), entries in groups(manifest, space, section).items():
+        if name not in out or version_key(version) > version_key(out[name][0]):
+            out[name] = (version, entries)
+    return out
+
+def directories(manifest) -> dict:
+    """Directory path -> sorted child names (files and folders), from the manifest alone."""
+    children = defaultdict(set)
+    for f in manifest["files"]:
+        parts = f["path"].split("/")
+        for i in range(1, len(parts)):
+            children["/".join(parts[:i])].add(parts[i])
+    return {d: sorted(names) for d, names in sorted(children.items())}
+
+def main(argv=None) -> int:
+    m = current()
+    print(f"Wrote {MANIFEST_PATH} ({len(m['files'])} files, dataspaces: {', '.join(m['dataspaces']) or 'none'})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
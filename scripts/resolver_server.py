@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the w3id.org -> CDN resolution path.
+
+An asyncio HTTP/1.1 server (keep-alive, GET/HEAD) over the registry tree
+(or a built public/ folder):
+
+- Accepts both origin-form paths (/tems/ontologies/core/5.0.0/core) and
+  absolute w3id-style targets (GET https://w3id.org/tems/... HTTP/1.1).
+- Extension-less resources and version folders holding a single .ttl are
+  content-negotiated from the Accept header: Turtle, JSON-LD, RDF/XML or
+  N-Triples. Formats not present on disk are serialized from the .ttl on
+  demand, with serialize_from_ttl.py's writers and the context its files
+  reference (REGISTRY_CANONICAL selects the canonical writers, as for the
+  build), and kept in a bounded LRU cache (--cache-mb).
+- Every response carries a strong ETag; If-None-Match yields 304. The ETag
+  is that of the identity body, with a "-gzip"/"-br" suffix for encoded
+  responses, so each representation has its own validator.
+- With Accept-Encoding br/gzip, precompressed .br/.gz siblings on disk are
+  served as-is; generated bodies are gzip-compressed once and cached.
+- File lookups and reads, on-demand serialization and compression run on
+  worker threads, so a slow disk never stalls the event loop.
+- A malformed request line or Content-Length gets 400 and the connection
+  is closed.
+- GET /_resolver/stats returns cache hit/miss counters as JSON, to size the
+  cache before putting real traffic on it.
+
+Usage:
+  python scripts/resolver_server.py --port 8080 [--root public]
+  curl -H 'Accept: application/ld+json' http://localhost:8080/tems/ontologies/core/5.0.0/core
+"""
+import os, sys, gzip, json, asyncio, hashlib, argparse, pathlib, tempfile, functools
+from collections import OrderedDict
+from urllib.parse import unquote, urlsplit
+
+# media type -> (file suffix, rdflib serializer)
+RDF_FORMATS = OrderedDict([
+    ("text/turtle", (".ttl", "turtle")),
+    ("application/ld+json", (".jsonld", "json-ld")),
+    ("application/rdf+xml", (".rdf.xml", "xml")),
+    ("application/n-triples", (".nt", "nt")),
+])
+ALIASES = {"application/x-turtle": "text/turtle", "application/json": "application/ld+json",
+           "application/xml": "application/rdf+xml", "text/xml": "application/rdf+xml"}
+
+STATIC_TYPES = {
+    ".ttl": "text/turtle; charset=utf-8",
+    ".jsonld": "application/ld+json",
+    ".json": "application/json",
+    ".xml": "application/rdf+xml",
+    ".rdf": "application/rdf+xml",
+    ".owl": "application/rdf+xml",
+    ".nt": "application/n-triples",
+    ".yaml": "application/x-yaml",
+    ".yml": "application/x-yaml",
+    ".html": "text/html; charset=utf-8",
+    ".md": "text/markdown; charset=utf-8",
+}
+
+STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 406: "Not Acceptable", 500: "Internal Server Error"}
+
+MAX_HEADER_BYTES = 64 * 1024
+
+class LRUCache:
+    """Byte-bounded LRU of response bodies."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.items = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        value = self.items.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        old = self.items.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.items[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self.items.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {"entries": len(self.items), "bytes": self.size, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+def parse_qlist(header: str):
+    """'a;q=0.5, b' -> [('b', 1.0), ('a', 0.5)] (stable for equal q)."""
+    out = []
+    for i, part in enumerate(header.split(",")):
+        fields = [f.strip() for f in part.split(";")]
+        if not fields[0]:
+            continue
+        q = 1.0
+        for f in fields[1:]:
+            if f.startswith("q="):
+                try:
+                    q = float(f[2:])
+                except ValueError:
+                    q = 0.0
+        out.append((fields[0].lower(), q, i))
+    out.sort(key=lambda t: (-t[1], t[2]))
+    return [(name, q) for name, q, _ in out]
+
+def negotiate(accept: str):
+    """Pick an RDF media type for an Accept header, or None if nothing fits."""
+    if not accept:
+        return "text/turtle"
+    for name, q in parse_qlist(accept):
+        if q <= 0:
+            continue
+        name = ALIASES.get(name, name)
+        if name in RDF_FORMATS:
+            return name
+        if name in ("*/*", "text/*"):
+            return "text/turtle"
+        if name == "application/*":
+            return "application/ld+json"
+    return None
+
+def etag_for(body: bytes, encoding: str = None) -> str:
+    # Strong validators must differ per representation (RFC 9110 8.8.3)
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + (f"-{encoding}" if encoding else "") + '"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return any(t == etag or (t.startswith("W/") and t[2:] == etag) for t in tags)
+
+class Resolver:
+    def __init__(self, root: pathlib.Path, cache_bytes: int, cache_control: str):
+        self.root = root.resolve()
+        self.cache = LRUCache(cache_bytes)
+        self.cache_control = cache_control
+        self.requests = 0
+
+    # -- path handling ------------------------------------------------------
+    def local_path(self, target: str):
+        """Request target -> path under root, or None if it escapes / is hidden."""
+        # Absolute targets (https://w3id.org/tems/...) resolve by path alone
+        segments = [s for s in unquote(urlsplit(target).path).split("/") if s]
+        if any(s.startswith(".") or "\\" in s for s in segments):
+            return None
+        return self.root.joinpath(*segments) if segments else self.root
+
+    def rdf_base(self, path: pathlib.Path):
+        """Resource base (path without suffix) whose .ttl source exists, or None."""
+        if path.is_dir():
+            ttls = sorted(path.glob("*.ttl"))
+            return ttls[0].with_suffix("") if len(ttls) == 1 else None
+        name = path.name
+        for suffix, _ in RDF_FORMATS.values():
+            if name.endswith(suffix):
+                name = name[: -len(suffix)]
+                break
+        base = path.with_name(name)
+        return base if base.with_name(name + ".ttl").is_file() else None
+
+    # -- bodies ---------------------------------------------------------------
+    def _serialize(self, ttl: pathlib.Path, fmt: str) -> dict:
+        """media type -> body for what one serialization of `ttl` yields."""
+        import graph_cache
+        import serialize_from_ttl
+        g = graph_cache.load_graph(ttl)
+        if fmt not in ("json-ld", "xml"):
+            out = g.serialize(format=fmt)
+            return {media_type: out.encode("utf-8") if isinstance(out, str) else out
+                    for media_type, (_, f) in RDF_FORMATS.items() if f == fmt}
+        # The same writers and context as the files serialize_from_ttl.py publishes
+        context = serialize_from_ttl.published_context(ttl, self.root, lambda _: g)
+        with tempfile.TemporaryDirectory() as tmp:
+            jsonld_path, rdfxml_path = pathlib.Path(tmp, "doc.jsonld"), pathlib.Path(tmp, "doc.rdf.xml")
+            serialize_from_ttl.write_documents(g, jsonld_path, rdfxml_path, context, serialize_from_ttl.CANONICAL)
+            return {"application/ld+json": jsonld_path.read_bytes(), "application/rdf+xml": rdfxml_path.read_bytes()}
+
+    def _source(self, base: pathlib.Path, media_type: str):
+        # (file on disk, None) or (None, cache key of the .ttl); runs on a worker thread
+        on_disk = base.with_name(base.name + RDF_FORMATS[media_type][0])
+        if on_disk.is_file():
+            return on_disk, None
+        ttl = base.with_name(base.name + ".ttl")
+        st = ttl.stat()
+        return None, ("rdf", ttl.as_posix(), st.st_mtime_ns, st.st_size)
+
+    async def rdf_body(self, base: pathlib.Path, media_type: str):
+        """(body, file it was read from or None when generated)."""
+        on_disk, key = await asyncio.to_thread(self._source, base, media_type)
+        if on_disk is not None:
+            return await asyncio.to_thread(on_disk.read_bytes), on_disk
+        body = self.cache.get(key + (media_type,))
+        if body is None:
+            ttl = base.with_name(base.name + ".ttl")
+            bodies = await asyncio.to_thread(self._serialize, ttl, RDF_FORMATS[media_type][1])
+            for generated_type, generated in bodies.items():
+                self.cache.put(key + (generated_type,), generated)
+            body = bodies[media_type]
+        return body, None
+
+    def encoding(self, file_path, body: bytes, accept_encoding: str):
+        """(content-encoding or None, precompressed sibling or None)."""
+        accepted = {name for name, q in parse_qlist(accept_encoding or "") if q > 0}
+        if file_path is not None:
+            for enc, suffix in (("br", ".br"), ("gzip", ".gz")):
+                sibling = file_path.with_name(file_path.name + suffix)
+                if enc in accepted and sibling.is_file():
+                    return enc, sibling
+        if "gzip" in accepted and len(body) > 512:
+            return "gzip", None
+        return None, None
+
+    async def encoded(self, body: bytes, encoding: str, sibling) -> bytes:
+        if sibling is not None:
+            return await asyncio.to_thread(sibling.read_bytes)
+        if encoding == "gzip":
+            key = ("gzip", hashlib.sha256(body).digest())
+            packed = self.cache.get(key)
+            if packed is None:
+                packed = await asyncio.to_thread(functools.partial(gzip.compress, body, compresslevel=6, mtime=0))
+                self.cache.put(key, packed)
+            return packed
+        return body
+
+    # -- request handling ---------------------------------------------------
+    async def respond(self, method: str, target: str, headers: dict):
+        """-> (status, headers, body)"""
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, b""
+        if urlsplit(target).path == "/_resolver/stats":
+            stats = dict(self.cache.stats(), requests=self.requests)
+            return 200, {"Content-Type": "application/json", "Cache-Control": "no-store"}, \
+                json.dumps(stats).encode("utf-8")
+
+        path = self.local_path(target)
+        if path is None:
+            return 404, {}, b""
+
+        vary = None
+        file_path = None
+        if await asyncio.to_thread(path.is_file):
+            file_path = path
+            body = await asyncio.to_thread(path.read_bytes)
+            ctype = STATIC_TYPES.get(path.suffix.lower(), "application/octet-stream")
+        else:
+            base = await asyncio.to_thread(self.rdf_base, path)
+            if base is None:
+                return 404, {}, b""
+            explicit = [mt for mt, (suffix, _) in RDF_FORMATS.items() if path.name.endswith(suffix)]
+            media_type = explicit[0] if explicit else negotiate(headers.get("accept", ""))
+            if media_type is None:
+                return 406, {"Content-Type": "text/plain"}, \
+                    ("Available: " + ", ".join(RDF_FORMATS)).encode("utf-8")
+            body, file_path = await self.rdf_body(base, media_type)
+            ctype = "text/turtle; charset=utf-8" if media_type == "text/turtle" else media_type
+            vary = "Accept" if not explicit else None
+
+        encoding, sibling = await asyncio.to_thread(self.encoding, file_path, body, headers.get("accept-encoding", ""))
+        etag = etag_for(body, encoding)
+        out_headers = {"ETag": etag, "Cache-Control": self.cache_control}
+        out_headers["Vary"] = "Accept, Accept-Encoding" if vary else "Accept-Encoding"
+        if etag_matches(headers.get("if-none-match", ""), etag):
+            return 304, out_headers, b""
+        payload = await self.encoded(body, encoding, sibling)
+        out_headers["Content-Type"] = ctype
+        if encoding:
+            out_headers["Content-Encoding"] = encoding
+        return 200, out_headers, payload
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                lines = head.decode("iso-8859-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self.send(writer, "HEAD", 400, {}, b"", keep_alive=False)
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                try:
+                    length = int(headers.get("content-length") or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self.send(writer, "HEAD", 400, {}, b"", keep_alive=False)
+                    return
+                if length:
+                    await reader.readexactly(length)  # GET/HEAD bodies are ignored
+
+                self.requests += 1
+                try:
+                    status, out_headers, body = await self.respond(method.upper(), target, headers)
+                except Exception as e:
+                    print(f"ERROR {target}: {type(e).__name__}: {e}", file=sys.stderr)
+                    status, out_headers, body = 500, {}, b""
+                conn = headers.get("connection", "").lower()
+                keep_alive = conn != "close" and (version == "HTTP/1.1" or conn == "keep-alive")
+                await self.send(writer, method.upper(), status, out_headers, body, keep_alive)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def send(self, writer, method, status, headers, body, keep_alive):
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+        headers = dict(headers)
+        headers["Content-Length"] = str(len(body))
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("iso-8859-1"))
+        if method != "HEAD" and status != 304:
+            writer.write(body)
+        await writer.drain()
+
+async def serve(root: pathlib.Path, host: str, port: int, cache_bytes: int, cache_control: str):
+    resolver = Resolver(root, cache_bytes, cache_control)
+    server = await asyncio.start_server(resolver.handle, host, port, limit=MAX_HEADER_BYTES)
+    addrs = ", ".join(str(s.getsockname()) for s in server.sockets)
+    print(f"Serving {resolver.root} on {addrs}")
+    async with server:
+        await server.serve_forever()
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--root", default=".", help="folder to serve (repo root or public/)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--cache-mb", type=float, default=64, help="LRU cache size for generated bodies")
+    ap.add_argument("--cache-control", default="public, max-age=300")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    try:
+        asyncio.run(serve(pathlib.Path(args.root), args.host, args.port,
+                          int(args.cache_mb * 1024 * 1024), args.cache_control))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
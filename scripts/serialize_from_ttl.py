@@ -6,16 +6,76 @@ side-by-side with the source .ttl.
 Scans all TTL files in:
   tems/**/*.ttl
   tamis/**/*.ttl
+
+Runs incrementally: a build manifest (.registry-cache/serialize-manifest.json)
+records the content hash of each source and the serializer settings used.
+A file is only re-serialized when its hash or those settings change, and
+outputs whose source .ttl has been removed are deleted. A source is also
+rebuilt when any output recorded for it is missing, so CI caches the outputs
+together with .registry-cache (see .github/workflows/ci.yml). Use --force to
+rebuild everything.
+
+Files are spread over a process pool (--jobs, default: all cores). Each
+worker parses its file once and writes every target format from that graph.
+Failures are collected and reported together at the end of the run.
+
+JSON-LD documents do not embed a context: each references one derived from
+the sources (see jsonld_context.py) by URL, <name>.context.jsonld next to
+every ontology version and {dataspace}/context.jsonld for everything else.
+Contexts are written before any document, and a document is rewritten when
+the context it references changes.
+
+Ontology sources (*/ontologies/**) additionally get a <name>.closure.json
+with their precomputed RDFS closure (see rdfs_closure.py) and a
+<name>.terms.json term/autocomplete index (see term_index.py), and policy
+sources (*/policies/**) a <name>.policy.json with the compiled ODRL decision
+index (see policy_engine.py).
+
+Sources of --stream-threshold MB or more (default 64; REGISTRY_STREAM_MB)
+are serialized by stream_serialize.py instead: flat JSON-LD and RDF/XML
+written subject by subject, plus the sorted N-Triples as <name>.nt, without
+the derived closure/terms/policy artifacts, which need the whole graph in
+memory. The Turtle parse itself still holds the source text.
+
+--canonical (or REGISTRY_CANONICAL=1) makes the output byte-stable: rdflib's
+writers order triples and label blank nodes differently from run to run, so
+in this mode JSON-LD and RDF/XML are written by stream_serialize.py's flat
+writers instead, with canonical blank-node labels and triples sorted by
+subject, predicate and object. Canonical JSON-LD is compacted with the same
+context but not framed: one node object per subject, blank nodes by label.
+Unchanged sources then give identical bytes, and CI commits, the Pages
+artifact and CDN caches only change with content.
 """
-import sys, pathlib
-from rdflib import Graph
+import os, sys, json, argparse, pathlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import rdflib
+from rdflib.plugins.serializers.jsonld import from_rdf
+
+import instrument
+import jsonld_context
+import registry_manifest
+from buildcache import CACHE_DIR, file_sha256, settings_hash, load_json, save_json
+from graph_cache import load_graph
+from policy_engine import POLICY_VERSION, compile_policies, policy_path, write_compiled
+from stream_serialize import STREAM_VERSION, serialize_canonical, serialize_streaming
+from rdfs_closure import CLOSURE_VERSION, closure_path, compute_closure, write_closure
+from term_index import TERMS_VERSION, build_term_index, terms_path, write_term_index
 
 TTL_GLOBS = [
     "tems/**/*.ttl",
     "tamis/**/*.ttl",
 ]
 
-# A compact context for nicer JSON-LD (adjust as you add prefixes)
+MANIFEST_PATH = CACHE_DIR / "serialize-manifest.json"
+
+# Sources at least this large (MB) are streamed; 0 disables streaming
+STREAM_THRESHOLD_MB = float(os.environ.get("REGISTRY_STREAM_MB", "64"))
+
+# Byte-stable output (see --canonical)
+CANONICAL = os.environ.get("REGISTRY_CANONICAL", "") not in ("", "0")
+
+# Well-known prefixes, for namespaces a source uses without binding a prefix
+# (derived contexts, see jsonld_context.py) and for payloads without a context
 JSONLD_CONTEXT = {
   "@context": {
     "tems":   "https://w3id.org/tems/core#",
@@ -31,46 +91,276 @@ JSONLD_CONTEXT = {
   }
 }
 
-def serialize_one(ttl: pathlib.Path) -> None:
-    g = Graph()
-    g.parse(ttl.as_posix(), format="turtle")
+# Anything that changes the bytes we write must be listed here, so that
+# bumping it invalidates every manifest entry.
+SERIALIZER_SETTINGS = {
+    "rdflib": rdflib.__version__,
+    "jsonld": {"context": JSONLD_CONTEXT, "auto_compact": True, "indent": 2},
+    "rdfxml": {"format": "xml"},
+    "closure": CLOSURE_VERSION,
+    "policy": POLICY_VERSION,
+    "terms": TERMS_VERSION,
+    "stream": STREAM_VERSION,
+    "context": {"version": jsonld_context.CONTEXT_VERSION, "base": jsonld_context.W3ID_BASE},
+}
+
+def is_ontology(ttl: pathlib.Path) -> bool:
+    return "ontologies" in ttl.parts
+
+def is_policy(ttl: pathlib.Path) -> bool:
+    return "policies" in ttl.parts
+
+def is_large(ttl: pathlib.Path, threshold_mb: float) -> bool:
+    return threshold_mb > 0 and ttl.stat().st_size >= threshold_mb * 1024 * 1024
 
-    jsonld_path = ttl.with_suffix(".jsonld")
-    rdfxml_path = ttl.with_suffix(".rdf.xml")
+def output_paths(ttl: pathlib.Path, streamed: bool = False):
+    paths = [ttl.with_suffix(".jsonld"), ttl.with_suffix(".rdf.xml")]
+    if streamed:
+        return paths + [ttl.with_suffix(".nt")]
+    if is_ontology(ttl):
+        paths.append(jsonld_context.context_path(ttl))
+        paths.append(closure_path(ttl))
+        paths.append(terms_path(ttl))
+    if is_policy(ttl):
+        paths.append(policy_path(ttl))
+    return paths
 
-    # JSON-LD (compacted with our context)
-    jsonld_str = g.serialize(
-        format="json-ld",
-        context=JSONLD_CONTEXT,
-        auto_compact=True,
-        indent=2,
-    )
-    if isinstance(jsonld_str, bytes):
-        jsonld_str = jsonld_str.decode("utf-8")
-    jsonld_path.write_text(jsonld_str, encoding="utf-8")
+def write_documents(g, jsonld_path: pathlib.Path, rdfxml_path: pathlib.Path, context, canonical: bool = False):
+    """JSON-LD and RDF/XML of `g`; context = (URL the JSON-LD references or None to embed it, context)."""
+    url, ctx = context
+    if canonical:
+        with instrument.span("write_canonical", "phase") as s:
+            s.count("triples_serialized", serialize_canonical(g, jsonld_path, rdfxml_path, ctx, url))
+        return
+
+    # JSON-LD (compacted with the derived context, which it references by URL)
+    with instrument.span("write_jsonld", "phase") as s:
+        doc = from_rdf(g, ctx["@context"], auto_compact=True)
+        if url:
+            doc["@context"] = url
+        jsonld_path.write_text(json.dumps(doc, indent=2, sort_keys=True, ensure_ascii=False), encoding="utf-8")
+        s.count("triples_serialized", len(g))
 
     # RDF/XML (pretty abbreviated)
-    g.serialize(destination=rdfxml_path.as_posix(), format="xml")
+    with instrument.span("write_rdfxml", "phase") as s:
+        g.serialize(destination=rdfxml_path.as_posix(), format="xml")
+        s.count("triples_serialized", len(g))
+
+def published_context(ttl: pathlib.Path, root: pathlib.Path, graph_loader=None):
+    """
+    (URL, context) the JSON-LD of `ttl` references: its version's context for
+    ontologies, else the dataspace context. When that file has not been
+    written yet, the context derived from `ttl` alone, embedded (URL None).
+    """
+    space = ttl.resolve().relative_to(root.resolve()).parts[0]
+    path = jsonld_context.context_path(ttl) if is_ontology(ttl) else jsonld_context.dataspace_context_path(root, space)
+    if path.is_file():
+        rel = path.resolve().relative_to(root.resolve()).as_posix()
+        return jsonld_context.context_url(rel), json.loads(path.read_text(encoding="utf-8"))
+    g = (graph_loader or load_graph)(ttl)
+    return None, jsonld_context.merge([jsonld_context.summarize(g, JSONLD_CONTEXT["@context"], is_ontology(ttl))])
+
+def serialize_one(ttl: pathlib.Path, digest: str, streamed: bool = False, canonical: bool = False,
+                  context=(None, JSONLD_CONTEXT)) -> str:
+    # context = (URL the JSON-LD references or None to embed it, context)
+    url, ctx = context
+    if streamed:
+        with instrument.span("serialize", file=instrument.rel(ttl), streamed=True):
+            jsonld_path, rdfxml_path, nt_path = output_paths(ttl, streamed)
+            n = serialize_streaming(ttl, jsonld_path, rdfxml_path, ctx, context_url=url, nt_path=nt_path)
+        return f"✓ {ttl} → {jsonld_path.name}, {rdfxml_path.name}, {nt_path.name} (streamed, {n} triples)"
+
+    with instrument.span("serialize", file=instrument.rel(ttl)):
+        g = load_graph(ttl, digest)
+        write_documents(g, *output_paths(ttl)[:2], context, canonical)
 
-    print(f"✓ {ttl} → {jsonld_path.name}, {rdfxml_path.name}")
+        # RDFS closure and term index (ontologies only)
+        if is_ontology(ttl):
+            with instrument.span("write_closure", "phase"):
+                write_closure(compute_closure(g, digest), closure_path(ttl))
+            with instrument.span("write_terms", "phase"):
+                write_term_index(build_term_index(g, digest), terms_path(ttl))
 
-def main() -> int:
+        # Compiled ODRL decision index (policies only)
+        warnings = []
+        if is_policy(ttl):
+            with instrument.span("write_policy", "phase"):
+                compiled = compile_policies(g, digest)
+                write_compiled(compiled, policy_path(ttl))
+            warnings = compiled["warnings"]
+
+    return f"✓ {ttl} → {', '.join(p.name for p in output_paths(ttl))}" + "".join(f"\n  warning: {w}" for w in warnings)
+
+def serialize_task(ttl: pathlib.Path, digest: str, streamed: bool, canonical: bool = False, context=(None, JSONLD_CONTEXT)):
+    # Pool entry point: never raise, so one bad file cannot abort the batch
+    try:
+        return ttl, serialize_one(ttl, digest, streamed, canonical, context), None
+    except Exception as e:
+        return ttl, None, f"{type(e).__name__}: {e}"
+
+def run_tasks(pending: dict, streamed: set, jobs: int, canonical: bool = False, contexts: dict = None):
+    # contexts: ttl -> (URL, context, sha256), from write_contexts()
+    files = sorted(pending)
+    context = {ttl: contexts[ttl][:2] if contexts else (None, JSONLD_CONTEXT) for ttl in files}
+    if jobs <= 1 or len(files) <= 1:
+        for ttl in files:
+            yield serialize_task(ttl, pending[ttl], ttl in streamed, canonical, context[ttl])
+        return
+    with ProcessPoolExecutor(max_workers=min(jobs, len(files))) as pool:
+        futures = [pool.submit(serialize_task, ttl, pending[ttl], ttl in streamed, canonical, context[ttl])
+                   for ttl in files]
+        for fut in as_completed(futures):
+            yield fut.result()
+
+def write_contexts(files, digests: dict, streamed: set, root: pathlib.Path):
+    """
+    Derive and write the contexts; returns (ttl -> (URL, context, sha256 of
+    the context file), relative paths of the dataspace contexts).
+    """
+    index = jsonld_context.load_index()
+    jsonld_context.prune(index, [ttl.relative_to(root).as_posix() for ttl in files])
+    summaries = {}
+    for ttl in files:
+        if ttl in streamed:  # too large to parse just for prefixes
+            continue
+        try:
+            summaries[ttl] = jsonld_context.lookup(
+                index, ttl.relative_to(root).as_posix(), digests[ttl],
+                lambda _: load_graph(ttl, digests[ttl]), JSONLD_CONTEXT["@context"], is_ontology(ttl))
+        except Exception:
+            pass  # unparsable: its serialize task reports the error with the other failures
+    jsonld_context.save_index(index)
+
+    out, space_contexts = {}, []
+    by_space = {}
+    for ttl in files:
+        by_space.setdefault(ttl.relative_to(root).parts[0], []).append(ttl)
+    for space, ttls in sorted(by_space.items()):
+        # Terms come from the newest version of every ontology; prefixes from every source
+        newest = {}
+        for ttl in ttls:
+            parts = ttl.relative_to(root).parts
+            if ttl in summaries and is_ontology(ttl) and len(parts) >= 5:
+                key = registry_manifest.version_key(parts[3])
+                if parts[2] not in newest or key > newest[parts[2]][0]:
+                    newest[parts[2]] = (key, parts[3])
+        def with_terms(ttl):
+            parts = ttl.relative_to(root).parts
+            return is_ontology(ttl) and len(parts) >= 5 and newest.get(parts[2], (None, None))[1] == parts[3]
+        ordered = [summaries[t] for t in ttls if t in summaries and with_terms(t)]
+        ordered += [dict(summaries[t], terms={}) for t in ttls if t in summaries and not with_terms(t)]
+        ctx = jsonld_context.merge(ordered)
+        path = jsonld_context.dataspace_context_path(root, space)
+        rel = path.relative_to(root).as_posix()
+        space_ref = (jsonld_context.context_url(rel), ctx, jsonld_context.write_context(ctx, path))
+        space_contexts.append(rel)
+        for ttl in ttls:
+            if ttl in summaries and is_ontology(ttl):
+                ctx = jsonld_context.merge([summaries[ttl]])
+                path = jsonld_context.context_path(ttl)
+                out[ttl] = (jsonld_context.context_url(path.relative_to(root).as_posix()), ctx,
+                            jsonld_context.write_context(ctx, path))
+            else:
+                out[ttl] = space_ref
+    return out, space_contexts
+
+def is_up_to_date(entry, digest: str, root: pathlib.Path) -> bool:
+    if not entry or entry.get("sha256") != digest:
+        return False
+    return all((root / rel).is_file() for rel in entry.get("outputs", []))
+
+def remove_stale_outputs(manifest, current: set, root: pathlib.Path) -> None:
+    # Outputs we produced for a .ttl that no longer exists
+    for rel_ttl in sorted(set(manifest["files"]) - current):
+        for rel in manifest["files"][rel_ttl].get("outputs", []):
+            out = root / rel
+            if out.is_file():
+                out.unlink()
+                print(f"✗ removed {rel} (source {rel_ttl} is gone)")
+        del manifest["files"][rel_ttl]
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--force", action="store_true",
+                    help="ignore the build manifest and re-serialize every file")
+    ap.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                    help="worker processes (default: all cores; 1 = serial)")
+    ap.add_argument("--stream-threshold", type=float, default=STREAM_THRESHOLD_MB, metavar="MB",
+                    help=f"stream sources of this size or more (default {STREAM_THRESHOLD_MB:g}; 0 = never)")
+    ap.add_argument("--canonical", action="store_true", default=CANONICAL,
+                    help="byte-stable output: sorted triples, canonical blank nodes (default: REGISTRY_CANONICAL)")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
     root = pathlib.Path(".").resolve()
     files = []
     for pattern in TTL_GLOBS:
         files.extend(root.glob(pattern))
     files = sorted(p for p in files if p.is_file())
 
+    # Switching modes rewrites every output
+    settings = settings_hash(dict(SERIALIZER_SETTINGS, canonical=True) if args.canonical else SERIALIZER_SETTINGS)
+    manifest = load_json(MANIFEST_PATH, {})
+    if args.force or manifest.get("settings") != settings:
+        manifest = {"settings": settings, "files": manifest.get("files", {}), "contexts": manifest.get("contexts", [])}
+        for entry in manifest["files"].values():
+            entry.pop("sha256", None)
+    manifest.setdefault("files", {})
+
+    remove_stale_outputs(manifest, {ttl.relative_to(root).as_posix() for ttl in files}, root)
+
     if not files:
+        save_json(MANIFEST_PATH, manifest)
         print("No .ttl files found.")
         return 0
 
+    pending = {}
+    streamed = {ttl for ttl in files if is_large(ttl, args.stream_threshold)}
+    digests = {ttl: file_sha256(ttl) for ttl in files}
+    contexts, space_contexts = write_contexts(files, digests, streamed, root)
+    for rel in sorted(set(manifest.get("contexts", [])) - set(space_contexts)):
+        if (root / rel).is_file():
+            (root / rel).unlink()
+            print(f"✗ removed {rel} (no sources left in its dataspace)")
+    manifest["contexts"] = space_contexts
     for ttl in files:
-        try:
-            serialize_one(ttl)
-        except Exception as e:
-            print(f"ERROR converting {ttl}: {e}", file=sys.stderr)
-            return 1
+        rel = ttl.relative_to(root).as_posix()
+        digest = digests[ttl]
+        entry = manifest["files"].get(rel)
+        if (not is_up_to_date(entry, digest, root) or entry.get("streamed", False) != (ttl in streamed)
+                or entry.get("context") != contexts[ttl][2]):
+            pending[ttl] = digest
+    skipped = len(files) - len(pending)
+
+    failures = []
+    for ttl, message, error in run_tasks(pending, streamed, args.jobs, args.canonical, contexts):
+        if error:
+            failures.append((ttl, error))
+            continue
+        print(message)
+        entry = {
+            "sha256": pending[ttl],
+            "outputs": [p.relative_to(root).as_posix() for p in output_paths(ttl, ttl in streamed)],
+            "context": contexts[ttl][2],
+        }
+        if ttl in streamed:
+            entry["streamed"] = True
+        rel_ttl = ttl.relative_to(root).as_posix()
+        # e.g. the closure of a file that is streamed now
+        for rel in set(manifest["files"].get(rel_ttl, {}).get("outputs", [])) - set(entry["outputs"]):
+            if (root / rel).is_file():
+                (root / rel).unlink()
+        manifest["files"][rel_ttl] = entry
+
+    save_json(MANIFEST_PATH, manifest)
+    if skipped:
+        print(f"{skipped} file(s) unchanged, skipped.")
+    if failures:
+        print(f"\n{len(failures)} file(s) failed to serialize:", file=sys.stderr)
+        for ttl, error in sorted(failures):
+            print(f"ERROR converting {ttl}: {error}", file=sys.stderr)
+        return 1
     return 0
 
 if __name__ == "__main__":
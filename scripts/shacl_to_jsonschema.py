@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Compile SHACL node shapes into JSON Schema components of the OpenAPI specs.
+
+Every {space}/open-api/{name}/{version}/*.yaml gets the shapes of
+{space}/shapes/{name}/ (the same version if it exists, else the newest) as
+components under #/components/schemas, one per named sh:NodeShape, keyed by
+the shape's local name and marked with
+  x-generated-from: {shapes: <shapes TTL>, shape: <shape IRI>}
+They are written as one block between marker comments at the end of
+components.schemas; the rest of the file is left byte for byte, and
+hand-written components are never touched. The block is rewritten on every
+run, so components of removed shapes disappear with it.
+
+Per sh:property (simple IRI paths only):
+  JSON key          the path compacted with the published dataspace context
+                    (jsonld_context.py), i.e. the key JSON-LD payloads use
+  sh:datatype       type / format (xsd:integer -> integer, xsd:dateTime ->
+                    string/date-time, ...)
+  sh:nodeKind sh:IRI, sh:class   string / uri
+  sh:node           $ref to the generated component of that shape
+  sh:minCount >= 1  required
+  sh:maxCount       1: a single value; otherwise a value or an array of them
+                    (minItems / maxItems; minItems >= 1 when required)
+  sh:pattern        pattern (sh:flags cannot be expressed and are dropped)
+  sh:in             enum
+  sh:minLength, sh:maxLength, sh:minInclusive, sh:maxInclusive
+  sh:name / sh:description   description
+
+Several sh:property of one shape on the same path are all enforced by SHACL;
+their schemas are combined with allOf under the one JSON key (a single
+"required" wins), and the run reports the merge so it can be checked.
+
+Gateways can then validate requests with a JSON Schema validator instead of
+running SHACL per request, and the schemas cannot drift from the shapes.
+
+Usage:
+  python scripts/shacl_to_jsonschema.py            # rewrite the specs that are out of date
+  python scripts/shacl_to_jsonschema.py --check    # only report drift; exit 1 if any
+"""
+import sys, json, argparse, pathlib
+import yaml
+from rdflib import Graph, URIRef, Literal
+from rdflib.collection import Collection
+from rdflib.namespace import RDF, SH, XSD
+
+import graph_cache
+import jsonld_context
+import registry_manifest
+
+REPO_ROOT = pathlib.Path(".").resolve()
+OPENAPI_SUFFIXES = (".yaml", ".yml")
+GENERATED_KEY = "x-generated-from"
+
+# The generated components sit between these lines in components.schemas
+BEGIN = "# >>> generated from SHACL shapes by scripts/shacl_to_jsonschema.py; do not edit"
+END = "# <<< generated from SHACL shapes"
+
+# XSD datatype -> JSON Schema (anything else: string)
+XSD_SCHEMAS = {
+    XSD.integer: {"type": "integer"},
+    XSD.int: {"type": "integer", "format": "int32"},
+    XSD.long: {"type": "integer", "format": "int64"},
+    XSD.short: {"type": "integer"},
+    XSD.nonNegativeInteger: {"type": "integer", "minimum": 0},
+    XSD.positiveInteger: {"type": "integer", "minimum": 1},
+    XSD.decimal: {"type": "number"},
+    XSD.double: {"type": "number", "format": "double"},
+    XSD.float: {"type": "number", "format": "float"},
+    XSD.boolean: {"type": "boolean"},
+    XSD.dateTime: {"type": "string", "format": "date-time"},
+    XSD.date: {"type": "string", "format": "date"},
+    XSD.anyURI: {"type": "string", "format": "uri"},
+}
+IRI_SCHEMA = {"type": "string", "format": "uri"}
+
+class _Keys:
+    """JSON key of a property IRI under a JSON-LD context: term, else CURIE, else the IRI."""
+
+    def __init__(self, context: dict):
+        self.terms, prefixes = {}, []
+        for name, d in context.items():
+            iri = d.get("@id") if isinstance(d, dict) else d
+            if not isinstance(iri, str):
+                continue
+            if jsonld_context.is_prefix_iri(iri):
+                prefixes.append((iri, name))
+            else:
+                self.terms.setdefault(iri, name)
+        self.prefixes = sorted(prefixes, key=lambda item: (-len(item[0]), item[1]))
+
+    def __call__(self, iri: str) -> str:
+        if iri in self.terms:
+            return self.terms[iri]
+        for ns, prefix in self.prefixes:
+            if iri.startswith(ns) and len(iri) > len(ns):
+                return f"{prefix}:{iri[len(ns):]}"
+        return iri
+
+def local_name(iri: str) -> str:
+    return iri.rstrip("/#").rsplit("#", 1)[-1].rsplit("/", 1)[-1]
+
+def json_value(t, key):
+    if isinstance(t, Literal):
+        v = t.toPython()
+        return v if isinstance(v, (bool, int, float, str)) else str(t)
+    return key(str(t)) if isinstance(t, URIRef) else str(t)
+
+def value_schema(g: Graph, prop, key, names: dict) -> dict:
+    schema = {}
+    datatype = g.value(prop, SH.datatype)
+    node = g.value(prop, SH.node)
+    if datatype is not None:
+        schema.update(XSD_SCHEMAS.get(datatype, {"type": "string"}))
+    elif node is not None and node in names:
+        return {"$ref": f"#/components/schemas/{names[node]}"}
+    elif g.value(prop, SH.nodeKind) == SH.IRI or g.value(prop, SH["class"]) is not None:
+        schema.update(IRI_SCHEMA)
+    for sh_term, name in ((SH.minLength, "minLength"), (SH.maxLength, "maxLength"),
+                          (SH.minInclusive, "minimum"), (SH.maxInclusive, "maximum")):
+        v = g.value(prop, sh_term)
+        if isinstance(v, Literal):
+            schema[name] = v.toPython()
+    pattern = g.value(prop, SH.pattern)
+    if pattern is not None:
+        schema["pattern"] = str(pattern)
+    values = g.value(prop, SH["in"])
+    if values is not None:
+        schema["enum"] = [json_value(v, key) for v in Collection(g, values)]
+    return schema
+
+def property_schema(g: Graph, prop, key, names: dict):
+    """(JSON key, schema, required) of one sh:property, or None for complex paths."""
+    path = g.value(prop, SH.path)
+    if not isinstance(path, URIRef):
+        return None
+    item = value_schema(g, prop, key, names)
+    min_count = g.value(prop, SH.minCount)
+    max_count = g.value(prop, SH.maxCount)
+    min_count = int(min_count) if min_count is not None else 0
+    max_count = int(max_count) if max_count is not None else None
+    if max_count == 1:
+        schema = dict(item)
+    else:
+        array = {"type": "array", "items": item}
+        if min_count >= 1:
+            array["minItems"] = min_count  # an empty array is no value at all
+        if max_count is not None:
+            array["maxItems"] = max_count
+        # JSON-LD writes a single value as-is, several as an array
+        schema = array if min_count > 1 else {"oneOf": [item, array]}
+    description = g.value(prop, SH.description) or g.value(prop, SH.name)
+    if description is not None and "$ref" not in schema:
+        schema["description"] = str(description)
+    return key(str(path)), schema, min_count >= 1
+
+def shape_names(g: Graph) -> dict:
+    return {s: local_name(str(s)) for s in g.subjects(RDF.type, SH.NodeShape) if isinstance(s, URIRef)}
+
+def compile_shapes(g: Graph, key, source: str, names: dict = None, messages: list = None) -> dict:
+    """
+    Component name -> JSON Schema for every named node shape in `g`; `names`
+    (shape -> component name) resolves sh:node across files. Properties
+    sharing a JSON key are merged with allOf and reported in `messages`.
+    """
+    own = shape_names(g)
+    names = names or own
+    components = {}
+    for shape, name in sorted(own.items(), key=lambda item: item[1]):
+        compiled = []
+        for prop in g.objects(shape, SH.property):
+            c = property_schema(g, prop, key, names)
+            if c is not None:
+                compiled.append((str(g.value(prop, SH.path)), json.dumps(c[1], sort_keys=True), c))
+        by_key = {}  # JSON key -> [(schema, required)], in path order
+        for _, _, (json_key, schema, is_required) in sorted(compiled, key=lambda item: item[:2]):
+            by_key.setdefault(json_key, []).append((schema, is_required))
+        properties, required = {}, []
+        for json_key, entries in by_key.items():
+            schemas = [schema for schema, _ in entries]
+            properties[json_key] = schemas[0] if len(schemas) == 1 else {"allOf": schemas}
+            if len(schemas) > 1 and messages is not None:
+                messages.append(f"{name}: {len(schemas)} sh:property on {json_key} merged with allOf")
+            if any(is_required for _, is_required in entries):
+                required.append(json_key)
+        component = {"type": "object"}
+        description = g.value(shape, SH.description) or g.value(shape, SH.name)
+        if description is not None:
+            component["description"] = str(description)
+        if required:
+            component["required"] = sorted(required)
+        component["properties"] = properties
+        component[GENERATED_KEY] = {"shapes": source, "shape": str(shape)}
+        components[name] = component
+    return components
+
+# ---- OpenAPI specs ----
+
+def shapes_for(manifest, space: str, name: str, version: str) -> list:
+    """Shapes TTLs feeding an OpenAPI spec: same name, same version if present, else the newest."""
+    versions = {v: entries for (n, v), entries in registry_manifest.groups(manifest, space, "shapes").items() if n == name}
+    if not versions:
+        return []
+    chosen = version if version in versions else max(versions, key=registry_manifest.version_key)
+    return sorted(f["path"] for f in versions[chosen] if f["path"].endswith(".ttl"))
+
+def dataspace_keys(space: str, shapes: Graph) -> _Keys:
+    path = jsonld_context.dataspace_context_path(REPO_ROOT, space)
+    if path.is_file():
+        return _Keys(json.loads(path.read_text(encoding="utf-8"))["@context"])
+    # Not serialized yet: the shapes file's own prefixes
+    return _Keys({p: str(ns) for p, ns in shapes.namespaces() if p})
+
+def drift(schemas: dict, components: dict, sources) -> list:
+    """What differs between the components a spec holds and the ones compiled from `sources`."""
+    out = []
+    for name, schema in schemas.items():
+        generated = isinstance(schema, dict) and isinstance(schema.get(GENERATED_KEY), dict)
+        if generated and schema[GENERATED_KEY].get("shapes") in sources and name not in components:
+            out.append(f"{name}: shape removed")
+    for name, schema in components.items():
+        if name not in schemas:
+            out.append(f"{name}: missing")
+        elif schemas[name] != schema:
+            out.append(f"{name}: out of date")
+    return out
+
+class _Dumper(yaml.SafeDumper):
+    # Indented block sequences like hand-written specs, and no &anchors for shared sub-schemas
+    def increase_indent(self, flow=False, indentless=False):
+        return super().increase_indent(flow, False)
+
+    def ignore_aliases(self, data):
+        return True
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(" "))
+
+def _is_content(line: str) -> bool:
+    return bool(line.strip()) and not line.lstrip().startswith("#")
+
+def splice(text: str, components: dict) -> str:
+    """
+    `text` with the generated block (between the BEGIN/END markers) replaced
+    by `components`, at the end of components.schemas. Everything else in
+    the file is kept byte for byte.
+    """
+    lines, skipping = [], False
+    for line in text.splitlines():
+        if line.strip() == BEGIN:
+            skipping = True
+        elif line.strip() == END:
+            skipping = False
+        elif not skipping:
+            lines.append(line)
+    comp = next((i for i, l in enumerate(lines) if l.rstrip() == "components:"), None)
+    if comp is None:
+        lines += ["components:", "  schemas:"]
+        at, indent = len(lines), 4
+    else:
+        end = next((i for i in range(comp + 1, len(lines)) if _is_content(lines[i]) and _indent(lines[i]) == 0), len(lines))
+        schemas = next((i for i in range(comp + 1, end) if lines[i].strip() == "schemas:"), None)
+        if schemas is None:
+            lines.insert(end, "  schemas:")
+            schemas, end = end, end + 1
+        base = _indent(lines[schemas])
+        at = next((i for i in range(schemas + 1, end) if _is_content(lines[i]) and _indent(lines[i]) <= base), end)
+        while at > schemas + 1 and not lines[at - 1].strip():
+            at -= 1
+        indent = base + 2
+    if components:
+        rendered = yaml.dump(components, Dumper=_Dumper, sort_keys=False, allow_unicode=True,
+                             default_flow_style=False, width=100)
+        pad = " " * indent
+        lines[at:at] = [pad + BEGIN] + [pad + l for l in rendered.splitlines()] + [pad + END]
+    return "\n".join(lines) + "\n"
+
+def openapi_specs(manifest):
+    for f in registry_manifest.files(manifest, section="open-api"):
+        if f["version"] is not None and f["path"].endswith(OPENAPI_SUFFIXES):
+            yield f
+
+def update_spec(manifest, f) -> tuple:
+    """(new text or None when no shapes feed it, drift messages)."""
+    sources = shapes_for(manifest, f["dataspace"], f["name"], f["version"])
+    if not sources:
+        return None, []
+    text = (REPO_ROOT / f["path"]).read_text(encoding="utf-8")
+    spec = yaml.safe_load(text) or {}
+    schemas = (spec.get("components") or {}).get("schemas") or {}
+    graphs = {source: graph_cache.load_graph(REPO_ROOT / source) for source in sources}
+    names = {shape: name for g in graphs.values() for shape, name in shape_names(g).items()}
+    components, messages = {}, []
+    for source, g in graphs.items():
+        for name, schema in compile_shapes(g, dataspace_keys(f["dataspace"], g), source, names, messages).items():
+            current = schemas.get(name)
+            if current is not None and not (isinstance(current, dict) and GENERATED_KEY in current):
+                messages.append(f"{name}: a hand-written component has this name; not generated")
+                continue
+            components[name] = schema
+    messages += drift(schemas, components, set(sources))
+    new_text = splice(text, components)
+    spliced = (yaml.safe_load(new_text).get("components") or {}).get("schemas") or {}
+    if any(spliced.get(name) != schema for name, schema in components.items()):
+        raise ValueError("could not place the generated components under components.schemas")
+    return new_text, messages
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--check", action="store_true",
+                    help="do not write; exit 1 if any spec is out of sync with its shapes")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    manifest = registry_manifest.current(REPO_ROOT)
+    stale = 0
+    total = 0
+    failures = []
+    for f in openapi_specs(manifest):
+        try:
+            text, messages = update_spec(manifest, f)
+        except Exception as e:
+            failures.append(f"{f['path']}: {type(e).__name__}: {e}")
+            continue
+        if text is None:
+            continue
+        total += 1
+        path = REPO_ROOT / f["path"]
+        if text == path.read_text(encoding="utf-8"):
+            continue
+        stale += 1
+        for message in messages or ["layout of the generated block"]:
+            print(f"{'✗' if args.check else '✓'} {f['path']}: {message}")
+        if not args.check:
+            path.write_text(text, encoding="utf-8")
+    for failure in failures:
+        print(f"ERROR {failure}", file=sys.stderr)
+    if failures:
+        return 1
+    if args.check and stale:
+        print(f"\n{stale} of {total} OpenAPI spec(s) out of sync with their shapes; "
+              f"run python scripts/shacl_to_jsonschema.py", file=sys.stderr)
+        return 1
+    print(f"OpenAPI specs: {total - stale} in sync, {0 if args.check else stale} regenerated.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
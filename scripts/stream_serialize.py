@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Bounded-memory serialization of very large TTL (or N-Triples/N-Quads) files.
+
+serialize_from_ttl.py builds an rdflib Graph and the complete JSON-LD /
+RDF/XML strings in memory, which needs many times the file size. Above a size
+threshold it hands the file to serialize_streaming() instead:
+
+  1. The source is parsed into a sink that writes every triple as one
+     N-Triples line to a temporary file instead of storing it. Turtle goes
+     through rdflib's parser, which still holds the source text, so memory is
+     ~1x the file (not the graph); N-Triples and N-Quads are read line by
+     line, so memory does not grow with the file (N-Quads graph names are
+     dropped: JSON-LD and RDF/XML are written flat). Literals are escaped as
+     N-Triples requires (\n, \r, \", \\), so multi-line strings stay on one
+     line.
+  2. The lines are sorted by an external merge sort (runs of RUN_LINES lines),
+     which groups each subject's triples together and drops duplicates.
+  3. One pass over the sorted lines writes N-Triples (the sorted lines),
+     RDF/XML (one rdf:Description per subject) and JSON-LD (one node object
+     per subject in "@graph") straight to disk.
+
+Memory is bounded by RUN_LINES and the largest single subject, not by the
+graph. The output is flat (no nesting of blank nodes, no list syntax) but
+holds exactly the same triples, so validate_syntax.py round-trips it.
+JSON-LD is compacted against the file's context: terms and prefixes for keys,
+types and datatypes, prefixes for @id values, and plain JSON numbers and
+booleans for xsd:integer / xsd:boolean literals in canonical form.
+Blank nodes are labelled from the parser's counter (_:b<n>), so output is
+stable for the same input; any other label is kept as _:x<label>, or
+hex-encoded as _:h<hex> when N-Triples cannot hold it. The same writers back serialize_canonical(), the in-memory
+canonical mode of serialize_from_ttl.py (--canonical). Derived artifacts that
+need the whole graph (closure, term index, compiled policies) are not
+produced for streamed files.
+
+The sorted N-Triples are published as <name>.nt next to the JSON-LD and
+RDF/XML (except for .nt sources, which already are), and resolver_server.py
+serves that file as is. Temporary files go to .registry-cache/stream-tmp/.
+
+Usage:
+  python scripts/stream_serialize.py path/to/big.ttl     # writes big.nt, big.jsonld, big.rdf.xml
+  python scripts/stream_serialize.py path/to/big.nq      # same, from N-Quads
+
+Memory is bounded for .nt and .nq sources only: Turtle is parsed in one
+piece, so a .ttl source needs about its own size in memory on top.
+"""
+import os, re, sys, json, heapq, shutil, argparse, pathlib, tempfile, itertools
+from xml.sax.saxutils import escape, quoteattr
+from rdflib import Graph, URIRef, BNode, Literal
+from rdflib.compare import to_canonical_graph
+from rdflib.namespace import RDF, XSD
+from rdflib.plugins.parsers.nquads import NQuadsParser
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser, ParseError
+
+import instrument
+from buildcache import CACHE_DIR
+
+TMP_DIR = CACHE_DIR / "stream-tmp"
+
+# Lines sorted in memory per run; bounds memory of the external sort
+RUN_LINES = 200_000
+
+# Bump when the streamed output format changes
+STREAM_VERSION = 4
+
+# Turtle parser blank nodes are "n<uuid>b<counter>"; keep only the counter
+_PARSER_BNODE = re.compile(r"^n[0-9a-f]{32}b(\d+)$")
+# Other labels that N-Triples can hold as they are
+_PLAIN_BNODE = re.compile(r"[A-Za-z0-9_\-]+")
+# Line-based sources, read without holding the file
+LINE_PARSERS = {".nt": W3CNTriplesParser, ".nq": NQuadsParser}
+# XML local name at the end of a predicate IRI
+_LOCAL_NAME = re.compile(r"[^\W\d][\w.\-]*$")
+
+# ECHARs that N-Triples string literals must escape
+_NT_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"})
+
+def nt_term(t) -> str:
+    if isinstance(t, URIRef):
+        return f"<{t}>"
+    if isinstance(t, BNode):
+        return nt_bnode(t)
+    # Not t.n3(): that writes multi-line strings as Turtle long strings
+    literal = '"' + str(t).translate(_NT_ESCAPES) + '"'
+    if t.language:
+        return f"{literal}@{t.language}"
+    if t.datatype:
+        return f"{literal}^^<{t.datatype}>"
+    return literal
+
+def nt_bnode(t: BNode) -> str:
+    m = _PARSER_BNODE.match(t)
+    if m:
+        return f"_:b{m.group(1)}"
+    # Distinct prefixes, so no label can turn into another one
+    if _PLAIN_BNODE.fullmatch(t):
+        return f"_:x{t}"
+    return "_:h" + str(t).encode("utf-8").hex()
+
+class _NTriplesSink(Graph):
+    """Graph stand-in for the parsers: triples go to `out`, not a store."""
+
+    def __init__(self, out):
+        super().__init__(bind_namespaces="none")
+        self.out = out
+        self.triples_written = 0
+        self.predicates = set()
+
+    def add(self, triple):
+        s, p, o = triple
+        self.predicates.add(p)
+        self.out.write(f"{nt_term(s)} {nt_term(p)} {nt_term(o)} .\n")
+        self.triples_written += 1
+        return self
+
+    # Sink interface of the N-Triples / N-Quads line parsers
+    def triple(self, s, p, o):
+        self.add((s, p, o))
+
+    @property
+    def default_context(self):
+        return self
+
+    def get_context(self, identifier):
+        return self  # graph names are dropped
+
+def parse_to_ntriples(source: pathlib.Path, out_path: pathlib.Path):
+    """(namespace bindings, predicate IRIs, triples) after writing `source` as N-Triples."""
+    with open(out_path, "w", encoding="utf-8") as out:
+        sink = _NTriplesSink(out)
+        parser_class = LINE_PARSERS.get(source.suffix.lower())
+        if parser_class is None:
+            sink.parse(source.as_posix(), format="turtle")
+        else:
+            parser, labels = parser_class(sink=sink), _KeepLabels()
+            with open(source, encoding="utf-8") as fh:
+                for n, line in enumerate(fh, 1):
+                    parser.line = line.rstrip("\r\n")
+                    try:
+                        parser.parseline(labels)
+                    except ParseError as e:
+                        raise ParseError(f"{source}:{n}: {e}") from None
+    return dict((p, str(ns)) for p, ns in sink.namespaces()), sink.predicates, sink.triples_written
+
+def external_sort(in_path: pathlib.Path, work: pathlib.Path, run_lines: int = RUN_LINES):
+    """Yield the distinct lines of `in_path` in sorted order using temporary runs."""
+    runs = []
+    with open(in_path, encoding="utf-8") as fh:
+        while True:
+            chunk = list(itertools.islice(fh, run_lines))
+            if not chunk:
+                break
+            chunk.sort()
+            run = work / f"run{len(runs)}.nt"
+            run.write_text("".join(chunk), encoding="utf-8")
+            runs.append(run)
+    files = [open(r, encoding="utf-8") for r in runs]
+    try:
+        previous = None
+        for line in heapq.merge(*files):
+            if line != previous:
+                yield line
+            previous = line
+    finally:
+        for f in files:
+            f.close()
+
+class _KeepLabels(dict):
+    """bnode_context for the N-Triples parser: keep labels as they are, remember nothing."""
+
+    def get(self, key, default=None):
+        return key
+
+class _Terms:
+    """Decodes sorted N-Triples lines back into rdflib terms."""
+
+    def __init__(self):
+        self.parser = W3CNTriplesParser(sink=self)
+        self.labels = _KeepLabels()
+        self.last = None
+
+    def triple(self, s, p, o):
+        self.last = (s, p, o)
+
+    def __call__(self, line: str):
+        self.parser.line = line.rstrip("\n")
+        self.parser.parseline(self.labels)
+        return self.last
+
+def grouped_by_subject(lines):
+    """(subject, [(predicate, object), ...]) per subject, in sorted order."""
+    decode = _Terms()
+    # N-Triples subjects never contain spaces, so the key is the first field
+    for _, group in itertools.groupby(lines, key=lambda line: line.split(" ", 1)[0]):
+        pairs = []
+        subject = None
+        for line in group:
+            s, p, o = decode(line)
+            subject = s
+            pairs.append((p, o))
+        yield subject, pairs
+
+# ---- RDF/XML ----
+
+def xml_prefixes(bindings: dict, predicates) -> dict:
+    """namespace IRI -> XML prefix for every predicate namespace."""
+    by_ns = {ns: prefix for prefix, ns in sorted(bindings.items()) if prefix and re.fullmatch(r"[^\W\d][\w.\-]*", prefix)}
+    by_ns[str(RDF)] = "rdf"
+    used = set(by_ns.values())
+    n = 0
+    for p in sorted(predicates):
+        ns, _ = split_predicate(p)
+        if ns not in by_ns:
+            while f"ns{n}" in used:
+                n += 1
+            by_ns[ns] = f"ns{n}"
+            used.add(by_ns[ns])
+    return by_ns
+
+def split_predicate(iri: str):
+    m = _LOCAL_NAME.search(iri)
+    if not m or m.start() == 0:
+        raise ValueError(f"cannot write predicate {iri} as an XML element name")
+    return iri[:m.start()], iri[m.start():]
+
+def _text(o) -> str:
+    # XML parsers normalize a literal CR to LF; a character reference survives
+    return escape(str(o), {"\r": "&#13;"})
+
+def rdfxml_node(subject, pairs, prefixes: dict) -> str:
+    if isinstance(subject, BNode):
+        out = [f"  <rdf:Description rdf:nodeID={quoteattr(str(subject))}>\n"]
+    else:
+        out = [f"  <rdf:Description rdf:about={quoteattr(str(subject))}>\n"]
+    for p, o in pairs:
+        ns, local = split_predicate(p)
+        tag = f"{prefixes[ns]}:{local}"
+        if isinstance(o, URIRef):
+            out.append(f"    <{tag} rdf:resource={quoteattr(str(o))}/>\n")
+        elif isinstance(o, BNode):
+            out.append(f"    <{tag} rdf:nodeID={quoteattr(str(o))}/>\n")
+        elif o.language:
+            out.append(f"    <{tag} xml:lang={quoteattr(o.language)}>{_text(o)}</{tag}>\n")
+        elif o.datatype:
+            out.append(f"    <{tag} rdf:datatype={quoteattr(str(o.datatype))}>{_text(o)}</{tag}>\n")
+        else:
+            out.append(f"    <{tag}>{_text(o)}</{tag}>\n")
+    out.append("  </rdf:Description>\n")
+    return "".join(out)
+
+# ---- JSON-LD ----
+
+class _Compactor:
+    """
+    Compaction with a flat context: property keys, @type values and datatypes
+    use terms first, then prefixes; @id values (node IRIs and references) use
+    prefixes only, since terms are not expanded there. value() applies the
+    terms' @type coercion.
+    """
+
+    def __init__(self, context: dict):
+        entries = context.get("@context", {}).items()
+        self.prefixes = sorted(((ns, p) for p, ns in entries if isinstance(ns, str) and ns.endswith(("/", "#", ":"))),
+                               key=lambda item: -len(item[0]))
+        self.terms = {}  # IRI -> (term, coerced type or None)
+        for term, d in entries:
+            if isinstance(d, dict) and "@id" in d:
+                self.terms[d["@id"]] = (term, d.get("@type"))
+            elif isinstance(d, str) and not d.endswith(("/", "#", ":")):
+                self.terms[d] = (term, None)
+
+    def __call__(self, iri: str) -> str:
+        term = self.terms.get(iri)
+        if term:
+            return term[0]
+        return self.iri(iri)
+
+    def iri(self, iri: str) -> str:
+        for ns, prefix in self.prefixes:
+            if iri.startswith(ns) and re.fullmatch(r"[\w.\-]+", iri[len(ns):]):
+                return f"{prefix}:{iri[len(ns):]}"
+        return iri
+
+    def node_id(self, t) -> str:
+        return f"_:{t}" if isinstance(t, BNode) else self.iri(str(t))
+
+    def value(self, p, o):
+        coerce = self.terms.get(str(p), (None, None))[1]
+        if coerce is None:
+            return self.plain(o)
+        if coerce == "@id" and isinstance(o, URIRef):
+            return self.iri(str(o))
+        if isinstance(o, Literal) and not o.language and o.datatype and str(o.datatype) == coerce:
+            return str(o)
+        # Anything else must not be coerced: spell it out as an object
+        v = self.plain(o)
+        return v if isinstance(v, dict) else {"@value": v}
+
+    def plain(self, o):
+        """JSON-LD for `o` under a property without coercion."""
+        if isinstance(o, (URIRef, BNode)):
+            return {"@id": self.node_id(o)}
+        if o.language:
+            return {"@value": str(o), "@language": o.language}
+        if o.datatype is None or o.datatype == XSD.string:
+            return str(o)
+        native = native_value(o)
+        if native is not None:
+            return native
+        return {"@value": str(o), "@type": self(str(o.datatype))}
+
+def native_value(o):
+    """
+    JSON number or boolean for xsd:integer / xsd:boolean literals in canonical
+    lexical form (they read back as exactly the same literal), else None.
+    """
+    lexical = str(o)
+    if o.datatype == XSD.integer and re.fullmatch(r"-?(0|[1-9]\d*)", lexical) and lexical != "-0":
+        return int(lexical)
+    if o.datatype == XSD.boolean and lexical in ("true", "false"):
+        return lexical == "true"
+    return None
+
+def jsonld_node(subject, pairs, compact) -> dict:
+    node = {"@id": compact.node_id(subject)}
+    types = [o for p, o in pairs if p == RDF.type and isinstance(o, URIRef)]
+    if types:
+        node["@type"] = [compact(str(t)) for t in types] if len(types) > 1 else compact(str(types[0]))
+    for p, o in pairs:
+        if p == RDF.type and isinstance(o, URIRef):
+            continue
+        node.setdefault(compact(str(p)), []).append(compact.value(p, o))
+    return {k: v[0] if isinstance(v, list) and len(v) == 1 else v for k, v in node.items()}
+
+# ---- driver ----
+
+def write_sorted(groups, bindings: dict, predicates, jsonld_path: pathlib.Path, rdfxml_path: pathlib.Path,
+                 context: dict, context_url: str = None) -> int:
+    """
+    Write (subject, pairs) groups as JSON-LD and RDF/XML in the given order;
+    returns the triple count. JSON-LD is compacted with `context`, which is
+    referenced by `context_url` when given and embedded otherwise.
+    """
+    prefixes = xml_prefixes(bindings, predicates)
+    compact = _Compactor(context)
+    jsonld_tmp = jsonld_path.with_name(jsonld_path.name + ".tmp")
+    rdfxml_tmp = rdfxml_path.with_name(rdfxml_path.name + ".tmp")
+    count = 0
+    with open(jsonld_tmp, "w", encoding="utf-8") as jf, open(rdfxml_tmp, "w", encoding="utf-8") as xf:
+        xf.write('<?xml version="1.0" encoding="utf-8"?>\n<rdf:RDF')
+        for ns, prefix in sorted(prefixes.items(), key=lambda item: item[1]):
+            xf.write(f"\n  xmlns:{prefix}={quoteattr(ns)}")
+        xf.write(">\n")
+        embedded = json.dumps(context_url) if context_url else json.dumps(context.get("@context", {}), sort_keys=True)
+        jf.write('{\n  "@context": ' + embedded + ',\n  "@graph": [')
+        first = True
+        for subject, pairs in groups:
+            xf.write(rdfxml_node(subject, pairs, prefixes))
+            jf.write(("\n    " if first else ",\n    ") + json.dumps(jsonld_node(subject, pairs, compact), ensure_ascii=False))
+            first = False
+            count += len(pairs)
+        xf.write("</rdf:RDF>\n")
+        jf.write("\n  ]\n}\n")
+    os.replace(jsonld_tmp, jsonld_path)
+    os.replace(rdfxml_tmp, rdfxml_path)
+    return count
+
+def _copy_lines(lines, out):
+    for line in lines:
+        out.write(line)
+        yield line
+
+def serialize_streaming(ttl: pathlib.Path, jsonld_path: pathlib.Path, rdfxml_path: pathlib.Path,
+                        context: dict, run_lines: int = RUN_LINES, context_url: str = None,
+                        nt_path: pathlib.Path = None) -> int:
+    """
+    Write JSON-LD and RDF/XML (and the sorted N-Triples to `nt_path`, unless
+    that is the source itself) for `ttl` with bounded memory; returns the
+    triple count.
+    """
+    if nt_path is not None and nt_path.resolve() == ttl.resolve():
+        nt_path = None
+    TMP_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=TMP_DIR) as tmp:
+        work = pathlib.Path(tmp)
+        with instrument.span("stream_parse", "phase", file=instrument.rel(ttl)) as s:
+            bindings, predicates, n = parse_to_ntriples(ttl, work / "unsorted.nt")
+            s.count("triples_parsed", n)
+        with instrument.span("stream_write", "phase", file=instrument.rel(ttl)) as s:
+            lines = external_sort(work / "unsorted.nt", work, run_lines)
+            nt_tmp = work / "sorted.nt"
+            with open(nt_tmp if nt_path is not None else os.devnull, "w", encoding="utf-8") as nt:
+                count = write_sorted(grouped_by_subject(_copy_lines(lines, nt)), bindings, predicates,
+                                     jsonld_path, rdfxml_path, context, context_url)
+            if nt_path is not None:
+                shutil.move(nt_tmp, nt_path)
+            s.count("triples_serialized", count)
+    return count
+
+def serialize_canonical(g: Graph, jsonld_path: pathlib.Path, rdfxml_path: pathlib.Path, context: dict,
+                        context_url: str = None) -> int:
+    """
+    Byte-stable JSON-LD and RDF/XML for an in-memory graph: blank nodes get
+    canonical (RGDA1) labels and triples are written sorted by subject,
+    predicate and object, in the same flat layout as streamed output.
+    """
+    if any(isinstance(t, BNode) for triple in g for t in triple[::2]):
+        canonical = to_canonical_graph(g)
+    else:
+        canonical = g
+    lines = sorted({f"{nt_term(s)} {nt_term(p)} {nt_term(o)} .\n" for s, p, o in canonical})
+    bindings = dict((p, str(ns)) for p, ns in g.namespaces())
+    return write_sorted(grouped_by_subject(lines), bindings, set(g.predicates()), jsonld_path, rdfxml_path,
+                        context, context_url)
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0],
+                                 epilog="Memory is bounded for .nt/.nq sources; Turtle is parsed in one piece.")
+    ap.add_argument("ttl", nargs="+", help="Turtle, N-Triples or N-Quads file(s); outputs are written next to them")
+    ap.add_argument("--run-lines", type=int, default=RUN_LINES, help=f"lines per sort run (default {RUN_LINES})")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    from serialize_from_ttl import JSONLD_CONTEXT
+    args = parse_args(argv)
+    failures = 0
+    for path in args.ttl:
+        source = pathlib.Path(path)
+        outputs = [source.with_suffix(s) for s in (".nt", ".jsonld", ".rdf.xml")]
+        try:
+            n = serialize_streaming(source, outputs[1], outputs[2], JSONLD_CONTEXT, args.run_lines, nt_path=outputs[0])
+            names = ", ".join(p.name for p in outputs if p != source)
+            print(f"✓ {source} → {names} ({n} triples, streamed)")
+        except Exception as e:
+            print(f"ERROR converting {source}: {type(e).__name__}: {e}", file=sys.stderr)
+            failures += 1
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Compact term index of an ontology, for UIs that build facets and
+autocomplete without an RDF parser.
+
+The serialization stage writes one <name>.terms.json next to every ontology
+TTL:
+  {
+    "version": 1, "source_sha256": "...",
+    "ontology": {"iri": ..., "labels": {...}, "versionInfo": ...},
+    "prefixes": {"tc": "http://tems.org/2024/temscore#", ...},
+    "terms": [{"iri": ..., "curie": "tc:Article", "kind": "class",
+               "labels": {"en": ["article"]}, "comments": {"en": [...]},
+               "parents": ["tc:MediaObject"], "domain": [...], "range": [...]}],
+    "tokens":   [["article", [0, 7]], ...],
+    "trigrams": {" ar": [0], "art": [0, 3], ...}
+  }
+Term references (parents, domain, range) are CURIEs over "prefixes"; labels
+without a language tag are under "@none"; empty fields are left out.
+"tokens" is sorted, so a client finds every term with a word starting with
+the typed text by binary search; "trigrams" catches typos and infix matches. Numbers in both refer to
+positions in "terms". search() below is the reference lookup.
+
+Usage:
+  python scripts/term_index.py tems/ontologies/core/5.0.0/core.ttl "media obj"
+"""
+import re, sys, json, bisect, pathlib, unicodedata
+from rdflib import Graph, Literal, URIRef, RDF, RDFS, OWL
+from rdflib.namespace import DCTERMS, SKOS
+
+TERMS_VERSION = 1
+TERMS_SUFFIX = ".terms.json"
+
+KINDS = [
+    (OWL.Class, "class"),
+    (RDFS.Class, "class"),
+    (OWL.ObjectProperty, "objectProperty"),
+    (OWL.DatatypeProperty, "datatypeProperty"),
+    (OWL.AnnotationProperty, "annotationProperty"),
+    (RDF.Property, "property"),
+    (OWL.NamedIndividual, "individual"),
+]
+LABELS = [RDFS.label, SKOS.prefLabel, SKOS.altLabel, DCTERMS.title]
+COMMENTS = [RDFS.comment, SKOS.definition, DCTERMS.description]
+
+_WORD_RE = re.compile(r"[0-9a-z]+")
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+def terms_path(ttl: pathlib.Path) -> pathlib.Path:
+    return ttl.with_suffix(TERMS_SUFFIX)
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold()
+
+def words(text: str) -> list:
+    return _WORD_RE.findall(normalize(_CAMEL_RE.sub(" ", text)))
+
+def trigrams(word: str) -> set:
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def local_name(iri: str) -> str:
+    return re.split(r"[#/:]", iri.rstrip("#/"))[-1]
+
+class _Curies:
+    # Longest declared namespace wins; only namespaces actually used are kept
+    def __init__(self, g: Graph):
+        self.namespaces = sorted(((str(ns), p) for p, ns in g.namespaces() if p), key=lambda t: -len(t[0]))
+        self.used = {}
+
+    def __call__(self, iri: str) -> str:
+        for ns, prefix in self.namespaces:
+            if iri.startswith(ns) and len(iri) > len(ns):
+                self.used[prefix] = ns
+                return f"{prefix}:{iri[len(ns):]}"
+        return iri
+
+def _by_lang(g: Graph, node, props) -> dict:
+    out = {}
+    for prop in props:
+        for o in g.objects(node, prop):
+            if isinstance(o, Literal):
+                vals = out.setdefault(o.language or "@none", [])
+                if str(o) not in vals:
+                    vals.append(str(o))
+    return {lang: sorted(vals) for lang, vals in sorted(out.items())}
+
+def build_term_index(g: Graph, source_sha256: str = "") -> dict:
+    curie = _Curies(g)
+    kinds = {}
+    for cls, kind in KINDS:
+        for s in g.subjects(RDF.type, cls):
+            if isinstance(s, URIRef):
+                kinds.setdefault(str(s), kind)  # first match in KINDS order wins
+    onto = next((s for s in g.subjects(RDF.type, OWL.Ontology) if isinstance(s, URIRef)), None)
+    # Individuals: typed by one of the ontology's own classes
+    classes = {iri for iri, kind in kinds.items() if kind == "class"}
+    for s, o in g.subject_objects(RDF.type):
+        if isinstance(s, URIRef) and str(o) in classes:
+            kinds.setdefault(str(s), "individual")
+    kinds.pop(str(onto), None)
+
+    def refs(node, prop):
+        return sorted(curie(str(o)) for o in g.objects(node, prop) if isinstance(o, URIRef))
+
+    terms = []
+    for iri in sorted(kinds):
+        node = URIRef(iri)
+        kind = kinds[iri]
+        term = {
+            "iri": iri,
+            "curie": curie(iri),
+            "kind": kind,
+            "labels": _by_lang(g, node, LABELS),
+            "comments": _by_lang(g, node, COMMENTS),
+            "parents": refs(node, RDFS.subClassOf if kind == "class" else RDFS.subPropertyOf),
+        }
+        if kind not in ("class", "individual"):
+            term["domain"] = refs(node, RDFS.domain)
+            term["range"] = refs(node, RDFS.range)
+        if (node, OWL.deprecated, Literal(True)) in g:
+            term["deprecated"] = True
+        terms.append({k: v for k, v in term.items() if v})
+
+    token_map, trigram_map = {}, {}
+    for i, term in enumerate(terms):
+        text = [local_name(term["iri"])] + [v for vals in term.get("labels", {}).values() for v in vals]
+        for w in {w for t in text for w in words(t)}:
+            token_map.setdefault(w, []).append(i)
+            for tri in trigrams(w):
+                trigram_map.setdefault(tri, []).append(i)
+
+    return {
+        "version": TERMS_VERSION,
+        "source_sha256": source_sha256,
+        "ontology": {
+            "iri": str(onto) if onto is not None else None,
+            "labels": _by_lang(g, onto, LABELS) if onto is not None else {},
+            "versionInfo": str(g.value(onto, OWL.versionInfo)) if onto is not None and g.value(onto, OWL.versionInfo) else None,
+        },
+        "prefixes": dict(sorted(curie.used.items())),
+        "terms": terms,
+        "tokens": [[w, sorted(set(ids))] for w, ids in sorted(token_map.items())],
+        "trigrams": {t: sorted(set(ids)) for t, ids in sorted(trigram_map.items())},
+    }
+
+def write_term_index(index: dict, path: pathlib.Path) -> None:
+    # Compact separators: this file is fetched by browsers
+    path.write_text(json.dumps(index, ensure_ascii=False, sort_keys=True, separators=(",", ":")) + "\n",
+                    encoding="utf-8")
+
+def _prefix_hits(index: dict, prefix: str) -> set:
+    tokens = index["tokens"]
+    i = bisect.bisect_left(tokens, [prefix])
+    hits = set()
+    while i < len(tokens) and tokens[i][0].startswith(prefix):
+        hits.update(tokens[i][1])
+        i += 1
+    return hits
+
+def search(index: dict, query: str, limit: int = 10) -> list:
+    """Terms whose words start with every word of `query`; trigram similarity as fallback."""
+    qwords = words(query)
+    if not qwords:
+        return []
+    hits = None
+    for w in qwords:
+        found = _prefix_hits(index, w)
+        hits = found if hits is None else hits & found
+    terms = index["terms"]
+    if hits:
+        q = normalize(query).strip()
+        def rank(i):
+            t = terms[i]
+            names = [local_name(t["iri"]).casefold()] + [normalize(v) for vs in t.get("labels", {}).values() for v in vs]
+            return (0 if q in names else 1 if any(n.startswith(q) for n in names) else 2, len(names[0]), t["iri"])
+        return [terms[i] for i in sorted(hits, key=rank)[:limit]]
+
+    qgrams = set().union(*(trigrams(w) for w in qwords))
+    scores = {}
+    for tri in qgrams:
+        for i in index["trigrams"].get(tri, ()):
+            scores[i] = scores.get(i, 0) + 1
+    ranked = sorted(scores, key=lambda i: (-scores[i], terms[i]["iri"]))
+    return [terms[i] for i in ranked[:limit] if scores[i] * 2 >= len(qgrams)]
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("usage: term_index.py <ontology.ttl | name.terms.json> <query>", file=sys.stderr)
+        return 2
+    source, query = pathlib.Path(argv[0]), argv[1]
+    if source.name.endswith(TERMS_SUFFIX):
+        index = json.loads(source.read_text(encoding="utf-8"))
+    else:
+        import graph_cache
+        index = build_term_index(graph_cache.load_graph(source))
+    for t in search(index, query):
+        labels = t.get("labels", {})
+        label = next(iter(labels.get("en") or next(iter(labels.values()), [""])), "")
+        print(f"{t['curie']:40} {t['kind']:20} {label}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Validate incoming JSON-LD payloads against registry shapes, in bulk.
+
+Shapes are selected per dataspace (newest version of every shapes file, or
+--version) or given explicitly with --shapes, merged and compiled once per
+worker process. The dataspace ontologies' RDFS closure is loaded once as well,
+so payloads typed with a subclass still hit the shapes' targets without
+running inference per document.
+
+Payloads come from NDJSON (one JSON-LD object per line, stdin or a file) or a
+directory of *.jsonld / *.json / *.ttl files. They are validated in batches
+across a process pool with a bounded number of batches in flight, and one
+NDJSON result per payload is written to stdout in input order:
+
+  {"id": "line:3", "conforms": false, "results": [{"focusNode": ..., "path": ...,
+   "severity": "Violation", "message": ..., "value": ..., "sourceShape": ...}]}
+
+Payloads without an @context are read with the registry's well-known
+prefixes (tems:, schema:, ...). Payloads referencing a published context by
+URL (e.g. https://w3id.org/tems/context.jsonld) are read with the file from
+the registry tree, loaded once per process. Nothing is ever fetched: any
+other context reference (remote URL, relative path, @import), at the top
+level or nested, makes that payload's result an error.
+
+Usage:
+  python scripts/validate_payloads.py --dataspace tems < payloads.ndjson
+  python scripts/validate_payloads.py --shapes tems/shapes/media-objects/0.1.0/media-objects.ttl incoming/
+
+From Python:
+  validator = PayloadValidator(shapes_for("tems"), ontologies_for("tems"))
+  validator.validate({"@type": "tems:MediaObject", "schema:name": "x"})
+"""
+import os, sys, json, time, argparse, pathlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pyshacl import Validator
+from pyshacl.graph_abstraction import DataGraph
+from pyshacl.shapes_graph import ShapesGraph
+from rdflib import Graph
+from rdflib.namespace import SH
+from rdflib.plugins.parsers.jsonld import to_rdf
+
+import graph_cache
+import jsonld_context
+import registry_manifest
+from rdfs_closure import compute_closure, materialize
+from serialize_from_ttl import JSONLD_CONTEXT
+
+REPO_ROOT = pathlib.Path(".").resolve()
+
+PAYLOAD_SUFFIXES = {".jsonld": "json-ld", ".json": "json-ld", ".ttl": "turtle"}
+BATCH_SIZE = 64
+
+def shapes_for(space: str, version: str = None, root=".") -> list:
+    """Shapes TTLs of a dataspace: the newest version of each, or exactly `version`."""
+    manifest = registry_manifest.current(root)
+    if version:
+        groups = registry_manifest.groups(manifest, space, "shapes")
+        picked = [entries for (_, v), entries in groups.items() if v == version]
+    else:
+        picked = [entries for _, entries in registry_manifest.latest(manifest, space, "shapes").values()]
+    return sorted(f["path"] for entries in picked for f in entries if f["path"].endswith(".ttl"))
+
+def ontologies_for(space: str, root=".") -> list:
+    """Newest ontology TTLs of a dataspace, used for the RDFS closure."""
+    manifest = registry_manifest.current(root)
+    latest = registry_manifest.latest(manifest, space, "ontologies")
+    return sorted(f["path"] for _, entries in latest.values() for f in entries if f["path"].endswith(".ttl"))
+
+def _short(term):
+    return None if term is None else str(term)
+
+def local_contexts(doc):
+    """
+    `doc` with every @context reference replaced by the registry file it
+    names; raises ValueError for references that would have to be fetched.
+    """
+    if isinstance(doc, list):
+        return [local_contexts(item) for item in doc]
+    if not isinstance(doc, dict):
+        return doc
+    return {k: _local_context(v) if k == "@context" else local_contexts(v) for k, v in doc.items()}
+
+def _local_context(ctx):
+    if isinstance(ctx, list):
+        return [_local_context(c) for c in ctx]
+    if isinstance(ctx, str):
+        if jsonld_context.local_path(ctx, REPO_ROOT) is None:
+            raise ValueError(f"@context {ctx!r} is not a registry context; remote contexts are not fetched")
+        return jsonld_context.inline_contexts({"@context": ctx}, REPO_ROOT)["@context"]
+    if isinstance(ctx, dict):
+        if "@import" in ctx:
+            raise ValueError(f"@import {ctx['@import']!r} in @context; remote contexts are not fetched")
+        return local_contexts(ctx)  # scoped contexts of term definitions
+    return ctx
+
+class PayloadValidator:
+    """Shapes (and ontology closure) compiled once, reused for every payload."""
+
+    def __init__(self, shape_paths, ontology_paths=()):
+        # No prefix bindings: rdflib's ~30 default bindings are re-applied to every report graph
+        shapes = Graph(bind_namespaces="none")
+        for path in shape_paths:
+            shapes += graph_cache.load_graph(path)
+        self.shapes = ShapesGraph(shapes)
+        self.shapes.shapes  # harvest node/property shapes once
+        self.closure = None
+        if ontology_paths:
+            ontology = Graph(bind_namespaces="none")
+            for path in ontology_paths:
+                ontology += graph_cache.load_graph(path)
+            self.closure = compute_closure(ontology)
+
+    def parse(self, payload, fmt: str = "json-ld") -> Graph:
+        g = Graph(bind_namespaces="none")
+        if fmt == "json-ld":
+            if isinstance(payload, (str, bytes)):
+                payload = json.loads(payload)
+            context = None if isinstance(payload, dict) and "@context" in payload else JSONLD_CONTEXT["@context"]
+            to_rdf(local_contexts(payload), g, context_data=context)
+        else:
+            g.parse(data=payload, format=fmt)
+        return g
+
+    def validate(self, payload, fmt: str = "json-ld") -> dict:
+        """{"conforms": bool, "results": [...]} for one payload (object or text)."""
+        g = self.parse(payload, fmt)
+        if self.closure is not None:
+            g = materialize(g, self.closure)
+        validator = Validator(DataGraph.from_rdflib(g), shacl_graph=self.shapes.graph,
+                              options={"abort_on_first": False, "inference": "none"})
+        validator.shacl_graph = self.shapes
+        conforms, report, _ = validator.run()
+        results = []
+        for r in report.objects(None, SH.result):
+            results.append({
+                "focusNode": _short(report.value(r, SH.focusNode)),
+                "path": _short(report.value(r, SH.resultPath)),
+                "severity": _short(report.value(r, SH.resultSeverity)).rsplit("#", 1)[-1],
+                "message": _short(report.value(r, SH.resultMessage)),
+                "value": _short(report.value(r, SH.value)),
+                "sourceShape": _short(report.value(r, SH.sourceShape)),
+            })
+        results.sort(key=lambda x: (x["focusNode"] or "", x["path"] or "", x["message"] or ""))
+        return {"conforms": bool(conforms), "results": results}
+
+# -- worker pool ---------------------------------------------------------------
+
+_VALIDATOR = None
+
+def _init_worker(shape_paths, ontology_paths):
+    global _VALIDATOR
+    _VALIDATOR = PayloadValidator(shape_paths, ontology_paths)
+
+def validate_batch(batch):
+    """[(id, payload, fmt)] -> [result dicts]; errors are reported per payload."""
+    out = []
+    for pid, payload, fmt in batch:
+        try:
+            result = _VALIDATOR.validate(payload, fmt)
+        except Exception as e:
+            result = {"conforms": False, "error": f"{type(e).__name__}: {e}"}
+        out.append(dict(id=pid, **result))
+    return out
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def validate_stream(items, shape_paths, ontology_paths=(), jobs: int = 1,
+                    batch_size: int = BATCH_SIZE, window: int = None):
+    """
+    Yield one result per (id, payload, fmt) item, in input order.
+
+    At most `window` batches (default 4 per worker) are in flight, so memory
+    stays bounded however long the input stream is.
+    """
+    if jobs <= 1:
+        _init_worker(shape_paths, ontology_paths)
+        for batch in _batches(items, batch_size):
+            yield from validate_batch(batch)
+        return
+    window = window or jobs * 4
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(shape_paths, ontology_paths)) as pool:
+        pending = deque()
+        for batch in _batches(items, batch_size):
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+            pending.append(pool.submit(validate_batch, batch))
+        while pending:
+            yield from pending.popleft().result()
+
+# -- input ---------------------------------------------------------------------
+
+def read_ndjson(stream, name: str):
+    for n, line in enumerate(stream, 1):
+        line = line.strip()
+        if line:
+            yield f"{name}:{n}", line, "json-ld"
+
+def read_directory(root: pathlib.Path):
+    for path in sorted(root.rglob("*")):
+        fmt = PAYLOAD_SUFFIXES.get(path.suffix.lower())
+        if fmt and path.is_file():
+            yield path.as_posix(), path.read_text(encoding="utf-8"), fmt
+
+def read_inputs(sources):
+    if not sources:
+        yield from read_ndjson(sys.stdin, "line")
+        return
+    for source in sources:
+        path = pathlib.Path(source)
+        if source == "-":
+            yield from read_ndjson(sys.stdin, "line")
+        elif path.is_dir():
+            yield from read_directory(path)
+        else:
+            with open(path, encoding="utf-8") as f:
+                yield from read_ndjson(f, path.as_posix())
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("inputs", nargs="*", help="NDJSON files or payload directories (default: stdin)")
+    ap.add_argument("--dataspace", "-d", help="validate against this dataspace's shapes and ontologies")
+    ap.add_argument("--version", help="shapes version to use (default: newest of each shapes file)")
+    ap.add_argument("--shapes", action="append", default=[], help="shapes TTL (repeatable)")
+    ap.add_argument("--ontology", action="append", default=[],
+                    help="ontology TTL whose RDFS closure is applied to payloads (repeatable)")
+    ap.add_argument("--no-closure", action="store_true", help="validate payloads as-is, without RDFS entailments")
+    ap.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                    help="worker processes (default: all cores; 1 = in-process)")
+    ap.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    ap.add_argument("--violations-only", action="store_true", help="only print non-conforming payloads")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    shape_paths = list(args.shapes)
+    ontology_paths = list(args.ontology)
+    if args.dataspace:
+        shape_paths = shape_paths or shapes_for(args.dataspace, args.version)
+        ontology_paths = ontology_paths or ontologies_for(args.dataspace)
+    if args.no_closure:
+        ontology_paths = []
+    if not shape_paths:
+        print("No shapes selected (use --dataspace or --shapes).", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    total = failed = 0
+    out = sys.stdout
+    for result in validate_stream(read_inputs(args.inputs), shape_paths, ontology_paths,
+                                  args.jobs, args.batch_size):
+        total += 1
+        if not result["conforms"]:
+            failed += 1
+        if result["conforms"] and args.violations_only:
+            continue
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    out.flush()
+
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed else 0.0
+    print(f"{total} payload(s), {failed} not conforming, {elapsed:.2f}s ({rate:.0f}/s) "
+          f"against {len(shape_paths)} shapes file(s)", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,38 +1,170 @@
 #!/usr/bin/env python
-import os, sys
-from pyshacl import validate
+"""
+Validate every ontology TTL against every SHACL shapes TTL, across all
+dataspaces in the registry manifest (registry_manifest.py).
+
+Each shapes graph and data graph is parsed exactly once into an in-memory
+cache, and each shapes file is compiled once and reused against every data
+graph. The (shapes x data) matrix can be spread across worker processes with
+--jobs; every worker keeps its own parse/compile cache. Parsed graphs also go
+through the persistent graph cache (graph_cache.py), so unchanged files are
+decoded rather than re-parsed across runs and scripts.
+
+Pairs where no shape target can match anything in the data file (see
+focus_index.py) are reported as "not applicable" and skipped; --no-prune
+validates every pair.
+
+RDFS entailments are not recomputed per pair: each data graph is materialized
+once from its precomputed closure (<name>.closure.json from the serialization
+stage, or computed on the spot when missing or stale) and validated without
+inference. --rdfs-inference falls back to pySHACL's own RDFS inference, which
+also adds the RDFS axiomatic triples.
+"""
+import os, sys, argparse, pathlib
+from concurrent.futures import ProcessPoolExecutor
+from pyshacl import Validator
+from pyshacl.graph_abstraction import DataGraph
+from pyshacl.shapes_graph import ShapesGraph
 from rdflib import Graph
 
-def find_files(root, pattern):
-    for dirpath, _, filenames in os.walk(root):
-        for fn in filenames:
-            if fn.endswith(pattern):
-                yield os.path.join(dirpath, fn)
-
-def main():
-    # naive pass: for each shapes TTL file, validate each ontology TTL
-    ont_ttls = list(find_files(".", ".ttl"))
-    ont_ttls = [f for f in ont_ttls if "/ontologies/" in f]
-    shape_ttls = list(find_files("tems/shapes", ".ttl")) + list(find_files("tamis/shapes", ".ttl"))
+import focus_index
+import graph_cache
+import instrument
+import registry_manifest
+from buildcache import file_sha256
+from rdfs_closure import closure_path, compute_closure, load_closure, materialize
+
+VALIDATOR_OPTIONS = {"abort_on_first": False}
+
+# Per-process caches: path -> parsed Graph / materialized Graph / compiled ShapesGraph
+_GRAPHS = {}
+_MATERIALIZED = {}
+_COMPILED = {}
+
+def section_ttls(manifest, section: str) -> list:
+    # Every dataspace the manifest discovered, not a fixed list
+    return sorted(f["path"] for f in registry_manifest.files(manifest, section=section) if f["path"].endswith(".ttl"))
+
+def load_graph(path) -> Graph:
+    g = _GRAPHS.get(path)
+    if g is None:
+        g = graph_cache.load_graph(path)
+        _GRAPHS[path] = g
+    return g
+
+def materialized_graph(path) -> Graph:
+    g = _MATERIALIZED.get(path)
+    if g is None:
+        digest = file_sha256(path)
+        with instrument.span("materialize", "phase", file=instrument.rel(path)) as s:
+            closure = load_closure(closure_path(pathlib.Path(path)), digest)
+            if closure is None:
+                closure = compute_closure(load_graph(path), digest)
+            g = materialize(load_graph(path), closure)
+            s.count("triples", len(g))
+        _MATERIALIZED[path] = g
+    return g
+
+def compiled_shapes(path) -> ShapesGraph:
+    sg = _COMPILED.get(path)
+    if sg is None:
+        with instrument.span("compile_shapes", "phase", file=instrument.rel(path)) as s:
+            sg = ShapesGraph(load_graph(path))
+            sg.shapes  # harvests node/property shapes once; cached on the object
+            s.count("shapes", len(sg.shapes))
+        _COMPILED[path] = sg
+    return sg
+
+def validate_pair(shapes_path, data_path, inference="closure"):
+    shapes = compiled_shapes(shapes_path)
+    if inference == "rdfs":
+        # pySHACL infers on a clone of the data graph, so the cached graph stays pristine
+        data, options = load_graph(data_path), dict(VALIDATOR_OPTIONS, inference="rdfs")
+    else:
+        data, options = materialized_graph(data_path), dict(VALIDATOR_OPTIONS, inference="none")
+    validator = Validator(
+        DataGraph.from_rdflib(data),
+        shacl_graph=shapes.graph,
+        options=options,
+    )
+    validator.shacl_graph = shapes
+    conforms, _, results_text = validator.run()
+    return conforms, results_text
+
+def check_pair(task):
+    # Pool entry point: report errors as results instead of raising
+    shapes_path, data_path, inference = task
+    try:
+        with instrument.span("shacl_pair", "pair", shapes=shapes_path, data=data_path) as s:
+            conforms, results_text = validate_pair(shapes_path, data_path, inference)
+            s.set(conforms=conforms)
+        return shapes_path, data_path, conforms, results_text
+    except Exception as e:
+        return shapes_path, data_path, False, f"ERROR: {type(e).__name__}: {e}"
+
+def run_matrix(pairs, jobs: int, inference: str):
+    tasks = [(shapes_path, data_path, inference) for shapes_path, data_path in pairs]
+    if jobs <= 1 or len(tasks) <= 1:
+        return map(check_pair, tasks)
+    # Pairs are ordered by shapes file, so a chunk mostly reuses one compiled shapes graph
+    workers = min(jobs, len(pairs))
+    chunksize = max(1, len(pairs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(check_pair, tasks, chunksize=chunksize))
+
+def prune_pairs(pairs, shape_ttls, ont_ttls):
+    """Split pairs into (to validate, not applicable) using the focus-node index."""
+    index = focus_index.load_index()
+    focus_index.prune(index, "shapes", shape_ttls)
+    focus_index.prune(index, "data", ont_ttls)
+    entries = {}
+    for kind, paths in (("shapes", shape_ttls), ("data", ont_ttls)):
+        for path in paths:
+            entries[path] = focus_index.lookup(index, kind, path, file_sha256(path), load_graph)
+    focus_index.save_index(index)
+
+    applicable, skipped = [], []
+    for shapes_path, data_path in pairs:
+        if focus_index.may_apply(entries[shapes_path], entries[data_path]):
+            applicable.append((shapes_path, data_path))
+        else:
+            skipped.append((shapes_path, data_path))
+    return applicable, skipped
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                    help="worker processes (default: all cores; 1 = in-process)")
+    ap.add_argument("--no-prune", action="store_true",
+                    help="validate every (shapes, data) pair, even when no target can match")
+    ap.add_argument("--rdfs-inference", action="store_true",
+                    help="run pySHACL RDFS inference per pair instead of using precomputed closures")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    # for each shapes TTL file, validate each ontology TTL
+    manifest = registry_manifest.current()
+    ont_ttls = section_ttls(manifest, "ontologies")
+    shape_ttls = section_ttls(manifest, "shapes")
     had_error = False
 
     if not shape_ttls:
         print("No shapes found, skipping SHACL validation.")
         return 0
 
-    for shapes_path in shape_ttls:
-        shapes = Graph()
-        shapes.parse(shapes_path, format="turtle")
-        for ttl in ont_ttls:
-            data = Graph()
-            data.parse(ttl, format="turtle")
-            conforms, results_graph, results_text = validate(
-                data_graph=data, shacl_graph=shapes, inference="rdfs", abort_on_first=False, serialize_report_graph=True
-            )
-            print(f"\n=== SHACL check ===\nShapes: {shapes_path}\nData  : {ttl}\nConforms: {conforms}\n")
-            if not conforms:
-                print(results_text)
-                had_error = True
+    pairs = [(shapes_path, ttl) for shapes_path in shape_ttls for ttl in ont_ttls]
+    skipped = []
+    if not args.no_prune:
+        pairs, skipped = prune_pairs(pairs, shape_ttls, ont_ttls)
+
+    for shapes_path, ttl in skipped:
+        print(f"\n=== SHACL check ===\nShapes: {shapes_path}\nData  : {ttl}\nConforms: n/a (not applicable: no focus node can match)\n")
+    for shapes_path, ttl, conforms, results_text in run_matrix(pairs, args.jobs, "rdfs" if args.rdfs_inference else "closure"):
+        print(f"\n=== SHACL check ===\nShapes: {shapes_path}\nData  : {ttl}\nConforms: {conforms}\n")
+        if not conforms:
+            print(results_text)
+            had_error = True
     return 1 if had_error else 0
 
 if __name__ == "__main__":
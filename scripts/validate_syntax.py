@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Check RDF syntax of every registry artifact in one process pool.
+
+- Parses every *.ttl, *.jsonld, *.rdf.xml and *.nt under the dataspaces and reports
+  each syntax error as "path:line: message" (all of them, not just the first).
+- Checks that each derived .jsonld / .rdf.xml / .nt holds exactly the same triples
+  (up to blank-node renaming) as the .ttl it was serialized from.
+- JSON-LD contexts referenced by URL under W3ID_BASE are read from the files
+  on disk (see jsonld_context.py), so documents validate before they are
+  published and without network access.
+
+Replaces the per-file `docker run stain/jena riot --validate` calls: one
+Python process pool instead of one container start per file. Files are
+grouped per source .ttl, so each TTL is parsed once (through the graph cache)
+and compared against all of its serializations in the same worker.
+
+Runs incrementally: groups that passed are recorded in
+.registry-cache/syntax-checks.json with the hashes of their files (from the
+registry manifest) and of the contexts their JSON-LD references, and are not
+parsed again until one of those changes. Groups with errors are always
+re-checked. Use --force to check everything.
+
+Usage:
+  python scripts/validate_syntax.py                 # syntax + round-trip
+  python scripts/validate_syntax.py --no-roundtrip  # syntax only
+  python scripts/validate_syntax.py --ttl-only      # .ttl sources only (before serializing)
+  python scripts/validate_syntax.py --force         # ignore the results of earlier runs
+"""
+import os, sys, json, argparse, pathlib
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax import SAXParseException
+import rdflib
+from rdflib import Graph
+from rdflib.compare import isomorphic
+from rdflib.plugins.parsers.jsonld import to_rdf
+
+import graph_cache
+import instrument
+import jsonld_context
+import registry_manifest
+from buildcache import CACHE_DIR, settings_hash, load_json, save_json
+
+REPO_ROOT = pathlib.Path(".").resolve()
+
+CHECKS_PATH = CACHE_DIR / "syntax-checks.json"
+CHECKS_VERSION = 1
+
+# Checked suffix -> rdflib parser name (longest suffix first)
+FORMATS = [(".rdf.xml", "xml"), (".ttl", "turtle"), (".jsonld", "json-ld"), (".nt", "nt")]
+DERIVED = [".jsonld", ".rdf.xml", ".nt"]
+
+def rdf_format(path: str):
+    for suffix, fmt in FORMATS:
+        if path.endswith(suffix):
+            return fmt
+    return None
+
+def error_location(e: Exception):
+    """(line or None, message) for the parser errors rdflib surfaces."""
+    if isinstance(e, SyntaxError) and hasattr(e, "lines"):  # Turtle/N3 BadSyntax, 0-based
+        return e.lines + 1, getattr(e, "_why", None) or str(e).splitlines()[-1]
+    if isinstance(e, json.JSONDecodeError):
+        return e.lineno, e.msg
+    if isinstance(e, SAXParseException):
+        return e.getLineNumber(), e.getMessage()
+    return None, f"{type(e).__name__}: {e}"
+
+def parse(path: str, fmt: str):
+    """(graph, None) or (None, "path:line: message")."""
+    try:
+        if fmt == "turtle":
+            return graph_cache.load_graph(REPO_ROOT / path, format=fmt), None
+        with instrument.span("parse", file=path) as s:
+            if fmt == "json-ld":
+                doc = json.loads((REPO_ROOT / path).read_text(encoding="utf-8"))
+                g = Graph()
+                to_rdf(jsonld_context.inline_contexts(doc, REPO_ROOT), g, base=(REPO_ROOT / path).as_uri())
+            else:
+                g = Graph().parse((REPO_ROOT / path).as_posix(), format=fmt)
+            s.count("triples_parsed", len(g))
+        return g, None
+    except Exception as e:
+        line, msg = error_location(e)
+        return None, f"{path}:{line}: {msg}" if line else f"{path}: {msg}"
+
+def check_group(task):
+    """
+    Validate one source and its derived serializations.
+
+    task = (source or None, [derived paths], roundtrip)
+    Returns a list of error strings.
+    """
+    source, derived, roundtrip = task
+    with instrument.span("check_syntax", file=source or derived[0], derived=len(derived)):
+        return _check_group(source, derived, roundtrip)
+
+def _check_group(source, derived, roundtrip):
+    errors = []
+    src_graph = None
+    if source:
+        src_graph, err = parse(source, "turtle")
+        if err:
+            errors.append(err)
+    for path in derived:
+        g, err = parse(path, rdf_format(path))
+        if err:
+            errors.append(err)
+        elif roundtrip and src_graph is not None:
+            if len(g) != len(src_graph) or not isomorphic(g, src_graph):
+                errors.append(
+                    f"{path}: does not round-trip to {source} "
+                    f"({len(g)} vs {len(src_graph)} triples); re-run serialize_from_ttl.py"
+                )
+    return errors
+
+def build_tasks(paths, roundtrip: bool):
+    paths = sorted(p for p in paths if rdf_format(p))
+    ttls = {p for p in paths if p.endswith(".ttl")}
+    tasks, claimed = [], set()
+    for ttl in sorted(ttls):
+        base = ttl[:-len(".ttl")]
+        derived = [base + s for s in DERIVED if base + s in paths]
+        claimed.update(derived)
+        tasks.append((ttl, derived, roundtrip))
+    # Serializations without a .ttl next to them: syntax only
+    for p in paths:
+        if p not in ttls and p not in claimed:
+            tasks.append((None, [p], roundtrip))
+    return tasks
+
+def task_digest(task, hashes: dict) -> str:
+    """Fingerprint of everything a group's result depends on."""
+    source, derived, roundtrip = task
+    deps = ([source] if source else []) + list(derived)
+    for path in derived:
+        if path.endswith(".jsonld"):
+            # Contexts a document may reference (see jsonld_context.py)
+            deps.append(path[:-len(".jsonld")] + jsonld_context.CONTEXT_SUFFIX)
+            deps.append(path.split("/", 1)[0] + "/" + jsonld_context.DATASPACE_CONTEXT)
+    settings = {"version": CHECKS_VERSION, "rdflib": rdflib.__version__, "w3id": jsonld_context.W3ID_BASE}
+    return settings_hash([settings, roundtrip] + [[p, hashes.get(p)] for p in deps])
+
+def run(tasks, jobs: int):
+    if jobs <= 1 or len(tasks) <= 1:
+        return [check_group(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+        return list(pool.map(check_group, tasks))
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                    help="worker processes (default: all cores; 1 = in-process)")
+    ap.add_argument("--no-roundtrip", action="store_true",
+                    help="only check syntax, not that derived files match their .ttl")
+    ap.add_argument("--ttl-only", action="store_true",
+                    help="only check the .ttl sources (e.g. before serialization has run)")
+    ap.add_argument("--force", action="store_true",
+                    help="check every file, also those that passed unchanged in an earlier run")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    manifest = registry_manifest.current(REPO_ROOT)
+    paths = {f["path"] for f in manifest["files"]}
+    if args.ttl_only:
+        paths = {p for p in paths if p.endswith(".ttl")}
+    tasks = build_tasks(paths, not args.no_roundtrip)
+    if not tasks:
+        print("No RDF files found; skipping syntax validation.")
+        return 0
+
+    # One record per mode, so the --ttl-only stage and the round-trip stage keep theirs
+    mode = "ttl-only" if args.ttl_only else "syntax" if args.no_roundtrip else "roundtrip"
+    hashes = {f["path"]: f["sha256"] for f in manifest["files"]}
+    digests = [task_digest(t, hashes) for t in tasks]
+    checks = load_json(CHECKS_PATH, {})
+    if checks.get("version") != CHECKS_VERSION:
+        checks = {"version": CHECKS_VERSION, "modes": {}}
+    passed = set() if args.force else set(checks["modes"].get(mode, []))
+    pending = [i for i, d in enumerate(digests) if d not in passed]
+
+    results = dict(zip(pending, run([tasks[i] for i in pending], args.jobs)))  # task index -> errors
+    errors = [e for i in pending for e in results[i]]
+    checks["modes"][mode] = sorted(d for i, d in enumerate(digests) if not results.get(i))
+    save_json(CHECKS_PATH, checks)
+
+    checked = sum((1 if t[0] else 0) + len(t[1]) for t in tasks)
+    skipped = sum((1 if t[0] else 0) + len(t[1]) for i, t in enumerate(tasks) if i not in results)
+    for e in errors:
+        print(e, file=sys.stderr)
+    if errors:
+        print(f"\n{len(errors)} problem(s) in {checked} file(s).", file=sys.stderr)
+        return 1
+    print(f"✓ {checked} file(s) are valid" + ("" if args.no_roundtrip else " and round-trip to their .ttl")
+          + (f" ({skipped} unchanged, not re-parsed)." if skipped else "."))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
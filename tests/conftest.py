@@ -0,0 +1,42 @@
+"""
+Shared fixtures. The build scripts are imported from scripts/ as the stages
+import each other, and run with a scratch registry as the working directory.
+"""
+import os, sys, shutil, pathlib, tempfile
+import pytest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+# Set before any script is imported: build state of the tests never touches
+# the repo's .registry-cache
+CACHE_DIR = pathlib.Path(tempfile.mkdtemp(prefix="registry-test-cache-"))
+os.environ["REGISTRY_CACHE_DIR"] = str(CACHE_DIR)
+
+class Registry:
+    """A registry tree under a temporary directory, which is also the cwd."""
+
+    def __init__(self, root: pathlib.Path):
+        self.root = root
+
+    def write(self, rel: str, text: str) -> pathlib.Path:
+        path = self.root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    def read(self, rel: str) -> str:
+        return (self.root / rel).read_text(encoding="utf-8")
+
+    def exists(self, rel: str) -> bool:
+        return (self.root / rel).exists()
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    CACHE_DIR.mkdir()
+    monkeypatch.chdir(tmp_path)
+    import registry_manifest
+    registry_manifest.invalidate()
+    yield Registry(tmp_path)
+    registry_manifest.invalidate()
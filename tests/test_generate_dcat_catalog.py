@@ -0,0 +1,35 @@
+import os, subprocess
+
+# Read when the module is imported
+os.environ.setdefault("PAGES_BASE_URL", "https://example.org/registry")
+os.environ.setdefault("RAW_BASE_URL", "https://example.org/raw")
+import generate_dcat_catalog
+
+def git(cwd, *args, date="2024-01-01T00:00:00Z"):
+    env = dict(os.environ, GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date)
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@example.org", *args],
+                   cwd=cwd, env=env, check=True, capture_output=True)
+
+def test_shallow_clone_falls_back_to_source_date_epoch(tmp_path, monkeypatch, capsys):
+    origin = tmp_path / "origin"
+    (origin / "tems" / "shapes").mkdir(parents=True)
+    git(origin, "init", "-q")
+    (origin / "tems" / "shapes" / "a.ttl").write_text("# a\n")
+    git(origin, "add", ".")
+    git(origin, "commit", "-qm", "shapes")
+    (origin / "README").write_text("later\n")
+    git(origin, "add", ".")
+    git(origin, "commit", "-qm", "unrelated", date="2025-06-01T00:00:00Z")
+
+    monkeypatch.setattr(generate_dcat_catalog, "ROOT", origin)
+    generate_dcat_catalog.shallow_clone.cache_clear()
+    assert generate_dcat_catalog.source_time("tems/shapes") == "2024-01-01T00:00:00Z"
+
+    shallow = tmp_path / "shallow"
+    git(tmp_path, "clone", "-q", "--depth", "1", origin.as_uri(), str(shallow))
+    monkeypatch.setattr(generate_dcat_catalog, "ROOT", shallow)
+    generate_dcat_catalog.shallow_clone.cache_clear()
+    # Not the date of the one fetched commit, which would move with every push
+    assert generate_dcat_catalog.source_time("tems/shapes") is None
+    assert "shallow git clone" in capsys.readouterr().err
+    generate_dcat_catalog.shallow_clone.cache_clear()
@@ -0,0 +1,60 @@
+import json
+
+import generate_search_index as gsi
+
+def catalog(*datasets):
+    body = "".join(f"""
+ex:{name} a schema:Dataset ; schema:name "{title}" ; schema:identifier "{name}" ;
+    schema:url <https://{host}/{name}> ;
+    schema:additionalType <https://example.org/types#{kind}> .
+""" for name, title, host, kind in datasets)
+    return "@prefix schema: <http://schema.org/> .\n@prefix ex: <https://example.org/ds/> .\n" + body
+
+OLD = catalog(("afp1", "AFP fact check", "afp.com", "News"))
+NEW = catalog(("afp1", "AFP fact check", "afp.com", "News"),
+              ("afp2", "AFP photos", "afp.com", "Image"),
+              ("bbc1", "BBC archive", "bbc.co.uk", "News"))
+
+def build(registry, monkeypatch, per_shard=2):
+    monkeypatch.setattr(gsi, "REPO_ROOT", registry.root)
+    monkeypatch.setattr(gsi, "OUT_DIR", registry.root / "docs" / "search")
+    monkeypatch.setattr(gsi, "DOCS_PER_SHARD", per_shard)
+    registry.write("tems/indexes/media/1.0.0/media.ttl", OLD)
+    registry.write("tems/indexes/media/2.0.0/media.ttl", NEW)
+    assert gsi.main([]) == 0
+    out = gsi.OUT_DIR
+    return lambda rel: json.loads((out / rel).read_text(encoding="utf-8"))
+
+def test_shard_layout_and_meta(registry, monkeypatch):
+    fetch = build(registry, monkeypatch)
+    meta = fetch("meta.json")
+    assert meta["documents"] == 4 and meta["docsPerShard"] == 2 and meta["termKeyLength"] == 2
+    assert meta["facets"]["latest"] == {"false": 1, "true": 3}
+    assert meta["facets"]["provider"] == {"afp.com": 3, "bbc.co.uk": 1}
+    files = sorted(p.relative_to(gsi.OUT_DIR).as_posix() for p in gsi.OUT_DIR.rglob("*.json"))
+    assert files == sorted(["meta.json", "docs/0.json", "docs/1.json"]
+                           + [f"facets/{f}.json" for f in gsi.FACETS]
+                           + [f"terms/{k}.json" for k in meta["termShards"]])
+    # Each token lives in the shard named by its first two characters
+    for key in meta["termShards"]:
+        assert all(token[:2] == key for token in fetch(f"terms/{key}.json"))
+    assert sum(len(fetch(f"docs/{n}.json")) for n in (0, 1)) == 4
+
+def test_reference_query(registry, monkeypatch):
+    fetch = build(registry, monkeypatch)
+    total, docs = gsi.query(fetch, "afp")
+    assert total == 3
+    total, docs = gsi.query(fetch, "afp f", {"latest": "true"})
+    assert total == 1 and docs[0]["version"] == "2.0.0" and docs[0]["name"] == ["AFP fact check"]
+    total, docs = gsi.query(fetch, "", {"additionalType": "https://example.org/types#News", "provider": ["bbc.co.uk"]})
+    assert [d["identifier"] for d in docs] == [["bbc1"]]
+
+def test_unchanged_files_are_not_rewritten(registry, monkeypatch, capsys):
+    build(registry, monkeypatch)
+    assert gsi.main([]) == 0
+    assert "(0 written, 0 removed)" in capsys.readouterr().out.splitlines()[-1]
+    # A smaller index drops the shards it no longer needs
+    monkeypatch.setattr(gsi, "DOCS_PER_SHARD", 10)
+    assert gsi.main([]) == 0
+    assert "1 removed" in capsys.readouterr().out
+    assert not (gsi.OUT_DIR / "docs" / "1.json").exists()
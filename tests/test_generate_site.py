@@ -0,0 +1,38 @@
+import pytest
+
+import generate_site
+
+@pytest.fixture
+def site(registry, monkeypatch):
+    monkeypatch.setattr(generate_site, "REPO_ROOT", registry.root)
+    monkeypatch.setattr(generate_site, "SITE_ROOT", registry.root / "public")
+    registry.write("tems/ontologies/core/0.1.0/core.ttl", "<https://example.org/a> a <https://example.org/B> .\n")
+    return registry
+
+def build(registry, capsys):
+    import registry_manifest
+    registry_manifest.invalidate()
+    capsys.readouterr()
+    assert generate_site.main([]) == 0
+    return capsys.readouterr().out
+
+def test_second_build_changes_nothing(site, capsys):
+    build(site, capsys)
+    assert site.exists("public/tems/ontologies/core/0.1.0/core.ttl.gz")
+    assert "Site: 0 changed, 0 removed" in build(site, capsys)
+
+def test_missing_compressed_sibling_is_rebuilt(site, capsys, monkeypatch):
+    build(site, capsys)
+    (site.root / "public/tems/ontologies/core/0.1.0/core.ttl.gz").unlink()
+    build(site, capsys)
+    assert site.exists("public/tems/ontologies/core/0.1.0/core.ttl.gz")
+
+@pytest.mark.skipif(generate_site.brotli is None, reason="brotli not installed")
+def test_brotli_installed_after_first_build(site, capsys, monkeypatch):
+    brotli = generate_site.brotli
+    monkeypatch.setattr(generate_site, "brotli", None)
+    build(site, capsys)
+    assert not site.exists("public/tems/ontologies/core/0.1.0/core.ttl.br")
+    monkeypatch.setattr(generate_site, "brotli", brotli)
+    build(site, capsys)
+    assert site.exists("public/tems/ontologies/core/0.1.0/core.ttl.br")
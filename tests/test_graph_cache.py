@@ -0,0 +1,48 @@
+import pickle, struct
+from rdflib import Graph
+from rdflib.compare import isomorphic
+
+import graph_cache
+
+TTL = """\
+@prefix ex: <https://example.org/> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+
+ex:a ex:label "plain", "tagged"@en, "7"^^xsd:integer ;
+     ex:comment \"\"\"two
+lines\"\"\" ;
+     ex:node [ ex:value "nested" ] .
+"""
+
+def test_encode_decode_round_trip():
+    g = Graph().parse(data=TTL, format="turtle")
+    decoded = graph_cache.decode_graph(graph_cache.encode_graph(g))
+    assert isomorphic(g, decoded)
+    assert dict(decoded.namespaces())["ex"] == g.namespace_manager.store.namespace("ex")
+
+def test_second_load_is_a_cache_hit(registry):
+    source = registry.write("data.ttl", TTL)
+    digest = graph_cache.file_sha256(source)
+    first = graph_cache.load_graph(source)
+    assert graph_cache.cache_path(digest).is_file()
+    # Same digest, different bytes on disk: only the cache can answer
+    source.write_text("not turtle", encoding="utf-8")
+    assert isomorphic(graph_cache.load_graph(source, digest), first)
+
+def test_key_covers_rdflib_version_and_parser(monkeypatch):
+    turtle = graph_cache.cache_path("0" * 64, "turtle")
+    assert graph_cache.cache_path("0" * 64, "nt") != turtle
+    monkeypatch.setattr(graph_cache.rdflib, "__version__", "0.0.0")
+    assert graph_cache.cache_path("0" * 64, "turtle") != turtle
+
+def test_pickled_or_corrupt_entries_are_misses(registry):
+    source = registry.write("data.ttl", TTL)
+    digest = graph_cache.file_sha256(source)
+    path = graph_cache.cache_path(digest)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header = pickle.dumps(([], []))
+    for blob in (graph_cache.MAGIC + struct.pack("<I", len(header)) + header,
+                 graph_cache.MAGIC + b"\xff\xff",
+                 b"RGC1" + b"\x00" * 8):
+        path.write_bytes(blob)
+        assert len(graph_cache.load_graph(source, digest)) == 6
@@ -0,0 +1,44 @@
+import os, json
+
+import instrument
+
+def trace(tmp_path, monkeypatch, fmt):
+    path = tmp_path / f"trace.{fmt}.json"
+    monkeypatch.setattr(instrument, "TRACE_PATH", str(path))
+    monkeypatch.setattr(instrument, "TRACE_FORMAT", fmt)
+    monkeypatch.setattr(instrument, "_spans", [])
+    monkeypatch.setenv(instrument._OWNER_ENV, str(os.getpid()))
+    with instrument.span("serialize", "stage", argv="--force") as outer:
+        with instrument.span("write_policy", "phase", file="media.ttl") as inner:
+            inner.count("rules", 3)
+        outer.count("files")
+    instrument.write_trace()
+    return path, json.loads(path.read_text(encoding="utf-8"))
+
+def test_json_trace_of_nested_spans(tmp_path, monkeypatch):
+    _, data = trace(tmp_path, monkeypatch, "json")
+    assert data["version"] == instrument.TRACE_VERSION
+    outer, inner = data["spans"]
+    assert (outer["name"], inner["name"]) == ("serialize", "write_policy")
+    assert inner["parent"] == "serialize" and "parent" not in outer
+    assert inner["args"] == {"file": "media.ttl"} and inner["counts"] == {"rules": 3}
+    assert outer["start_us"] <= inner["start_us"] and inner["wall_s"] <= outer["wall_s"]
+    # The process peak is the same figure for both; growth is the span's own
+    assert outer["process_peak_rss_mb"] >= inner["process_peak_rss_mb"] > 0
+    assert outer["rss_growth_mb"] >= inner["rss_growth_mb"] >= 0
+    assert data["totals"]["write_policy"]["counts"] == {"rules": 3}
+
+def test_chrome_trace_of_nested_spans(tmp_path, monkeypatch, capsys):
+    path, data = trace(tmp_path, monkeypatch, "chrome")
+    outer, inner = data["traceEvents"]
+    assert outer["ph"] == inner["ph"] == "X"
+    # The inner event sits inside the outer one on the same thread
+    assert (outer["pid"], outer["tid"]) == (inner["pid"], inner["tid"])
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"] + 1
+    assert inner["args"]["rules"] == 3 and inner["args"]["file"] == "media.ttl"
+    assert set(instrument.MEASURES) <= set(inner["args"])
+    spans = instrument.load_trace(path)
+    assert [s["name"] for s in spans] == ["serialize", "write_policy"]
+    assert spans[1]["args"] == {"file": "media.ttl", "rules": 3}
+    assert instrument.main([str(path)]) == 0
+    assert "write_policy" in capsys.readouterr().out
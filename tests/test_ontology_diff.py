@@ -0,0 +1,92 @@
+import subprocess
+import pytest
+from rdflib import Graph
+
+import ontology_diff
+import registry_manifest
+
+BASE = """\
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <https://example.org/core#> .
+
+<https://example.org/core> a owl:Ontology ; owl:versionInfo "1.0.0" .
+ex:Thing a owl:Class ; rdfs:label "Thing" .
+ex:Part a owl:Class ; rdfs:subClassOf ex:Thing .
+ex:name a owl:DatatypeProperty ; rdfs:domain ex:Thing .
+"""
+
+def graph(text):
+    return Graph().parse(data=text, format="turtle")
+
+@pytest.mark.parametrize("new, bump", [
+    (BASE, "none"),
+    (BASE.replace('"1.0.0"', '"1.0.1"'), "patch"),
+    (BASE.replace('rdfs:label "Thing"', 'rdfs:label "A thing"'), "patch"),
+    (BASE + "ex:Other a owl:Class .\n", "minor"),
+    (BASE + "ex:name rdfs:range ex:Thing .\n", "minor"),
+    (BASE.replace("ex:Part a owl:Class ; rdfs:subClassOf ex:Thing .\n", ""), "major"),
+    (BASE.replace(" ; rdfs:domain ex:Thing", ""), "major"),
+    (BASE + "ex:Part rdfs:subClassOf [ a owl:Restriction ; owl:onProperty ex:name ; owl:minCardinality 1 ] .\n",
+     "minor"),
+])
+def test_bump_classification(new, bump):
+    assert ontology_diff.diff_graphs(graph(BASE), graph(new))["bump"] == bump
+
+def test_changelog_lists_terms():
+    body = ontology_diff.diff_graphs(graph(BASE), graph(BASE.replace("ex:Part a owl:Class ; rdfs:subClassOf ex:Thing .\n",
+                                                                     "ex:Piece a owl:Class .\n")))
+    assert body["terms"]["removed"] == ["https://example.org/core#Part"]
+    assert body["terms"]["added"] == ["https://example.org/core#Piece"]
+
+# ---- --base-ref ----
+
+@pytest.fixture
+def repo(registry, monkeypatch):
+    monkeypatch.setattr(ontology_diff, "REPO_ROOT", registry.root)
+    def git(*args):
+        subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.org", *args],
+                       cwd=registry.root, check=True, capture_output=True)
+    git("init", "-q")
+    registry.write("tems/ontologies/core/1.0.0/core.ttl", BASE)
+    registry.write("tems/ontologies/extra/1.0.0/extra.ttl", BASE)
+    git("add", "-A")
+    git("commit", "-qm", "base")
+    git("tag", "v1")
+    return registry
+
+def bump_since(ref="v1"):
+    registry_manifest.invalidate()
+    results = ontology_diff.diff_against_ref(registry_manifest.current(), ref)
+    return ontology_diff.max_bump(r["bump"] for r in results), results
+
+def test_unchanged_tree(repo):
+    assert bump_since() == ("none", [])
+
+def test_new_version_is_diffed_against_the_newest_at_the_ref(repo):
+    repo.write("tems/ontologies/core/1.1.0/core.ttl", BASE + "ex:Other a owl:Class .\n")
+    bump, results = bump_since()
+    assert bump == "minor"
+    assert results[0]["base"] == "v1:tems/ontologies/core/1.0.0/core.ttl"
+
+def test_removed_ontology_is_major(repo):
+    (repo.root / "tems/ontologies/extra/1.0.0/extra.ttl").unlink()
+    bump, results = bump_since()
+    assert bump == "major"
+    assert results == [{"path": "tems/ontologies/extra/1.0.0/extra.ttl",
+                        "base": "v1:tems/ontologies/extra/1.0.0/extra.ttl",
+                        "bump": "major", "summary": {"removedOntology": True}}]
+
+def test_removed_version_is_major(repo):
+    repo.write("tems/ontologies/core/2.0.0/core.ttl", BASE)
+    (repo.root / "tems/ontologies/core/1.0.0/core.ttl").unlink()
+    bump, results = bump_since()
+    assert bump == "major"
+    assert {"removedVersion": True} in [r["summary"] for r in results]
+
+def test_whole_dataspace_removed(repo):
+    import shutil
+    shutil.rmtree(repo.root / "tems")
+    repo.write("tamis/ontologies/core/1.0.0/core.ttl", BASE)
+    bump, results = bump_since()
+    assert bump == "major" and len([r for r in results if r["bump"] == "major"]) == 2
@@ -0,0 +1,133 @@
+import io, json
+import pytest
+from rdflib import Graph
+
+import policy_engine
+
+POLICIES = """\
+@prefix odrl: <http://www.w3.org/ns/odrl/2/> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+@prefix tems: <https://w3id.org/tems/core#> .
+@prefix ex: <https://example.org/> .
+
+ex:media a odrl:Set ;
+    odrl:permission [
+        odrl:target tems:MediaObject ; odrl:action odrl:use ;
+        odrl:constraint [ odrl:leftOperand odrl:spatial ; odrl:operator odrl:eq ; odrl:rightOperand "EU" ] ;
+        odrl:duty [ odrl:action odrl:attribute ]
+    ] ;
+    odrl:prohibition [
+        odrl:target tems:MediaObject ; odrl:action odrl:distribute ;
+        odrl:constraint [ odrl:leftOperand odrl:count ; odrl:operator odrl:gt ; odrl:rightOperand "10"^^xsd:integer ]
+    ] .
+
+ex:lenient a odrl:Policy, odrl:Set, odrl:Offer ;
+    odrl:conflict odrl:perm ;
+    odrl:target ex:open ;
+    odrl:permission [ odrl:action odrl:read ] ;
+    odrl:prohibition [ odrl:action odrl:read ;
+        odrl:constraint [ odrl:leftOperand odrl:purpose ; odrl:operator odrl:eq ; odrl:rightOperand "ads" ] ] .
+"""
+
+TEMS = "https://w3id.org/tems/core#MediaObject"
+ODRL = "http://www.w3.org/ns/odrl/2/"
+
+@pytest.fixture(scope="module")
+def engine():
+    g = Graph().parse(data=POLICIES, format="turtle")
+    return policy_engine.PolicyEngine([policy_engine.compile_policies(g)])
+
+@pytest.mark.parametrize("request_, decision", [
+    ({"target": TEMS, "action": ODRL + "use", "context": {"spatial": "EU"}}, "Permit"),
+    # odrl:play is included in odrl:use
+    ({"target": ["https://example.org/item", TEMS], "action": ODRL + "play", "context": {"spatial": "EU"}}, "Permit"),
+    ({"target": TEMS, "action": ODRL + "use", "context": {"spatial": "US"}}, "NotApplicable"),
+    ({"target": TEMS, "action": ODRL + "use", "context": {}}, "NotApplicable"),
+    ({"target": TEMS, "action": ODRL + "distribute", "context": {"spatial": "EU", ODRL + "count": 11}}, "Deny"),
+    ({"target": TEMS, "action": ODRL + "distribute", "context": {"spatial": "EU", "count": 3}}, "Permit"),
+    # odrl:conflict odrl:perm: the satisfied permission wins over the prohibition
+    ({"target": "https://example.org/open", "action": ODRL + "read", "context": {"purpose": "ads"}}, "Permit"),
+    ({"target": "https://example.org/other", "action": ODRL + "read"}, "NotApplicable"),
+])
+def test_evaluate(engine, request_, decision):
+    assert engine.evaluate(request_)["decision"] == decision
+
+def test_duties_of_permits(engine):
+    result = engine.evaluate({"target": TEMS, "action": ODRL + "use", "context": {"spatial": "EU"}})
+    assert result["duties"] == [{"action": [ODRL + "attribute"], "target": []}]
+
+def test_batch_matches_single_evaluation(engine):
+    requests = [{"target": TEMS, "action": ODRL + a, "context": {"spatial": s, "count": c}}
+                for a in ("use", "distribute", "play") for s in ("EU", "US") for c in (1, 20)]
+    assert engine.evaluate_batch(requests) == [engine.evaluate(r) for r in requests]
+
+def test_policy_type_is_deterministic():
+    g = Graph().parse(data=POLICIES, format="turtle")
+    compiled = policy_engine.compile_policies(g)
+    assert compiled["policies"]["https://example.org/lenient"]["type"] == "Offer"
+    assert compiled["policies"]["https://example.org/media"]["type"] == "Set"
+    # Same bytes whatever order the store returns triples in
+    reparsed = Graph().parse(data=g.serialize(format="nt"), format="nt")
+    assert json.dumps(policy_engine.compile_policies(reparsed), sort_keys=True) == json.dumps(compiled, sort_keys=True)
+
+def test_cli_reports_malformed_lines(registry, monkeypatch, capsys):
+    policy = registry.write("tems/policies/media/1.0.0/media.ttl", POLICIES)
+    lines = [json.dumps({"id": "a", "target": TEMS, "action": ODRL + "use", "context": {"spatial": "EU"}}),
+             "{not json", "[1, 2]",
+             json.dumps({"id": "b", "target": TEMS, "action": ODRL + "use"})]
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(lines) + "\n"))
+    assert policy_engine.main(["--policy", str(policy)]) == 1
+    out = [json.loads(l) for l in capsys.readouterr().out.splitlines()]
+    assert [(r["id"], r["decision"]) for r in out] == [
+        ("a", "Permit"), (None, "Indeterminate"), (None, "Indeterminate"), ("b", "NotApplicable")]
+    assert out[1]["line"] == 2 and "JSONDecodeError" in out[1]["error"]
+    assert out[2]["line"] == 3 and "JSON object" in out[2]["error"]
+
+PREFIXES = """\
+@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .
+@prefix odrl: <http://www.w3.org/ns/odrl/2/> .
+@prefix ex: <https://example.org/> .
+"""
+
+def compile_ttl(ttl):
+    return policy_engine.compile_policies(Graph().parse(data=PREFIXES + ttl, format="turtle"))
+
+def test_refined_action_does_not_permit_other_actions():
+    compiled = compile_ttl("""\
+ex:refined a odrl:Set ;
+    odrl:permission [ odrl:target ex:doc ;
+        odrl:action [ rdf:value odrl:print ;
+            odrl:refinement [ odrl:leftOperand odrl:count ; odrl:operator odrl:lteq ; odrl:rightOperand 5 ] ] ] .
+""")
+    engine = policy_engine.PolicyEngine([compiled])
+    doc = "https://example.org/doc"
+    assert engine.evaluate({"target": doc, "action": ODRL + "print", "context": {"count": 3}})["decision"] == "Permit"
+    assert engine.evaluate({"target": doc, "action": ODRL + "print", "context": {"count": 9}})["decision"] == "NotApplicable"
+    assert engine.evaluate({"target": doc, "action": ODRL + "delete", "context": {"count": 3}})["decision"] == "NotApplicable"
+    assert compiled["warnings"] == []
+
+def test_asset_collection_target_is_not_a_wildcard():
+    compiled = compile_ttl("""\
+ex:collection a odrl:Set ;
+    odrl:permission [ odrl:target [ a odrl:AssetCollection ; odrl:source ex:folder ] ; odrl:action odrl:read ] ;
+    odrl:prohibition [ odrl:target [ a odrl:AssetCollection ; odrl:source ex:folder ] ; odrl:action odrl:delete ] .
+""")
+    engine = policy_engine.PolicyEngine([compiled])
+    # The permission is dropped; the prohibition is widened, so it can only deny more
+    assert engine.evaluate({"target": "https://example.org/anything", "action": ODRL + "read"})["decision"] == "NotApplicable"
+    assert engine.evaluate({"target": "https://example.org/anything", "action": ODRL + "delete"})["decision"] == "Deny"
+    assert compiled["warnings"] == [
+        "https://example.org/collection: permission dropped, unsupported odrl:target [a odrl:AssetCollection]",
+        "https://example.org/collection: prohibition applies to every target, unsupported odrl:target [a odrl:AssetCollection]",
+    ]
+
+def test_invalid_conflict_is_indeterminate():
+    engine = policy_engine.PolicyEngine([compile_ttl("""\
+ex:void a odrl:Set ;
+    odrl:conflict odrl:invalid ;
+    odrl:target ex:doc ;
+    odrl:permission [ odrl:action odrl:read ] ;
+    odrl:prohibition [ odrl:action odrl:read ] .
+""")])
+    result = engine.evaluate({"target": "https://example.org/doc", "action": ODRL + "read"})
+    assert result["decision"] == "Indeterminate" and len(result["rules"]) == 2
@@ -0,0 +1,57 @@
+import sys, types, threading
+import pytest
+
+import registry
+
+@pytest.fixture
+def stages(monkeypatch):
+    """Replace the pipeline with fake stage modules; returns the order they ran in."""
+    import graph_cache, multiprocessing
+    monkeypatch.setattr(graph_cache, "_shared", graph_cache._shared)
+    monkeypatch.setattr(multiprocessing, "set_start_method", lambda *a, **k: None)
+    monkeypatch.setattr(multiprocessing, "set_forkserver_preload", lambda *a, **k: None)
+    ran = []
+    barrier = threading.Barrier(2, timeout=5)
+
+    def stage(name, code=0, overlap=False):
+        def main(argv):
+            ran.append(name)
+            print(f"{name} start")
+            if overlap:
+                barrier.wait()  # both overlapping stages are running now
+            print(f"{name} end", file=sys.stderr)
+            return code
+        module = types.ModuleType(f"fake_{name}")
+        module.main = main
+        monkeypatch.setitem(sys.modules, module.__name__, module)
+        return module.__name__
+
+    def define(**specs):
+        # name -> (deps, exit code, overlap)
+        monkeypatch.setattr(registry, "STAGES", {
+            name: (stage(name, code, overlap), [], deps, False) for name, (deps, code, overlap) in specs.items()})
+        return ran
+    return define
+
+def test_failed_stage_skips_its_dependents(stages, capsys):
+    ran = stages(a=([], 0, False), b=(["a"], 3, False), c=(["b"], 0, False), d=(["c"], 0, False), e=(["a"], 0, False))
+    assert registry.run_all(list(registry.STAGES), 1) == 1
+    assert sorted(ran) == ["a", "b", "e"]
+    out = capsys.readouterr().out
+    assert "--- b" in out and "FAILED (exit 3)" in out
+    assert "--- c: skipped (upstream failure)" in out and "--- d: skipped (upstream failure)" in out
+    assert "FAILED: b, c, d in" in out
+
+def test_skipped_stage_does_not_block_dependents(stages, capsys):
+    ran = stages(a=([], 0, False), b=(["a"], 1, False), c=(["b"], 0, False))
+    assert registry.main(["all", "--skip", "b", "--parallel", "1"]) == 0
+    assert ran == ["a", "c"]
+    assert "All stages passed" in capsys.readouterr().out
+
+def test_concurrent_stage_output_is_not_interleaved(stages, capsys):
+    stages(a=([], 0, False), b=(["a"], 0, True), c=(["a"], 0, True))
+    assert registry.run_all(list(registry.STAGES), 2) == 0
+    lines = [l for l in capsys.readouterr().out.splitlines() if l.strip()]
+    for name in ("b", "c"):
+        i = next(n for n, l in enumerate(lines) if l.startswith(f"--- {name} ("))
+        assert lines[i + 1:i + 3] == [f"{name} start", f"{name} end"]
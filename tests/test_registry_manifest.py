@@ -0,0 +1,30 @@
+import registry_manifest
+
+def test_dataspaces_and_sections(registry):
+    registry.write("tems/ontologies/core/0.1.0/core.ttl", "")
+    registry.write("tems/shapes/media/1.0.0/media.ttl", "")
+    registry.write("tems/README.md", "")
+    registry.write("tamis/policies/media/0.1.0/media.ttl", "")
+    m = registry_manifest.scan(registry.root)
+    assert m["dataspaces"] == {"tamis": ["policies"], "tems": ["ontologies", "shapes"]}
+    readme = next(f for f in m["files"] if f["path"] == "tems/README.md")
+    assert readme["section"] is None and readme["version"] is None
+
+def test_trees_without_versioned_artifacts_are_never_hashed(registry, monkeypatch):
+    registry.write("tems/ontologies/core/0.1.0/core.ttl", "")
+    registry.write("venv/lib/python3.11/site-packages/rdflib/__init__.py", "")
+    registry.write("notes/drafts/todo.txt", "")
+    hashed = []
+    real = registry_manifest.file_sha256
+    monkeypatch.setattr(registry_manifest, "file_sha256", lambda p: hashed.append(p) or real(p))
+    m = registry_manifest.scan(registry.root)
+    assert list(m["dataspaces"]) == ["tems"]
+    assert [f["path"] for f in m["files"]] == ["tems/ontologies/core/0.1.0/core.ttl"]
+    assert len(hashed) == 1
+
+def test_rescan_reuses_hashes_of_unchanged_files(registry, monkeypatch):
+    registry.write("tems/ontologies/core/0.1.0/core.ttl", "a")
+    first = registry_manifest.scan(registry.root)
+    monkeypatch.setattr(registry_manifest, "file_sha256", lambda p: "rehashed")
+    again = registry_manifest.scan(registry.root, first)
+    assert again["files"][0]["sha256"] == first["files"][0]["sha256"]
@@ -0,0 +1,119 @@
+import gzip, json, asyncio
+import pytest
+
+import resolver_server
+
+TTL = """\
+@prefix ex: <https://example.org/> .
+ex:a ex:label "A" .
+""" + "".join(f'ex:a ex:n{i} "{i}" .\n' for i in range(40))
+
+@pytest.fixture
+def resolver(registry):
+    registry.write("tems/ontologies/core/1.0.0/core.ttl", TTL)
+    registry.write("tems/ontologies/core/1.0.0/core.jsonld", json.dumps({"@id": "https://example.org/a"}))
+    return resolver_server.Resolver(registry.root, 1 << 20, "no-cache")
+
+def get(resolver, target, **headers):
+    headers = {k.replace("_", "-"): v for k, v in headers.items()}
+    return asyncio.run(resolver.respond("GET", target, headers))
+
+@pytest.mark.parametrize("accept, ctype", [
+    ("", "text/turtle; charset=utf-8"),
+    ("application/ld+json", "application/ld+json"),
+    ("application/rdf+xml;q=0.9, text/turtle;q=0.1", "application/rdf+xml"),
+    ("application/*", "application/ld+json"),
+    ("application/json", "application/ld+json"),
+])
+def test_content_negotiation(resolver, accept, ctype):
+    status, headers, body = get(resolver, "/tems/ontologies/core/1.0.0/core", accept=accept)
+    assert status == 200 and headers["Content-Type"] == ctype and body
+    assert headers["Vary"] == "Accept, Accept-Encoding"
+
+def test_version_folder_and_w3id_target(resolver):
+    assert get(resolver, "/tems/ontologies/core/1.0.0/")[0] == 200
+    assert get(resolver, "https://w3id.org/tems/ontologies/core/1.0.0/core")[0] == 200
+
+def test_not_acceptable_and_not_found(resolver):
+    assert get(resolver, "/tems/ontologies/core/1.0.0/core", accept="image/png")[0] == 406
+    assert get(resolver, "/tems/ontologies/core/2.0.0/core")[0] == 404
+    assert get(resolver, "/tems/../../etc/passwd")[0] == 404
+    assert get(resolver, "/.registry-cache/manifest.json")[0] == 404
+
+def test_etag_is_per_encoding(resolver):
+    target = "/tems/ontologies/core/1.0.0/core.ttl"
+    _, identity, body = get(resolver, target)
+    status, gzipped, packed = get(resolver, target, accept_encoding="gzip")
+    assert status == 200 and gzipped["Content-Encoding"] == "gzip"
+    assert gzip.decompress(packed) == body
+    assert identity["ETag"] != gzipped["ETag"]
+    assert gzipped["ETag"] == identity["ETag"][:-1] + '-gzip"'
+
+def test_if_none_match(resolver):
+    target = "/tems/ontologies/core/1.0.0/core.ttl"
+    _, identity, _ = get(resolver, target)
+    _, gzipped, _ = get(resolver, target, accept_encoding="gzip")
+    assert get(resolver, target, if_none_match=identity["ETag"])[0] == 304
+    assert get(resolver, target, if_none_match=f'"other", W/{identity["ETag"]}')[0] == 304
+    assert get(resolver, target, accept_encoding="gzip", if_none_match=gzipped["ETag"])[0] == 304
+    # The identity validator does not validate the gzip representation, nor the other way round
+    assert get(resolver, target, accept_encoding="gzip", if_none_match=identity["ETag"])[0] == 200
+    assert get(resolver, target, if_none_match=gzipped["ETag"])[0] == 200
+
+def test_precompressed_sibling(resolver, registry):
+    registry.write("tems/ontologies/core/1.0.0/core.ttl.br", "brotli bytes")
+    status, headers, body = get(resolver, "/tems/ontologies/core/1.0.0/core.ttl", accept_encoding="gzip, br")
+    assert status == 200 and headers["Content-Encoding"] == "br" and body == b"brotli bytes"
+    assert headers["ETag"].endswith('-br"')
+
+def test_keep_alive_over_a_socket(resolver):
+    async def exchange():
+        server = await asyncio.start_server(resolver.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        statuses = []
+        for _ in range(2):
+            writer.write(b"HEAD /tems/ontologies/core/1.0.0/core HTTP/1.1\r\nHost: x\r\n\r\n")
+            head = await reader.readuntil(b"\r\n\r\n")
+            statuses.append(head.split(b"\r\n", 1)[0])
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return statuses
+    assert asyncio.run(exchange()) == [b"HTTP/1.1 200 OK"] * 2
+
+ONTOLOGY = """\
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <https://w3id.org/tems/example#> .
+
+<https://w3id.org/tems/example> a owl:Ontology .
+ex:Thing a owl:Class ; rdfs:label "Thing" .
+"""
+
+@pytest.mark.parametrize("suffix, accept", [(".jsonld", "application/ld+json"), (".rdf.xml", "application/rdf+xml")])
+def test_generated_body_matches_the_published_file(registry, suffix, accept):
+    import serialize_from_ttl
+    source = "tems/ontologies/example/1.0.0/example.ttl"
+    registry.write(source, ONTOLOGY)
+    assert serialize_from_ttl.main(["--jobs", "1"]) == 0
+    published = registry.root / source.replace(".ttl", suffix)
+    expected = published.read_bytes()
+    assert b"example.context.jsonld" in (registry.root / source.replace(".ttl", ".jsonld")).read_bytes()
+    published.unlink()
+    resolver = resolver_server.Resolver(registry.root, 1 << 20, "no-cache")
+    status, _, body = get(resolver, "/" + source[:-len(".ttl")], accept=accept)
+    assert status == 200 and body == expected
+
+def test_malformed_content_length_is_a_bad_request(resolver):
+    async def exchange():
+        server = await asyncio.start_server(resolver.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /tems/ontologies/core/1.0.0/core HTTP/1.1\r\nHost: x\r\nContent-Length: abc\r\n\r\n")
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+    assert asyncio.run(exchange()).startswith(b"HTTP/1.1 400 Bad Request\r\n")
@@ -0,0 +1,96 @@
+import serialize_from_ttl
+
+ONTOLOGY = """\
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <https://w3id.org/tems/example#> .
+
+<https://w3id.org/tems/example> a owl:Ontology .
+ex:Thing a owl:Class ; rdfs:label "Thing" .
+"""
+
+SOURCE = "tems/ontologies/example/1.0.0/example.ttl"
+
+def run(*argv):
+    return serialize_from_ttl.main(["--jobs", "1", *argv])
+
+def test_serializes_next_to_the_source(registry):
+    registry.write(SOURCE, ONTOLOGY)
+    assert run() == 0
+    for suffix in (".jsonld", ".rdf.xml", ".context.jsonld", ".closure.json", ".terms.json"):
+        assert registry.exists(SOURCE.replace(".ttl", suffix)), suffix
+
+def test_unchanged_sources_are_skipped(registry, capsys):
+    registry.write(SOURCE, ONTOLOGY)
+    run()
+    capsys.readouterr()
+    assert run() == 0
+    assert "1 file(s) unchanged, skipped." in capsys.readouterr().out
+
+def test_changed_source_is_rebuilt(registry, capsys):
+    registry.write(SOURCE, ONTOLOGY)
+    run()
+    registry.write(SOURCE, ONTOLOGY.replace('"Thing"', '"Thing"@en'))
+    capsys.readouterr()
+    assert run() == 0
+    out = capsys.readouterr().out
+    assert "unchanged" not in out
+    assert '"@language": "en"' in registry.read(SOURCE.replace(".ttl", ".jsonld"))
+
+def test_outputs_of_removed_sources_are_deleted(registry):
+    path = registry.write(SOURCE, ONTOLOGY)
+    run()
+    path.unlink()
+    assert run() == 0
+    assert not registry.exists(SOURCE.replace(".ttl", ".jsonld"))
+    assert not registry.exists(SOURCE.replace(".ttl", ".rdf.xml"))
+
+def test_canonical_output_round_trips_and_is_stable(registry):
+    from rdflib import Graph
+    from rdflib.compare import isomorphic
+    registry.write(SOURCE, ONTOLOGY + 'ex:Thing rdfs:comment """first line\nsecond "quoted" line""" .\n')
+    assert run("--canonical") == 0
+    outputs = [SOURCE.replace(".ttl", s) for s in (".jsonld", ".rdf.xml")]
+    first = [registry.read(p) for p in outputs]
+    assert run("--canonical", "--force") == 0
+    assert [registry.read(p) for p in outputs] == first
+    assert "\\nsecond \\\"quoted\\\" line" in first[0]
+    source = Graph().parse(registry.root / SOURCE, format="turtle")
+    assert isomorphic(Graph().parse(registry.root / outputs[1], format="xml"), source)
+
+def test_failures_are_collected(registry, capsys):
+    registry.write(SOURCE, ONTOLOGY)
+    registry.write("tems/shapes/broken/1.0.0/broken.ttl", "this is not turtle")
+    assert run() == 1
+    assert "1 file(s) failed to serialize" in capsys.readouterr().err
+    assert registry.exists(SOURCE.replace(".ttl", ".jsonld"))
+
+def test_missing_outputs_are_rebuilt(registry, capsys):
+    # A fresh checkout with only the build cache restored
+    registry.write(SOURCE, ONTOLOGY)
+    run()
+    (registry.root / SOURCE.replace(".ttl", ".rdf.xml")).unlink()
+    capsys.readouterr()
+    assert run() == 0
+    out = capsys.readouterr().out
+    assert "unchanged" not in out
+    assert registry.exists(SOURCE.replace(".ttl", ".rdf.xml"))
+
+def test_manifest_and_outputs_present_skips(registry, capsys):
+    registry.write(SOURCE, ONTOLOGY)
+    run()
+    jsonld = registry.root / SOURCE.replace(".ttl", ".jsonld")
+    before = jsonld.stat().st_mtime_ns
+    capsys.readouterr()
+    assert run() == 0
+    assert "1 file(s) unchanged, skipped." in capsys.readouterr().out
+    assert jsonld.stat().st_mtime_ns == before
+
+def test_streamed_source_publishes_n_triples(registry):
+    registry.write(SOURCE, ONTOLOGY)
+    assert run("--stream-threshold", "0.000001") == 0
+    assert registry.exists(SOURCE.replace(".ttl", ".nt"))
+    assert not registry.exists(SOURCE.replace(".ttl", ".closure.json"))
+    # Back under the threshold: the .nt goes with the streamed mode
+    assert run() == 0
+    assert not registry.exists(SOURCE.replace(".ttl", ".nt"))
@@ -0,0 +1,90 @@
+import yaml
+from rdflib import Graph
+
+import registry_manifest
+import shacl_to_jsonschema
+from shacl_to_jsonschema import BEGIN, END, compile_shapes, splice, _Keys
+
+SHAPES = """\
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+@prefix schema: <http://schema.org/> .
+
+<https://w3id.org/tems/shapes/ThingShape> a sh:NodeShape ;
+    sh:property [ sh:path schema:name ; sh:datatype xsd:string ; sh:minCount 1 ] ;
+    sh:property [ sh:path schema:identifier ; sh:datatype xsd:string ; sh:minCount 2 ; sh:maxCount 4 ] ;
+    sh:property [ sh:path schema:url ; sh:nodeKind sh:IRI ; sh:maxCount 1 ] .
+"""
+
+SPEC = """\
+openapi: 3.0.3
+info:
+  title: Things
+  version: 1.0.0
+components:
+  schemas:
+    # hand-written, keep this comment
+    Error:
+      type: object
+      properties:
+        message: {type: string}
+  responses:
+    NotFound:
+      description: Not found
+"""
+
+KEYS = _Keys({"schema": "http://schema.org/"})
+
+def components(ttl=SHAPES, messages=None):
+    g = Graph().parse(data=ttl, format="turtle")
+    return compile_shapes(g, KEYS, "shapes.ttl", messages=messages)
+
+def test_required_arrays_are_not_empty():
+    properties = components()["ThingShape"]["properties"]
+    assert properties["schema:name"]["oneOf"][1]["minItems"] == 1
+    assert properties["schema:identifier"] == {"type": "array", "items": {"type": "string"},
+                                               "minItems": 2, "maxItems": 4}
+    assert properties["schema:url"] == {"type": "string", "format": "uri"}
+    assert components()["ThingShape"]["required"] == ["schema:identifier", "schema:name"]
+
+def test_properties_on_the_same_path_are_merged_and_reported():
+    ttl = SHAPES + """\
+<https://w3id.org/tems/shapes/ThingShape>
+    sh:property [ sh:path schema:name ; sh:maxLength 80 ; sh:maxCount 1 ] .
+"""
+    messages = []
+    name = components(ttl, messages)["ThingShape"]["properties"]["schema:name"]
+    assert len(name["allOf"]) == 2
+    assert {"maxLength": 80} in name["allOf"]
+    assert messages == ["ThingShape: 2 sh:property on schema:name merged with allOf"]
+    assert "schema:name" in components(ttl)["ThingShape"]["required"]
+
+def test_splice_keeps_hand_written_content():
+    generated = components()
+    text = splice(SPEC, generated)
+    assert text.startswith(SPEC.split("  responses:")[0].rstrip("\n"))
+    assert "    # hand-written, keep this comment\n" in text
+    assert text.endswith("  responses:\n    NotFound:\n      description: Not found\n")
+    spec = yaml.safe_load(text)
+    assert spec["components"]["schemas"]["ThingShape"] == generated["ThingShape"]
+    assert spec["components"]["schemas"]["Error"]["properties"] == {"message": {"type": "string"}}
+
+def test_splice_is_idempotent():
+    generated = components()
+    once = splice(SPEC, generated)
+    assert splice(once, generated) == once
+    assert once.count(BEGIN) == once.count(END) == 1
+
+def test_splice_without_components_removes_the_block():
+    assert splice(splice(SPEC, components()), {}) == SPEC
+
+def test_check_reports_drift(registry, monkeypatch, capsys):
+    monkeypatch.setattr(shacl_to_jsonschema, "REPO_ROOT", registry.root)
+    registry.write("tems/shapes/things/1.0.0/things.ttl", SHAPES)
+    spec = registry.write("tems/open-api/things/1.0.0/things.yaml", SPEC)
+    assert shacl_to_jsonschema.main(["--check"]) == 1
+    assert "ThingShape: missing" in capsys.readouterr().out
+    assert spec.read_text(encoding="utf-8") == SPEC
+    assert shacl_to_jsonschema.main([]) == 0
+    registry_manifest.invalidate()
+    assert shacl_to_jsonschema.main(["--check"]) == 0
@@ -0,0 +1,130 @@
+import json
+import pytest
+from rdflib import Graph, BNode, Literal
+from rdflib.compare import isomorphic
+from rdflib.namespace import XSD
+from rdflib.plugins.parsers.jsonld import to_rdf
+
+import stream_serialize
+from serialize_from_ttl import JSONLD_CONTEXT
+
+TTL = r'''
+@prefix ex: <https://example.org/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+
+ex:a a ex:Thing ;
+    rdfs:comment """line one
+line two""" ;
+    rdfs:label "quote \" backslash \\ tab \t cr \r end", "Grüße"@de ;
+    ex:count 7 ;
+    ex:ratio "0.5"^^xsd:decimal ;
+    ex:flag true ;
+    ex:date "2024-01-31"^^xsd:date ;
+    ex:next ex:b ;
+    ex:part [ rdfs:label """nested
+blank""" ] .
+ex:b rdfs:label "b" .
+'''
+
+def load_outputs(jsonld, rdfxml):
+    from_jsonld = Graph()
+    to_rdf(json.loads(jsonld.read_text(encoding="utf-8")), from_jsonld)
+    return from_jsonld, Graph().parse(rdfxml.as_posix(), format="xml")
+
+@pytest.mark.parametrize("run_lines", [stream_serialize.RUN_LINES, 2])
+def test_streamed_output_round_trips(registry, run_lines):
+    ttl = registry.write("big.ttl", TTL)
+    source = Graph().parse(ttl.as_posix(), format="turtle")
+    jsonld, rdfxml, nt = (registry.root / f"big{s}" for s in (".jsonld", ".rdf.xml", ".nt"))
+    n = stream_serialize.serialize_streaming(ttl, jsonld, rdfxml, JSONLD_CONTEXT, run_lines, nt_path=nt)
+    assert n == len(source)
+    for g in load_outputs(jsonld, rdfxml):
+        assert isomorphic(g, source)
+    # The published N-Triples are the sorted, distinct lines
+    lines = nt.read_text(encoding="utf-8").splitlines()
+    assert lines == sorted(set(lines)) and len(lines) == n
+    assert isomorphic(Graph().parse(nt.as_posix(), format="nt"), source)
+
+def test_line_based_sources(registry):
+    source = Graph().parse(data=TTL, format="turtle")
+    nt = registry.write("big.nt", source.serialize(format="nt") + "# comment\n\n")
+    jsonld, rdfxml = registry.root / "big.jsonld", registry.root / "big.rdf.xml"
+    assert stream_serialize.serialize_streaming(nt, jsonld, rdfxml, JSONLD_CONTEXT, 2, nt_path=nt) == len(source)
+    for g in load_outputs(jsonld, rdfxml):
+        assert isomorphic(g, source)
+    assert isomorphic(Graph().parse(nt.as_posix(), format="nt"), source)  # the source is left alone
+
+    # N-Quads: the triples of every graph, graph names dropped
+    triples = source.serialize(format="nt").strip().splitlines()
+    nq = registry.write("quads.nq", "".join(f"{t[:-2]} <https://example.org/g{i % 2}> .\n" for i, t in enumerate(triples)))
+    out = registry.root / "quads.nt"
+    assert stream_serialize.serialize_streaming(nq, registry.root / "quads.jsonld", registry.root / "quads.rdf.xml",
+                                                JSONLD_CONTEXT, nt_path=out) == len(source)
+    assert isomorphic(Graph().parse(out.as_posix(), format="nt"), source)
+
+def test_line_based_syntax_errors_name_the_line(registry):
+    nt = registry.write("bad.nt", "<https://example.org/a> <https://example.org/p> \"ok\" .\n<broken\n")
+    with pytest.raises(Exception, match="bad.nt:2"):
+        stream_serialize.serialize_streaming(nt, registry.root / "bad.jsonld", registry.root / "bad.rdf.xml",
+                                             JSONLD_CONTEXT)
+
+def test_blank_node_labels_outside_the_parser_pattern():
+    nt_bnode = stream_serialize.nt_bnode
+    assert nt_bnode(BNode("n" + "0" * 32 + "b5")) == "_:b5"
+    # Never the label of a parser node, even when it looks like one
+    assert nt_bnode(BNode("b5")) == "_:xb5"
+    assert nt_bnode(BNode("cb0d9a_x-1")) == "_:xcb0d9a_x-1"
+    odd = BNode("a b/ü")
+    assert nt_bnode(odd) == "_:h" + "a b/ü".encode("utf-8").hex()
+    line = f"{nt_bnode(odd)} <https://example.org/p> {nt_bnode(BNode('b5'))} .\n"
+    assert len(Graph().parse(data=line, format="nt")) == 1
+
+def test_nt_term_writes_n_triples(registry):
+    g = Graph().parse(data=TTL, format="turtle")
+    lines = "".join(f"{stream_serialize.nt_term(s)} {stream_serialize.nt_term(p)} {stream_serialize.nt_term(o)} .\n"
+                    for s, p, o in g)
+    assert len(lines.splitlines()) == len(g)
+    assert isomorphic(Graph().parse(data=lines, format="nt"), g)
+
+CONTEXT = {"@context": dict(JSONLD_CONTEXT["@context"], ex="https://example.org/",
+                            label={"@id": "http://www.w3.org/2000/01/rdf-schema#label"})}
+
+def canonical_outputs(registry, g, name):
+    jsonld, rdfxml = registry.root / f"{name}.jsonld", registry.root / f"{name}.rdf.xml"
+    assert stream_serialize.serialize_canonical(g, jsonld, rdfxml, CONTEXT) == len(g)
+    return jsonld, rdfxml
+
+def test_canonical_output_round_trips(registry):
+    source = Graph().parse(data=TTL, format="turtle")
+    for g in load_outputs(*canonical_outputs(registry, source, "canonical")):
+        assert isomorphic(g, source)
+
+def test_canonical_output_is_byte_stable(registry):
+    source = Graph().parse(data=TTL, format="turtle")
+    reordered = Graph()
+    for prefix, ns in source.namespaces():
+        reordered.bind(prefix, ns)
+    for triple in sorted(source, reverse=True):
+        reordered.add(triple)
+    first = [p.read_bytes() for p in canonical_outputs(registry, source, "first")]
+    second = [p.read_bytes() for p in canonical_outputs(registry, Graph().parse(data=TTL, format="turtle"), "second")]
+    third = [p.read_bytes() for p in canonical_outputs(registry, reordered, "third")]
+    assert first == second == third
+
+def test_canonical_json_ld_is_compacted(registry):
+    jsonld, _ = canonical_outputs(registry, Graph().parse(data=TTL, format="turtle"), "compact")
+    nodes = {n["@id"]: n for n in json.loads(jsonld.read_text(encoding="utf-8"))["@graph"]}
+    a = nodes["ex:a"]
+    assert a["@type"] == "ex:Thing"
+    assert a["ex:count"] == 7 and a["ex:flag"] is True
+    assert a["ex:ratio"] == {"@value": "0.5", "@type": "xsd:decimal"}
+    assert a["ex:next"] == {"@id": "ex:b"}
+    assert nodes["ex:b"]["label"] == "b"
+
+def test_only_canonical_lexical_forms_become_json_values():
+    native = stream_serialize.native_value
+    assert native(Literal("-12", datatype=XSD.integer)) == -12
+    assert native(Literal("false", datatype=XSD.boolean)) is False
+    for lexical, datatype in [("007", XSD.integer), ("-0", XSD.integer), ("1", XSD.boolean), ("1.5", XSD.decimal)]:
+        assert native(Literal(lexical, datatype=datatype, normalize=False)) is None
@@ -0,0 +1,53 @@
+import json
+from rdflib import Graph
+
+import term_index
+
+ONTOLOGY = """\
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix tc: <https://example.org/tc#> .
+
+<https://example.org/tc> a owl:Ontology ; rdfs:label "Core"@en .
+tc:MediaObject a owl:Class ; rdfs:label "media object"@en .
+tc:Article a owl:Class ; rdfs:subClassOf tc:MediaObject ; rdfs:label "article"@en, "Artikel"@de .
+tc:author a owl:ObjectProperty ; rdfs:domain tc:Article ; rdfs:range tc:Person .
+tc:Person a owl:Class .
+tc:rex a tc:Person .
+"""
+
+def index():
+    return term_index.build_term_index(Graph().parse(data=ONTOLOGY, format="turtle"), "abc")
+
+def curies(terms):
+    return [t["curie"] for t in terms]
+
+def test_terms_and_references_are_curies():
+    built = index()
+    assert built["prefixes"] == {"tc": "https://example.org/tc#"}
+    terms = {t["curie"]: t for t in built["terms"]}
+    assert terms["tc:Article"]["parents"] == ["tc:MediaObject"]
+    assert terms["tc:Article"]["labels"] == {"de": ["Artikel"], "en": ["article"]}
+    assert terms["tc:author"] == {"iri": "https://example.org/tc#author", "curie": "tc:author", "kind": "objectProperty",
+                                  "domain": ["tc:Article"], "range": ["tc:Person"]}
+    assert terms["tc:rex"]["kind"] == "individual"
+    assert "https://example.org/tc" not in [t["iri"] for t in built["terms"]]
+    assert [w for w, _ in built["tokens"]] == sorted(w for w, _ in built["tokens"])
+
+def test_prefix_lookup():
+    built = index()
+    assert curies(term_index.search(built, "media obj")) == ["tc:MediaObject"]
+    assert curies(term_index.search(built, "art")) == ["tc:Article"]
+    assert curies(term_index.search(built, "auth")) == ["tc:author"]
+    assert curies(term_index.search(built, "Artikel")) == ["tc:Article"]
+
+def test_trigram_fallback_catches_typos():
+    assert curies(term_index.search(index(), "artcle")) == ["tc:Article"]
+    assert term_index.search(index(), "zzzz") == []
+
+def test_written_index_searches_the_same(tmp_path, capsys):
+    path = tmp_path / "core.terms.json"
+    term_index.write_term_index(index(), path)
+    assert json.loads(path.read_text(encoding="utf-8")) == index()
+    assert term_index.main([str(path), "person"]) == 0
+    assert capsys.readouterr().out.split()[:2] == ["tc:Person", "class"]
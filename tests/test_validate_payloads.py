@@ -0,0 +1,63 @@
+import json
+import pytest
+
+import jsonld_context
+import validate_payloads
+
+SHAPES = """\
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix schema: <http://schema.org/> .
+@prefix tems: <https://w3id.org/tems/core#> .
+
+<https://w3id.org/tems/shapes/MediaObjectShape> a sh:NodeShape ;
+  sh:targetClass tems:MediaObject ;
+  sh:property [ sh:path schema:name ; sh:minCount 1 ] .
+"""
+
+CONTEXT_URL = jsonld_context.context_url("tems/context.jsonld")
+
+@pytest.fixture
+def run(registry, monkeypatch):
+    monkeypatch.setattr(validate_payloads, "REPO_ROOT", registry.root)
+    registry.write("tems/shapes/media/1.0.0/media.ttl", SHAPES)
+    registry.write("tems/context.jsonld", json.dumps({"@context": {
+        "tems": "https://w3id.org/tems/core#", "schema": "http://schema.org/"}}))
+    jsonld_context._read_context.cache_clear()
+    shapes = [str(registry.root / "tems/shapes/media/1.0.0/media.ttl")]
+    def run(*payloads):
+        items = [(f"line:{i}", p if isinstance(p, str) else json.dumps(p), "json-ld")
+                 for i, p in enumerate(payloads, 1)]
+        return list(validate_payloads.validate_stream(items, shapes))
+    yield run
+    jsonld_context._read_context.cache_clear()
+
+def test_conforming_and_violating_payloads(run):
+    ok, bad = run({"@type": "tems:MediaObject", "schema:name": "x"}, {"@type": "tems:MediaObject"})
+    assert ok == {"id": "line:1", "conforms": True, "results": []}
+    assert bad["conforms"] is False and bad["results"][0]["path"] == "http://schema.org/name"
+
+def test_published_context_is_read_from_the_tree(run):
+    (result,) = run({"@context": CONTEXT_URL, "@type": "tems:MediaObject"})
+    assert result["conforms"] is False and "error" not in result
+
+@pytest.mark.parametrize("context", [
+    "https://example.org/context.jsonld",
+    "context.jsonld",
+    [CONTEXT_URL, "https://example.org/other.jsonld"],
+    {"@import": "https://example.org/context.jsonld"},
+    {"MediaObject": {"@id": "tems:MediaObject", "@context": "https://example.org/scoped.jsonld"}},
+])
+def test_other_contexts_are_never_fetched(run, monkeypatch, context):
+    import rdflib.plugins.shared.jsonld.context as loader
+    fetched = []
+    monkeypatch.setattr(loader, "source_to_json", lambda url, *a, **k: fetched.append(url) or ({}, None))
+    ok, rejected = run({"@type": "tems:MediaObject", "schema:name": "x"},
+                       {"@context": context, "@type": "tems:MediaObject"})
+    assert ok["conforms"] is True
+    assert rejected["conforms"] is False and "not fetched" in rejected["error"]
+    assert fetched == []
+
+def test_malformed_line_is_a_per_line_error(run):
+    bad, ok = run("{not json", {"@type": "tems:MediaObject", "schema:name": "x"})
+    assert bad["id"] == "line:1" and "JSONDecodeError" in bad["error"]
+    assert ok["conforms"] is True
@@ -0,0 +1,154 @@
+import validate_shacl
+
+ONTOLOGY = """\
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <https://example.org/ds3#> .
+
+ex:Thing a owl:Class .
+"""
+
+SHAPES = """\
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+
+<https://example.org/shapes/ClassLabel> a sh:NodeShape ;
+    sh:targetClass owl:Class ;
+    sh:property [ sh:path rdfs:label ; sh:minCount 1 ] .
+"""
+
+def run(*argv):
+    return validate_shacl.main(["--jobs", "1", *argv])
+
+def test_every_dataspace_in_the_manifest_is_validated(registry, capsys):
+    registry.write("ds3/ontologies/core/1.0.0/core.ttl", ONTOLOGY)
+    registry.write("ds3/shapes/labels/1.0.0/labels.ttl", SHAPES)
+    assert run() == 1
+    out = capsys.readouterr().out
+    assert "Shapes: ds3/shapes/labels/1.0.0/labels.ttl" in out
+    assert "Data  : ds3/ontologies/core/1.0.0/core.ttl" in out
+    assert "Conforms: False" in out
+
+PETS = """\
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <https://example.org/pets#> .
+
+ex:Dog rdfs:subClassOf ex:Animal .
+ex:hasName rdfs:subPropertyOf ex:label .
+ex:owns rdfs:domain ex:Person .
+ex:rex a ex:Dog ; ex:hasName "Rex" .
+ex:bob ex:owns ex:rex .
+"""
+
+CARS = """\
+@prefix ex: <https://example.org/pets#> .
+
+ex:c1 a ex:Car ; ex:wheels 4 .
+"""
+
+TARGETS = """\
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix ex: <https://example.org/pets#> .
+
+ex:AnimalShape a sh:NodeShape ; sh:targetClass ex:Animal ;
+    sh:property [ sh:path ex:age ; sh:minCount 1 ] .
+ex:PersonShape a sh:NodeShape ; sh:targetClass ex:Person ;
+    sh:property [ sh:path ex:name ; sh:minCount 1 ] .
+ex:BoatShape a sh:NodeShape ; sh:targetClass ex:Boat ;
+    sh:property [ sh:path ex:hull ; sh:minCount 1 ] .
+"""
+
+PREDICATES = """\
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix ex: <https://example.org/pets#> .
+
+ex:LabelShape a sh:NodeShape ; sh:targetSubjectsOf ex:label ;
+    sh:property [ sh:path ex:label ; sh:maxLength 2 ] .
+"""
+
+NODES = """\
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix ex: <https://example.org/pets#> .
+
+ex:C1Shape a sh:NodeShape ; sh:targetNode ex:c1 ;
+    sh:property [ sh:path ex:wheels ; sh:minCount 1 ] .
+"""
+
+def write_pets(registry):
+    registry.write("tems/ontologies/pets/1.0.0/pets.ttl", PETS)
+    registry.write("tems/ontologies/cars/1.0.0/cars.ttl", CARS)
+    registry.write("tems/shapes/targets/1.0.0/targets.ttl", TARGETS)
+    registry.write("tems/shapes/predicates/1.0.0/predicates.ttl", PREDICATES)
+    registry.write("tems/shapes/nodes/1.0.0/nodes.ttl", NODES)
+    manifest = validate_shacl.registry_manifest.current()
+    shapes = validate_shacl.section_ttls(manifest, "shapes")
+    data = validate_shacl.section_ttls(manifest, "ontologies")
+    return [(s, d) for s in shapes for d in data], shapes, data
+
+def test_pruning_does_not_change_results(registry):
+    pairs, shapes, data = write_pets(registry)
+    applicable, skipped = validate_shacl.prune_pairs(pairs, shapes, data)
+    unpruned = {(s, d): (conforms, text) for s, d, conforms, text in validate_shacl.run_matrix(pairs, 1, "closure")}
+    pruned = {(s, d): (conforms, text) for s, d, conforms, text in validate_shacl.run_matrix(applicable, 1, "closure")}
+
+    # Pairs that were pruned would have conformed with an empty report...
+    assert skipped == [("tems/shapes/predicates/1.0.0/predicates.ttl", "tems/ontologies/cars/1.0.0/cars.ttl"),
+                       ("tems/shapes/targets/1.0.0/targets.ttl", "tems/ontologies/cars/1.0.0/cars.ttl")]
+    for pair in skipped:
+        assert unpruned[pair][0] is True
+        assert "Results (" not in unpruned[pair][1]
+    # ...and the rest are validated exactly as without pruning
+    assert pruned == {pair: unpruned[pair] for pair in applicable}
+    targets_on_pets = unpruned[("tems/shapes/targets/1.0.0/targets.ttl", "tems/ontologies/pets/1.0.0/pets.ttl")]
+    assert targets_on_pets[0] is False
+    assert "Focus Node: ex:rex" in targets_on_pets[1]  # ex:Animal via rdfs:subClassOf
+    assert "Focus Node: ex:bob" in targets_on_pets[1]  # ex:Person via rdfs:domain
+    assert not unpruned[("tems/shapes/predicates/1.0.0/predicates.ttl", "tems/ontologies/pets/1.0.0/pets.ttl")][0]
+    assert not unpruned[("tems/shapes/nodes/1.0.0/nodes.ttl", "tems/ontologies/pets/1.0.0/pets.ttl")][0]
+
+def test_pruned_and_unpruned_runs_agree(registry, capsys):
+    write_pets(registry)
+    assert run() == run("--no-prune") == 1
+
+HIERARCHY = """\
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <https://example.org/h#> .
+
+ex:A a owl:Class .
+ex:B a owl:Class ; rdfs:subClassOf ex:A .
+ex:C a owl:Class ; rdfs:subClassOf ex:B .
+ex:r rdfs:domain ex:B .
+ex:q rdfs:subPropertyOf ex:r .
+ex:p rdfs:subPropertyOf ex:q .
+ex:x ex:p ex:y .
+ex:z a ex:C .
+"""
+
+HIERARCHY_SHAPES = """\
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <https://example.org/h#> .
+
+ex:TransitiveClasses a sh:NodeShape ; sh:targetNode ex:C ;
+    sh:property [ sh:path rdfs:subClassOf ; sh:hasValue ex:A ] .
+ex:TransitiveProperties a sh:NodeShape ; sh:targetNode ex:p ;
+    sh:property [ sh:path rdfs:subPropertyOf ; sh:hasValue ex:r ] .
+ex:SubClassesOfA a sh:NodeShape ; sh:targetObjectsOf rdfs:subClassOf ;
+    sh:property [ sh:path [ sh:inversePath rdfs:subClassOf ] ; sh:minCount 1 ] .
+ex:Bs a sh:NodeShape ; sh:targetClass ex:A ;
+    sh:property [ sh:path ex:r ; sh:minCount 1 ] .
+"""
+
+def report_lines(text):
+    return sorted(line.strip() for line in text.splitlines() if line.strip().startswith(("Focus Node", "Result Path", "Message")))
+
+def test_closure_matches_rdfs_inference(registry):
+    data = str(registry.write("tems/ontologies/h/1.0.0/h.ttl", HIERARCHY))
+    shapes = str(registry.write("tems/shapes/h/1.0.0/h.ttl", HIERARCHY_SHAPES))
+    closure = validate_shacl.validate_pair(shapes, data, "closure")
+    rdfs = validate_shacl.validate_pair(shapes, data, "rdfs")
+    assert closure[0] == rdfs[0] is False  # ex:z has no ex:r
+    assert report_lines(closure[1]) == report_lines(rdfs[1])
+    assert "Focus Node: ex:z" in closure[1] and "Focus Node: ex:C" not in closure[1]
@@ -0,0 +1,65 @@
+import pytest
+
+import serialize_from_ttl
+import validate_syntax
+
+SOURCE = "tems/shapes/example/1.0.0/example.ttl"
+TTL = """\
+@prefix ex: <https://example.org/> .
+ex:a ex:label "A" ; ex:next ex:b .
+"""
+
+@pytest.fixture
+def serialized(registry, monkeypatch):
+    monkeypatch.setattr(validate_syntax, "REPO_ROOT", registry.root)
+    registry.write(SOURCE, TTL)
+    assert serialize_from_ttl.main(["--jobs", "1"]) == 0
+    return registry
+
+def check(capsys, *argv):
+    import registry_manifest
+    registry_manifest.invalidate()
+    capsys.readouterr()
+    code = validate_syntax.main(["--jobs", "1", *argv])
+    out = capsys.readouterr()
+    return code, out.out + out.err
+
+def test_round_trip_passes(serialized, capsys):
+    code, out = check(capsys)
+    assert code == 0 and "4 file(s) are valid and round-trip" in out
+
+def test_unchanged_groups_are_not_reparsed(serialized, capsys, monkeypatch):
+    check(capsys)
+    monkeypatch.setattr(validate_syntax, "check_group", lambda task: pytest.fail(f"re-checked {task}"))
+    code, out = check(capsys)
+    assert code == 0 and "(4 unchanged, not re-parsed)" in out
+
+def test_modes_are_recorded_separately(serialized, capsys):
+    check(capsys, "--ttl-only")
+    check(capsys)
+    assert "unchanged" in check(capsys, "--ttl-only")[1]
+    assert "unchanged" in check(capsys)[1]
+
+def test_changed_serialization_is_rechecked(serialized, capsys):
+    check(capsys)
+    jsonld = serialized.root / SOURCE.replace(".ttl", ".jsonld")
+    jsonld.write_text(jsonld.read_text().replace('"A"', '"B"'))
+    code, out = check(capsys)
+    assert code == 1 and "does not round-trip" in out
+    # Failures are never recorded as passed
+    assert check(capsys)[0] == 1
+
+def test_changed_context_is_rechecked(serialized, capsys):
+    check(capsys)
+    context = serialized.root / "tems/context.jsonld"
+    context.write_text(context.read_text() + "\n")
+    assert "unchanged" not in check(capsys)[1]
+
+def test_published_n_triples_are_round_tripped(serialized, capsys):
+    assert serialize_from_ttl.main(["--jobs", "1", "--stream-threshold", "0.000001"]) == 0
+    nt = serialized.root / SOURCE.replace(".ttl", ".nt")
+    code, out = check(capsys)
+    assert code == 0 and "5 file(s) are valid and round-trip" in out
+    nt.write_text(nt.read_text(encoding="utf-8").replace('"A"', '"B"'), encoding="utf-8")
+    code, out = check(capsys)
+    assert code == 1 and f"{SOURCE[:-4]}.nt: does not round-trip" in out